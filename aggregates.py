@@ -0,0 +1,125 @@
+import pandas as pd
+
+# Aggregate specs describe a small chart dataset so it can be computed either in
+# Snowflake (config.build_aggregate_query) or locally (aggregate_frame) with the
+# same result:
+#
+#   {
+#       "group_by": ["ZONE", "TYPE"],
+#       "measures": {"count": ("count", None),
+#                    "GOOGLE_REVIEW_RATING": ("mean", "GOOGLE_REVIEW_RATING"),
+#                    "TOTAL": ("sum", ["_2019", "_2020"])},
+#       "bucket": {"column": "ENTRANCE_FEE_IN_INR", "name": "Fee_Range",
+#                  "bins": [-1, 0, 100, 500, float('inf')],
+#                  "labels": ["Free", "₹1-100", "₹101-500", "₹500+"]},
+#   }
+#
+# group_by may be empty: the result is then a single row over every row.
+# Measures are (op, column) pairs with op in count/sum/mean/min/max. A list of
+# columns is summed row-wise first (NULLs count as 0). The optional bucket adds a
+# leading group key with pd.cut semantics (right-inclusive bins); rows outside
+# the bins are dropped.
+
+AGGREGATE_OPS = ("count", "sum", "mean", "min", "max")
+
+
+def aggregate_keys(spec):
+    """Output group key columns of a spec, bucket first"""
+    keys = list(spec.get("group_by", []))
+    if spec.get("bucket"):
+        keys.insert(0, spec["bucket"]["name"])
+    return keys
+
+
+def aggregate_source_columns(spec):
+    """Table columns a spec reads"""
+    columns = list(spec.get("group_by", []))
+    if spec.get("bucket"):
+        columns.append(spec["bucket"]["column"])
+    for op, column in spec["measures"].values():
+        if isinstance(column, (list, tuple)):
+            columns.extend(column)
+        elif column is not None:
+            columns.append(column)
+    return list(dict.fromkeys(columns))
+
+
+def normalize_aggregate(result, spec):
+    """Give an aggregate result a canonical column order, row order and dtypes"""
+    keys = aggregate_keys(spec)
+    result = result[keys + list(spec["measures"])].copy()
+    for name, (op, _) in spec["measures"].items():
+        if op == "count":
+            result[name] = pd.to_numeric(result[name]).fillna(0).astype("int64")
+        else:
+            result[name] = pd.to_numeric(result[name], errors="coerce").astype("float64")
+    bucket = spec.get("bucket")
+    if bucket:
+        result[bucket["name"]] = pd.Categorical(
+            result[bucket["name"]], categories=bucket["labels"], ordered=True
+        )
+    for key in keys:
+        if not bucket or key != bucket["name"]:
+            # Missing keys are None whichever path produced them (NaN in pandas, NULL in SQL)
+            values = result[key].astype(object)
+            result[key] = values.where(values.notna(), None)
+    return result.sort_values(keys, na_position="last").reset_index(drop=True)
+
+
+def aggregate_frame(df, spec):
+    """Compute an aggregate spec in pandas (fallback for the warehouse query)"""
+    work = df
+    keys = list(spec.get("group_by", []))
+    bucket = spec.get("bucket")
+    if bucket:
+        work = df.assign(**{bucket["name"]: pd.cut(
+            pd.to_numeric(df[bucket["column"]], errors="coerce"),
+            bins=bucket["bins"],
+            labels=bucket["labels"]
+        ).astype(object)})
+        work = work[work[bucket["name"]].notna()]
+        keys.insert(0, bucket["name"])
+
+    measures = {}
+    for name, (op, column) in spec["measures"].items():
+        if op not in AGGREGATE_OPS:
+            raise ValueError(f"Unsupported aggregate: {op!r}")
+        if isinstance(column, (list, tuple)):
+            values = work[list(column)].apply(pd.to_numeric, errors="coerce").fillna(0).sum(axis=1)
+        elif column is None:
+            values = pd.Series(1, index=work.index)
+        else:
+            values = pd.to_numeric(work[column], errors="coerce")
+        measures[name] = (op, values)
+
+    if not keys:
+        # Without group keys SQL returns one row over all rows, even when there are none
+        row = {}
+        for name, (op, column) in spec["measures"].items():
+            values = measures[name][1]
+            if op == "count":
+                row[name] = len(values) if column is None else values.count()
+            elif op == "sum":
+                row[name] = values.sum(min_count=0)
+            else:
+                row[name] = getattr(values, op)()
+        return normalize_aggregate(pd.DataFrame([row]), spec)
+
+    grouped_input = work[keys].copy()
+    for key in keys:
+        # Categorical keys (see table_schemas.py) group like plain values
+        grouped_input[key] = grouped_input[key].astype(object)
+    for name, (_, values) in measures.items():
+        grouped_input[name] = values
+    grouped = grouped_input.groupby(keys, dropna=False, sort=False)
+
+    result = grouped.size().rename("__size").reset_index()
+    for name, (op, column) in spec["measures"].items():
+        if op == "count":
+            series = grouped.size() if column is None else grouped[name].count()
+        elif op == "sum":
+            series = grouped[name].sum(min_count=0)
+        else:
+            series = getattr(grouped[name], op)()
+        result[name] = series.values
+    return normalize_aggregate(result.drop(columns="__size"), spec)
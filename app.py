@@ -1,10 +1,47 @@
+import importlib
 import streamlit as st
-import pandas as pd
-from config import init_connection
-from country_visitors import show_country_visitors_analysis
-from gender_analysis import show_gender_analysis
-from tourist_places import show_tourist_places_analysis
-from top_places import show_top_places_analysis
+from config import (init_connection, get_pool_metrics, get_cache_stats, refresh_data,
+                    get_settings, start_prefetch, wait_for_prefetch, get_prefetch_report,
+                    get_shared_tables, begin_query_run, get_query_stats, timed_render,
+                    get_render_times, get_figure_cache_stats, get_chart_payloads,
+                    get_image_cache_stats)
+
+# Page registry: page modules (and the plotly imports they pull in) are only
+# imported when a page is first selected or prefetched
+PAGES = {
+    "COUNTRYWISEYEARLYVISITORS": {
+        "label": "🌍 International Visitors Trend",
+        "module": "country_visitors",
+        "show": "show_country_visitors_analysis",
+        "table": "COUNTRYWISEYEARLYVISITORS"
+    },
+    "COUNTRYWISEGENDER": {
+        "label": "👥 Gender Distribution Analysis",
+        "module": "gender_analysis",
+        "show": "show_gender_analysis",
+        "table": "COUNTRYWISEGENDER"
+    },
+    "INDIA_FAMOUS_TOURIST_PLACES": {
+        "label": "🗺️ Famous Tourist Destinations",
+        "module": "tourist_places",
+        "show": "show_tourist_places_analysis",
+        "table": "INDIAFAMOUSTOURISTPLACES"
+    },
+    "TOPPLACESTOVISIT": {
+        "label": "⭐ Top-Rated Places",
+        "module": "top_places",
+        "show": "show_top_places_analysis",
+        "table": "TOPPLACESTOVISIT"
+    }
+}
+
+def load_page(page_key):
+    """Import a page module on first use (later calls hit the module cache)"""
+    return importlib.import_module(PAGES[page_key]["module"])
+
+def page_prefetcher(page_key):
+    """Background loader that imports the page module and warms its data"""
+    return lambda: load_page(page_key).prefetch_data()
 
 # Set page configuration
 st.set_page_config(page_title="Snowflake Tourism Data Explorer", layout="wide")
@@ -12,6 +49,15 @@ st.set_page_config(page_title="Snowflake Tourism Data Explorer", layout="wide")
 # Initialize Snowflake connection when app starts
 init_connection()
 
+# Each rerun (navigation, widget input) supersedes this session's earlier queries,
+# which are cancelled in the warehouse if they are still running
+begin_query_run()
+
+# Optionally warm every page's data on a background thread pool (once per process)
+prefetch_enabled = get_settings()["prefetch_on_start"]
+if prefetch_enabled:
+    start_prefetch({page["table"]: page_prefetcher(key) for key, page in PAGES.items()})
+
 # Add title
 st.title("Snowflake Tourism Database Explorer")
 
@@ -19,21 +65,41 @@ st.title("Snowflake Tourism Database Explorer")
 st.sidebar.header("📊 Navigation Menu")
 selected_table = st.sidebar.radio(
     "Choose what to explore:",
-    options=["COUNTRYWISEYEARLYVISITORS", "COUNTRYWISEGENDER", "INDIA_FAMOUS_TOURIST_PLACES", "TOPPLACESTOVISIT"],
-    format_func=lambda x: {
-        "COUNTRYWISEYEARLYVISITORS": "🌍 International Visitors Trend",
-        "COUNTRYWISEGENDER": "👥 Gender Distribution Analysis",
-        "INDIA_FAMOUS_TOURIST_PLACES": "🗺️ Famous Tourist Destinations",
-        "TOPPLACESTOVISIT": "⭐ Top-Rated Places"
-    }[x]
+    options=list(PAGES),
+    format_func=lambda x: PAGES[x]["label"]
 )
 
+# Manual refresh drops cached results so the next load re-queries Snowflake
+if st.sidebar.button("🔄 Refresh data"):
+    refresh_data()
+
+# Show shared connection pool and cache metrics
+with st.sidebar.expander("⚙️ Connection Pool"):
+    st.json(get_pool_metrics())
+with st.sidebar.expander("🗄️ Result Cache"):
+    st.json(get_cache_stats())
+with st.sidebar.expander("📈 Figure Cache"):
+    st.json(get_figure_cache_stats())
+    st.caption("Chart payload sizes (bytes)")
+    st.json(get_chart_payloads())
+with st.sidebar.expander("🖼️ Image Cache"):
+    st.json(get_image_cache_stats())
+with st.sidebar.expander("⏹️ Query Cancellation"):
+    st.json(get_query_stats())
+with st.sidebar.expander("⏱️ Render Times"):
+    # Full page runs vs. fragment reruns (updated on the next full run)
+    st.json(get_render_times())
+if get_shared_tables() is not None:
+    with st.sidebar.expander("🧩 Shared Tables"):
+        st.json(get_shared_tables().stats())
+if prefetch_enabled:
+    with st.sidebar.expander("🚀 Warm-up"):
+        st.json(get_prefetch_report())
+
+# Reuse an in-flight background load of the selected page's table instead of querying again
+wait_for_prefetch(PAGES[selected_table]["table"])
+
 # Display the selected data analysis
-if selected_table == "COUNTRYWISEYEARLYVISITORS":
-    show_country_visitors_analysis()
-elif selected_table == "COUNTRYWISEGENDER":
-    show_gender_analysis()
-elif selected_table == "INDIA_FAMOUS_TOURIST_PLACES":
-    show_tourist_places_analysis()
-else:  # "TOPPLACESTOVISIT"
-    show_top_places_analysis()
\ No newline at end of file
+page = load_page(selected_table)
+with timed_render(f"page:{selected_table}"):
+    getattr(page, PAGES[selected_table]["show"])()
@@ -0,0 +1,203 @@
+"""Peak memory and wall time of the Arrow and row fetch paths
+
+Compares how a query result becomes a typed DataFrame:
+
+- rows:  fetchall() tuples -> pd.DataFrame(rows, columns) -> apply_table_schema
+- arrow: Arrow record batches -> Table.to_pandas() -> apply_table_schema
+
+By default the result is synthesized locally in the shape of
+INDIAFAMOUSTOURISTPLACES (fetchall-style tuples for the row path, an Arrow
+table for the Arrow path), so only the client-side conversion is measured.
+With --snowflake the same columns are generated in the warehouse with
+TABLE(GENERATOR(...)) and fetched through the connector with fetchall() and
+fetch_pandas_all(), using the SNOWFLAKE_* variables from .env.
+
+Every (path, rows) case runs in a fresh interpreter. Peak memory is the
+tracemalloc peak (Python objects and NumPy buffers) plus the growth of
+pyarrow's memory pool during the conversion.
+
+    python benchmarks/fetch_paths.py                      # 10k, 100k, 1M, 10M rows
+    python benchmarks/fetch_paths.py --rows 10000 100000
+    python benchmarks/fetch_paths.py --snowflake --rows 10000 1000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import pandas as pd
+
+from table_schemas import apply_table_schema
+
+TABLE_NAME = "INDIAFAMOUSTOURISTPLACES"
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000, 10_000_000]
+PATHS = ("rows", "arrow")
+
+ZONES = ["Northern", "Southern", "Eastern", "Western", "Central", "North Eastern"]
+TYPES = ["Temple", "Fort", "Beach", "Park", "Museum", "Lake", "Palace", "Monument"]
+BEST_TIMES = ["Morning", "Evening", "Afternoon", "All", "Night"]
+
+
+def synthetic_columns(rows, seed=0):
+    """Column arrays of a places table with rows rows (NUMBER columns as int64/float64)"""
+    rng = np.random.default_rng(seed)
+    index = np.arange(rows)
+    return {
+        "NAME": np.char.add("Place ", index.astype(str)).astype(object),
+        "ZONE": np.array(ZONES, dtype=object)[rng.integers(0, len(ZONES), rows)],
+        "STATE": np.char.add("State ", rng.integers(0, 36, rows).astype(str)).astype(object),
+        "CITY": np.char.add("City ", rng.integers(0, 500, rows).astype(str)).astype(object),
+        "TYPE": np.array(TYPES, dtype=object)[rng.integers(0, len(TYPES), rows)],
+        "GOOGLE_REVIEW_RATING": np.round(rng.uniform(1, 5, rows), 1),
+        "TIME_NEEDED_TO_VISIT_IN_HRS": np.round(rng.uniform(0.5, 8, rows), 1),
+        "ENTRANCE_FEE_IN_INR": rng.choice([0, 20, 25, 50, 100, 250, 500, 1000], rows),
+        "NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS": np.round(rng.exponential(0.5, rows), 2),
+        "BEST_TIME_TO_VISIT": np.array(BEST_TIMES, dtype=object)[rng.integers(0, len(BEST_TIMES), rows)],
+        "DSLR_ALLOWED": np.where(rng.random(rows) < 0.8, "Yes", "No").astype(object),
+        "IMAGE_URL": np.char.add("https://example.com/images/", index.astype(str)).astype(object)
+    }
+
+
+def generator_sql(rows):
+    """Snowflake query producing the synthetic columns server-side"""
+    return f"""
+        SELECT
+            'Place ' || SEQ8() AS NAME,
+            ARRAY_CONSTRUCT({", ".join(repr(z) for z in ZONES)})[UNIFORM(0, {len(ZONES) - 1}, RANDOM())]::STRING AS ZONE,
+            'State ' || UNIFORM(0, 35, RANDOM()) AS STATE,
+            'City ' || UNIFORM(0, 499, RANDOM()) AS CITY,
+            ARRAY_CONSTRUCT({", ".join(repr(t) for t in TYPES)})[UNIFORM(0, {len(TYPES) - 1}, RANDOM())]::STRING AS TYPE,
+            ROUND(UNIFORM(1::FLOAT, 5::FLOAT, RANDOM()), 1) AS GOOGLE_REVIEW_RATING,
+            ROUND(UNIFORM(0.5::FLOAT, 8::FLOAT, RANDOM()), 1) AS TIME_NEEDED_TO_VISIT_IN_HRS,
+            UNIFORM(0, 1000, RANDOM()) AS ENTRANCE_FEE_IN_INR,
+            ROUND(UNIFORM(0::FLOAT, 3::FLOAT, RANDOM()), 2) AS NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS,
+            ARRAY_CONSTRUCT({", ".join(repr(b) for b in BEST_TIMES)})[UNIFORM(0, {len(BEST_TIMES) - 1}, RANDOM())]::STRING
+                AS BEST_TIME_TO_VISIT,
+            IFF(UNIFORM(0, 9, RANDOM()) < 8, 'Yes', 'No') AS DSLR_ALLOWED,
+            'https://example.com/images/' || SEQ8() AS IMAGE_URL
+        FROM TABLE(GENERATOR(ROWCOUNT => {int(rows)}))
+    """
+
+
+def _arrow_pool():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    return pa.default_memory_pool()
+
+
+def measure(convert):
+    """(seconds, peak bytes, frame) of convert()"""
+    pool = _arrow_pool()
+    pool_start = pool.bytes_allocated() if pool is not None else 0
+    tracemalloc.start()
+    started = time.perf_counter()
+    df = convert()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if pool is not None:
+        peak += max(0, pool.max_memory() - pool_start)
+    return elapsed, peak, df
+
+
+def run_local(path, rows):
+    columns = synthetic_columns(rows)
+    names = list(columns)
+    if path == "rows":
+        # What cursor.fetchall() hands back: one tuple of Python objects per row
+        result = list(zip(*(values.tolist() for values in columns.values())))
+        del columns
+        convert = lambda: apply_table_schema(TABLE_NAME, pd.DataFrame(result, columns=names))
+    else:
+        import pyarrow as pa
+        result = pa.table(columns)
+        del columns
+        convert = lambda: apply_table_schema(TABLE_NAME, result.to_pandas())
+    return measure(convert)
+
+
+def run_snowflake(path, rows):
+    import snowflake.connector
+    from dotenv import load_dotenv
+    load_dotenv()
+    conn = snowflake.connector.connect(
+        account=os.getenv("SNOWFLAKE_ACCOUNT"),
+        user=os.getenv("SNOWFLAKE_USER"),
+        password=os.getenv("SNOWFLAKE_PASSWORD"),
+        role=os.getenv("SNOWFLAKE_ROLE"),
+        warehouse=os.getenv("SNOWFLAKE_WAREHOUSE"),
+        database=os.getenv("SNOWFLAKE_DATABASE"),
+        schema=os.getenv("SNOWFLAKE_SCHEMA")
+    )
+    try:
+        cur = conn.cursor()
+        # Exclude warehouse time: run the query first, then time fetching its result
+        cur.execute(generator_sql(rows))
+        query_id = cur.sfqid
+        cur.get_results_from_sfqid(query_id)
+
+        def convert():
+            if path == "rows":
+                columns = [desc[0] for desc in cur.description]
+                return apply_table_schema(TABLE_NAME, pd.DataFrame(cur.fetchall(), columns=columns))
+            return apply_table_schema(TABLE_NAME, cur.fetch_pandas_all())
+
+        return measure(convert)
+    finally:
+        conn.close()
+
+
+def run_case(path, rows, snowflake):
+    elapsed, peak, df = (run_snowflake if snowflake else run_local)(path, rows)
+    return {
+        "path": path,
+        "rows": rows,
+        "seconds": elapsed,
+        "peak_bytes": peak,
+        "frame_bytes": int(df.memory_usage(deep=True).sum())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--paths", nargs="+", choices=PATHS, default=list(PATHS))
+    parser.add_argument("--snowflake", action="store_true", help="fetch generated rows from Snowflake")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--case", nargs=2, metavar=("PATH", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case[0], int(args.case[1]), args.snowflake)))
+        return
+
+    results = []
+    print(f"{'rows':>12} {'path':>6} {'seconds':>9} {'peak MB':>9} {'frame MB':>9}")
+    for rows in args.rows:
+        for path in args.paths:
+            command = [sys.executable, os.path.abspath(__file__), "--case", path, str(rows)]
+            if args.snowflake:
+                command.append("--snowflake")
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if completed.returncode != 0:
+                print(f"{rows:>12,} {path:>6}  failed: {completed.stderr.strip().splitlines()[-1:]}")
+                continue
+            result = json.loads(completed.stdout)
+            results.append(result)
+            print(f"{rows:>12,} {path:>6} {result['seconds']:>9.3f} "
+                  f"{result['peak_bytes'] / 1e6:>9.1f} {result['frame_bytes'] / 1e6:>9.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Cold import time of the app's modules, as a regression check
+
+Each module is imported in a fresh interpreter with `python -X importtime`.
+The report lists every module's cumulative import time (best of --repeat
+runs), the heavy libraries the import pulled in, and the slowest packages
+it loaded. Save a report with --save and compare later runs against it with
+--baseline: the script exits with status 1 if any module got slower by more
+than --tolerance percent (and at least --min-ms milliseconds).
+
+    python benchmarks/import_time.py --save importtime-baseline.json
+    python benchmarks/import_time.py --baseline importtime-baseline.json
+
+config is what app.py imports before the first render; the page modules are
+imported when a page is first selected.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+DEFAULT_MODULES = ["config", "country_visitors", "gender_analysis", "tourist_places", "top_places"]
+
+# Libraries worth knowing about when they load at start-up
+HEAVY_PACKAGES = ["streamlit", "pandas", "numpy", "pyarrow", "plotly", "snowflake.connector", "PIL"]
+
+
+def import_profile(module):
+    """{package: cumulative microseconds} of one cold import of module, or raises RuntimeError"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    profile = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            profile[name.strip()] = int(cumulative)
+    return profile
+
+
+def measure(module, repeat, top):
+    """Import report of a module: best cumulative ms, heavy packages and slowest packages"""
+    profiles = [import_profile(module) for _ in range(repeat)]
+    best = min(profiles, key=lambda profile: profile[module])
+    packages = {name: us for name, us in best.items() if name != module}
+    return {
+        "ms": best[module] / 1000,
+        "heavy": [package for package in HEAVY_PACKAGES if package in best],
+        "slowest": {name: us / 1000 for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5, help="slowest packages listed per module")
+    parser.add_argument("--save", help="write the report to this JSON file")
+    parser.add_argument("--baseline", help="compare against a report saved with --save")
+    parser.add_argument("--tolerance", type=float, default=20.0, help="allowed slowdown in percent")
+    parser.add_argument("--min-ms", type=float, default=20.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report, regressions = {}, []
+    for module in args.modules:
+        try:
+            result = measure(module, args.repeat, args.top)
+        except RuntimeError as e:
+            print(f"{module}: import failed ({e})")
+            continue
+        report[module] = result
+        line = f"{module:<20} {result['ms']:>8.1f} ms"
+        previous = baseline.get(module)
+        if previous is not None:
+            change = result["ms"] - previous["ms"]
+            line += f"  ({change:+.1f} ms vs baseline)"
+            if change > args.min_ms and change > previous["ms"] * args.tolerance / 100:
+                regressions.append(module)
+                line += "  REGRESSION"
+            added = sorted(set(result["heavy"]) - set(previous["heavy"]))
+            if added:
+                line += f"  now loads {', '.join(added)}"
+        print(line)
+        print(f"{'':<20} loads: {', '.join(result['heavy']) or '-'}")
+        for name, ms in result["slowest"].items():
+            print(f"{'':<20}   {ms:>8.1f} ms  {name}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if regressions:
+        print(f"Import time regressed: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
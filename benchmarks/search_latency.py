@@ -0,0 +1,76 @@
+"""Build and query time of place_search.PlaceSearchIndex with table size
+
+Builds the search index over synthetic place tables (multi-word names drawn
+from a shared word list, a few hundred cities, 30 states and 20 types) from
+10k to 1M rows, then times search-as-you-type queries: one- and
+two-letter prefixes, a full word and a two-word query, each returning the
+explorer's first page (--limit rows), plus a fuzzy query with a typo.
+
+    python benchmarks/search_latency.py
+    python benchmarks/search_latency.py --rows 100000 --limit 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import pandas as pd
+
+from place_search import PlaceSearchIndex
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+DEFAULT_LIMIT = 21
+QUERIES = ['k', 'te', 'temple', 'fort jai', 'tmple']
+
+WORDS = ['temple', 'fort', 'palace', 'lake', 'beach', 'garden', 'museum', 'kerala', 'kochi', 'jaipur',
+         'amber', 'golden', 'sun', 'shiva', 'krishna', 'ganga', 'hill', 'valley', 'falls', 'cave',
+         'mahal', 'gate', 'tower', 'market', 'church', 'mosque', 'national', 'park', 'zoo', 'island']
+
+
+def synthetic_places(rows, seed=0):
+    """NAME, CITY, STATE and TYPE columns; names are two or three words plus a number"""
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS)
+    name = pd.Series(words[rng.integers(0, len(words), rows)]).str.cat(
+        [pd.Series(words[rng.integers(0, len(words), rows)]), pd.Series(rng.integers(0, rows // 4 + 1, rows).astype(str))],
+        sep=' ')
+    return pd.DataFrame({
+        'NAME': name,
+        'CITY': [f"city{i}" for i in rng.integers(0, 500, rows)],
+        'STATE': [f"state{i}" for i in rng.integers(0, 30, rows)],
+        'TYPE': words[rng.integers(0, 20, rows)]
+    })
+
+
+def best_of(func, repeat):
+    """Fastest of repeat timed calls, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'build s':>8} " + " ".join(f"{query!r:>11}" for query in QUERIES) + "  (query ms)")
+    for rows in args.rows:
+        df = synthetic_places(rows)
+        build = best_of(lambda: PlaceSearchIndex(df), 1)
+        index = PlaceSearchIndex(df)
+        timings = [best_of(lambda: index.search(query, limit=args.limit, fuzzy=query == 'tmple'), args.repeat)
+                   for query in QUERIES]
+        print(f"{rows:>10,} {build:>8.2f} " + " ".join(f"{seconds * 1000:>11.2f}" for seconds in timings))
+
+
+if __name__ == "__main__":
+    main()
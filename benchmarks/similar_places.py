@@ -0,0 +1,79 @@
+"""Build and query time of place_similarity.SimilarPlacesIndex with table size
+
+Builds the similar-places index (exact neighbour lists for every place in
+every scope) over synthetic place tables from 10k to 200k rows, with states
+nested in zones and a few missing values, then times a precomputed lookup
+and a search for more neighbours than were precomputed (--k) in each scope.
+
+    python benchmarks/similar_places.py
+    python benchmarks/similar_places.py --rows 1000000 --k 50
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import pandas as pd
+
+from place_similarity import SCOPES, SimilarPlacesIndex
+
+DEFAULT_ROWS = [10_000, 50_000, 200_000]
+DEFAULT_K = 50
+TYPES = ['Fort', 'Temple', 'Lake', 'Beach', 'Park', 'Museum', 'Palace', 'Waterfall']
+TIMES = ['Morning', 'Evening', 'Afternoon', 'All']
+
+
+def synthetic_places(rows, seed=0):
+    """Numeric and categorical place features; 30 states in 6 zones, ~5% missing values"""
+    rng = np.random.default_rng(seed)
+    state = rng.integers(0, 30, rows)
+    df = pd.DataFrame({
+        'GOOGLE_REVIEW_RATING': rng.uniform(3, 5, rows).round(1),
+        'ENTRANCE_FEE_IN_INR': np.where(rng.random(rows) < 0.4, 0, rng.lognormal(4, 1, rows).round()),
+        'TIME_NEEDED_TO_VISIT_IN_HRS': rng.choice([0.5, 1, 1.5, 2, 3, 5], rows),
+        'TYPE': np.array(TYPES)[rng.integers(0, len(TYPES), rows)],
+        'ZONE': [f"zone{i}" for i in state % 6],
+        'STATE': [f"state{i}" for i in state],
+        'BEST_TIME_TO_VISIT': np.array(TIMES)[rng.integers(0, len(TIMES), rows)]
+    })
+    for column in ['GOOGLE_REVIEW_RATING', 'TYPE', 'BEST_TIME_TO_VISIT']:
+        df.loc[rng.random(rows) < 0.05, column] = None
+    return df
+
+
+def best_of(func, repeat):
+    """Fastest of repeat timed calls, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--k", type=int, default=DEFAULT_K)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'build s':>8} {'MB':>6} {'lookup ms':>10} "
+          + " ".join(f"{f'k={args.k} ' + scope:>12}" for scope in SCOPES) + "  (query ms)")
+    for rows in args.rows:
+        df = synthetic_places(rows)
+        started = time.perf_counter()
+        index = SimilarPlacesIndex(df)
+        build = time.perf_counter() - started
+        row = rows // 2
+        lookup = best_of(lambda: index.similar(row), args.repeat)
+        timings = [best_of(lambda: index.similar(row, args.k, scope), args.repeat) for scope in SCOPES]
+        print(f"{rows:>10,} {build:>8.2f} {index.nbytes / 2 ** 20:>6.1f} {lookup * 1000:>10.3f} "
+              + " ".join(f"{seconds * 1000:>12.2f}" for seconds in timings))
+
+
+if __name__ == "__main__":
+    main()
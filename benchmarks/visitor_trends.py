@@ -0,0 +1,88 @@
+"""Scaling of visitor_analytics.compute_visitor_trends with countries and years
+
+Times compute_visitor_trends on synthetic country x year tables (a share of
+zero and missing cells included) from 100 to 100k countries and from 7 to
+60 year columns. Tables small enough for it are also timed with the
+per-country loop the country page used before (a boolean filter per country
+and a list comprehension over years), for comparison; the loop is skipped
+above --loop-max-rows.
+
+    python benchmarks/visitor_trends.py
+    python benchmarks/visitor_trends.py --countries 1000 10000 --years 7 30
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import pandas as pd
+
+from visitor_analytics import compute_visitor_trends
+
+DEFAULT_COUNTRIES = [100, 1_000, 10_000, 100_000]
+DEFAULT_YEARS = [7, 30, 60]
+
+
+def synthetic_table(countries, years, seed=0):
+    """COUNTRY plus _<year> columns, with about 2% zero and 2% missing cells"""
+    rng = np.random.default_rng(seed)
+    values = rng.lognormal(mean=9, sigma=2, size=(countries, years)).round()
+    values[rng.random(values.shape) < 0.02] = 0
+    values[rng.random(values.shape) < 0.02] = np.nan
+    df = pd.DataFrame(values, columns=[f"_{2020 - years + 1 + i}" for i in range(years)])
+    df.insert(0, "COUNTRY", [f"Country {i}" for i in range(countries)])
+    return df
+
+
+def loop_growth(df):
+    """YoY growth as the country page computed it before compute_visitor_trends"""
+    years = df.columns[1:].astype(str).tolist()
+    growth_data = {}
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for country in df["COUNTRY"]:
+            country_data = df[df["COUNTRY"] == country].iloc[0, 1:].astype(float).to_numpy()
+            growth = [(country_data[i] - country_data[i - 1]) / country_data[i - 1] * 100
+                      for i in range(1, len(country_data))]
+            growth_data[country] = growth
+    return pd.DataFrame(growth_data, index=years[1:]).T
+
+
+def best_of(func, repeat):
+    """Fastest of repeat timed calls, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--countries", type=int, nargs="+", default=DEFAULT_COUNTRIES)
+    parser.add_argument("--years", type=int, nargs="+", default=DEFAULT_YEARS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--loop-max-rows", type=int, default=10_000,
+                        help="largest table also timed with the per-country loop")
+    args = parser.parse_args()
+
+    print(f"{'countries':>10} {'years':>6} {'vectorized s':>13} {'loop s':>9} {'speedup':>8}")
+    for countries in args.countries:
+        for years in args.years:
+            df = synthetic_table(countries, years)
+            vectorized = best_of(lambda: compute_visitor_trends(df), args.repeat)
+            if countries <= args.loop_max_rows:
+                loop = best_of(lambda: loop_growth(df), 1)
+                loop_text, speedup = f"{loop:>9.3f}", f"{loop / vectorized:>7.0f}x"
+            else:
+                loop_text, speedup = f"{'-':>9}", f"{'-':>8}"
+            print(f"{countries:>10,} {years:>6} {vectorized:>13.4f} {loop_text} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+# Chart-data optimizer for large scatter plots: keep only the plotted columns,
+# round floats to the precision they are displayed at, and thin out dense
+# regions while keeping outliers, so the figure sent to the browser stays small.
+
+# Decimals kept for float columns without an explicit precision
+DEFAULT_PRECISION = 2
+
+
+def round_floats(df, precision=None):
+    """Round float columns to display precision ({column: decimals}, default DEFAULT_PRECISION)"""
+    precision = precision or {}
+    rounded = {}
+    for column, dtype in df.dtypes.items():
+        if pd.api.types.is_float_dtype(dtype):
+            rounded[column] = df[column].round(precision.get(column, DEFAULT_PRECISION))
+    return df.assign(**rounded) if rounded else df
+
+
+def downsample_points(df, x, y, max_points, grid_size=64, outlier_quantile=0.01):
+    """Thin a point cloud to about max_points by capping points per grid cell
+
+    The x/y plane is split into grid_size x grid_size cells and each cell
+    keeps its first points up to an equal share of max_points, so sparse
+    regions are untouched while dense ones are thinned. Points beyond the
+    outlier_quantile tails of either axis are always kept. Rows without both
+    coordinates are dropped, as the chart cannot place them anyway.
+    """
+    xs = pd.to_numeric(df[x], errors='coerce').to_numpy(dtype='float64')
+    ys = pd.to_numeric(df[y], errors='coerce').to_numpy(dtype='float64')
+    valid = np.isfinite(xs) & np.isfinite(ys)
+    if valid.sum() <= max_points:
+        return df[valid]
+    df, xs, ys = df[valid], xs[valid], ys[valid]
+
+    x_low, x_high = np.quantile(xs, [outlier_quantile, 1 - outlier_quantile])
+    y_low, y_high = np.quantile(ys, [outlier_quantile, 1 - outlier_quantile])
+    outlier = (xs < x_low) | (xs > x_high) | (ys < y_low) | (ys > y_high)
+
+    def cell_index(values):
+        low, high = values.min(), values.max()
+        span = high - low if high > low else 1.0
+        return np.minimum(((values - low) / span * grid_size).astype('int64'), grid_size - 1)
+
+    cells = cell_index(xs) * grid_size + cell_index(ys)
+    # Rank of each point within its cell, in table order
+    order = np.argsort(cells, kind='stable')
+    sorted_cells = cells[order]
+    group_start = np.r_[0, np.flatnonzero(np.diff(sorted_cells)) + 1]
+    group_sizes = np.diff(np.r_[group_start, len(sorted_cells)])
+    ranks = np.empty(len(cells), dtype='int64')
+    ranks[order] = np.arange(len(cells)) - np.repeat(group_start, group_sizes)
+
+    per_cell = max(1, (max_points - int(outlier.sum())) // len(group_start))
+    return df[outlier | (ranks < per_cell)]
+
+
+def slim_scatter_data(df, x, y, columns, precision=None, max_points=None):
+    """Plotted columns only, floats rounded, and dense regions thinned above max_points"""
+    data = df[list(dict.fromkeys([x, y] + list(columns)))]
+    if max_points is not None and len(data) > max_points:
+        data = downsample_points(data, x, y, max_points)
+    return round_floats(data, precision)
+
+
+def scatter_render_mode(point_count, webgl_threshold):
+    """Plotly Express render_mode: WebGL (scattergl) above the threshold, SVG below"""
+    return 'webgl' if point_count > webgl_threshold else 'svg'
@@ -1,11 +1,34 @@
 import streamlit as st
-import snowflake.connector
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
-from dotenv import load_dotenv
 import os
+import re
+import logging
+import functools
+import threading
+import time
+import importlib.util
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from connection_pool import SnowflakeConnectionPool
+from data_cache import ResultCache
+from table_schemas import apply_table_schema
+from aggregates import aggregate_source_columns, normalize_aggregate
+from prefetch import TablePrefetcher
+from snapshots import SnapshotStore
+from shared_tables import SharedTableStore
+from query_tracker import QueryTracker, QueryCancelledError, QueryTimeoutError
+from streaming_aggregates import SpecAggregator, HistogramAggregator, TopKAggregator
+from chart_data import slim_scatter_data, scatter_render_mode
+from place_images import ImageCache
+from incremental_sync import (TABLE_KEYS, ROW_HASH_COLUMN, MAX_CHANGED_FRACTION, keys_are_unique,
+                              diff_row_hashes, column_changes, merge_changes)
 
-# Load environment variables from .env file
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Arrow result batches need pyarrow (installed by snowflake-connector-python[pandas]);
+# only check that it is installed here, the connector imports it when fetching
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
 
 # Required Snowflake configuration parameters
 REQUIRED_ENV_VARS = [
@@ -18,51 +41,1146 @@ REQUIRED_ENV_VARS = [
     "SNOWFLAKE_SCHEMA"
 ]
 
-# Validate environment variables
-missing_vars = [var for var in REQUIRED_ENV_VARS if not os.getenv(var)]
-if missing_vars:
-    raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}. "
-                    f"Please check your .env file and ensure all required variables are set.")
-
-# Snowflake connection parameters from environment variables
-SNOWFLAKE_CONFIG = {
-    "account": os.getenv("SNOWFLAKE_ACCOUNT"),
-    "user": os.getenv("SNOWFLAKE_USER"),
-    "password": os.getenv("SNOWFLAKE_PASSWORD"),
-    "role": os.getenv("SNOWFLAKE_ROLE"),
-    "warehouse": os.getenv("SNOWFLAKE_WAREHOUSE"),
-    "database": os.getenv("SNOWFLAKE_DATABASE"),
-    "schema": os.getenv("SNOWFLAKE_SCHEMA")
-}
+@functools.lru_cache(maxsize=None)
+def get_settings():
+    """Load the .env file and read the optional tuning settings (on first use, not at import)"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return {
+        # Connection pool tuning
+        "pool": {
+            "size": int(os.getenv("SNOWFLAKE_POOL_SIZE", "4")),
+            "idle_timeout": float(os.getenv("SNOWFLAKE_POOL_IDLE_TIMEOUT", "600")),
+            "health_check_interval": float(os.getenv("SNOWFLAKE_POOL_HEALTH_CHECK_INTERVAL", "60")),
+            "wait_timeout": float(os.getenv("SNOWFLAKE_POOL_WAIT_TIMEOUT", "30"))
+        },
+        # Result fetch mode: "arrow" (native dtypes via Arrow batches) or "rows" (fetchall)
+        "fetch_mode": os.getenv("SNOWFLAKE_FETCH_MODE", "arrow").lower(),
+        # Submit queries with execute_async and poll their status instead of blocking in execute
+        "async_queries": os.getenv("SNOWFLAKE_ASYNC_QUERIES", "true").lower() == "true",
+        "async_poll_interval": float(os.getenv("SNOWFLAKE_ASYNC_POLL_INTERVAL", "0.1")),
+        # Statement timeouts in seconds (0 disables): data queries, and chart aggregate
+        # queries, which fall back to pandas when they time out
+        "statement_timeout": float(os.getenv("SNOWFLAKE_STATEMENT_TIMEOUT", "120")),
+        "aggregate_timeout": float(os.getenv("SNOWFLAKE_AGGREGATE_TIMEOUT", "30")),
+        # Aggregate tables without a loaded frame by streaming the result in batches
+        # (memory bounded by the batch size) instead of materializing it first
+        "streaming_aggregation": os.getenv("STREAMING_AGGREGATION", "false").lower() == "true",
+        "stream_batch_size": int(os.getenv("STREAM_BATCH_SIZE", "10000")),
+        # Threads loading independent page panels concurrently
+        "panel_workers": int(os.getenv("PANEL_WORKERS", "4")),
+        # Compute chart aggregates in Snowflake ("false" always aggregates in pandas)
+        "aggregate_pushdown": os.getenv("AGGREGATE_PUSHDOWN", "true").lower() == "true",
+        # Background warm-up of all dashboard tables at process start
+        "prefetch_on_start": os.getenv("PREFETCH_ON_START", "false").lower() == "true",
+        "prefetch_workers": int(os.getenv("PREFETCH_WORKERS", "4")),
+        # Local table snapshots: "off" (live queries), "on" (serve snapshots, refresh
+        # them in the background) or "offline" (snapshots only, never contact Snowflake)
+        "snapshot_mode": os.getenv("SNAPSHOT_MODE", "off").lower(),
+        "snapshot_dir": os.getenv("SNAPSHOT_DIR", ".snapshots"),
+        # Sync snapshots by fetching only changed rows (row hashes per key). Only
+        # snapshot mode "on" syncs; with snapshots off a changed table is re-read in full
+        "incremental_sync": os.getenv("SNAPSHOT_INCREMENTAL", "true").lower() == "true",
+        "sync_batch_size": int(os.getenv("SNAPSHOT_SYNC_BATCH_SIZE", "1000")),
+        # Directory for memory-mapped Arrow results shared by worker processes
+        # (e.g. /dev/shm/tourism); unset keeps results private to each process
+        "shared_tables_dir": os.getenv("SHARED_TABLES_DIR") or None,
+        # Shared files not mapped by any worker for this long are removed
+        "shared_tables_max_age": float(os.getenv("SHARED_TABLES_MAX_AGE_SECONDS", str(24 * 3600))),
+        # Result cache tuning
+        "cache": {
+            "ttl": float(os.getenv("CACHE_TTL_SECONDS", "300")),
+            "max_bytes": int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+        },
+        # Scatter charts: switch to WebGL traces above webgl_threshold points and
+        # thin dense regions (keeping outliers) above max_points
+        "charts": {
+            "webgl_threshold": int(os.getenv("CHART_WEBGL_THRESHOLD", "1000")),
+            "max_points": int(os.getenv("CHART_MAX_POINTS", "5000"))
+        },
+        # Place photos: downloaded on a bounded thread pool, resized to display
+        # width and kept in a size-bounded on-disk cache
+        "images": {
+            "directory": os.getenv("IMAGE_CACHE_DIR", ".image_cache"),
+            "max_bytes": int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            "width": int(os.getenv("IMAGE_WIDTH", "640")),
+            "max_workers": int(os.getenv("IMAGE_DOWNLOAD_WORKERS", "4")),
+            "timeout": float(os.getenv("IMAGE_DOWNLOAD_TIMEOUT", "10"))
+        },
+        # Built chart figures, charged at their serialized size
+        "figure_cache": {
+            "ttl": float(os.getenv("CACHE_TTL_SECONDS", "300")),
+            "max_bytes": int(os.getenv("FIGURE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        }
+    }
+
+@functools.lru_cache(maxsize=None)
+def get_snowflake_config():
+    """Get validated Snowflake connection parameters from environment variables"""
+    get_settings()
+    missing_vars = [var for var in REQUIRED_ENV_VARS if not os.getenv(var)]
+    if missing_vars:
+        raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}. "
+                        f"Please check your .env file and ensure all required variables are set.")
+    return {
+        "account": os.getenv("SNOWFLAKE_ACCOUNT"),
+        "user": os.getenv("SNOWFLAKE_USER"),
+        "password": os.getenv("SNOWFLAKE_PASSWORD"),
+        "role": os.getenv("SNOWFLAKE_ROLE"),
+        "warehouse": os.getenv("SNOWFLAKE_WAREHOUSE"),
+        "database": os.getenv("SNOWFLAKE_DATABASE"),
+        "schema": os.getenv("SNOWFLAKE_SCHEMA")
+    }
+
+@st.cache_resource(show_spinner=False)
+def get_connection_pool():
+    """Get the process-wide Snowflake connection pool shared by all sessions"""
+    connect_params = dict(get_snowflake_config())
+    timeout = get_settings()["statement_timeout"]
+    if timeout > 0:
+        # Server-side guard for statements that are not polled (e.g. async queries disabled)
+        connect_params["session_parameters"] = {"STATEMENT_TIMEOUT_IN_SECONDS": int(timeout)}
+    return SnowflakeConnectionPool(connect_params, **get_settings()["pool"])
+
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    """Get the process-wide versioned result cache"""
+    return ResultCache(**get_settings()["cache"])
+
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    """Get the process-wide LRU cache of built chart figures"""
+    return ResultCache(**get_settings()["figure_cache"])
+
+@st.cache_resource(show_spinner=False)
+def get_image_cache():
+    """Get the process-wide cache of resized place images"""
+    return ImageCache(**get_settings()["images"])
+
+@st.cache_resource(show_spinner=False)
+def get_prefetcher():
+    """Get the process-wide table prefetcher"""
+    return TablePrefetcher(max_workers=get_settings()["prefetch_workers"])
+
+@st.cache_resource(show_spinner=False)
+def get_query_tracker():
+    """Get the process-wide tracker of running queries per session"""
+    return QueryTracker()
+
+@st.cache_resource(show_spinner=False)
+def get_panel_executor():
+    """Get the process-wide thread pool that loads page panels concurrently"""
+    return ThreadPoolExecutor(max_workers=get_settings()["panel_workers"], thread_name_prefix="panel")
+
+@st.cache_resource(show_spinner=False)
+def get_snapshot_store():
+    """Get the process-wide local snapshot store"""
+    return SnapshotStore(get_settings()["snapshot_dir"])
+
+@st.cache_resource(show_spinner=False)
+def get_shared_tables():
+    """Get the process's handle on the shared-memory table store, or None if disabled"""
+    directory = get_settings()["shared_tables_dir"]
+    if not directory:
+        return None
+    try:
+        return SharedTableStore(directory, max_age=get_settings()["shared_tables_max_age"])
+    except ImportError:
+        logger.warning("SHARED_TABLES_DIR is set but pyarrow is not installed; results stay per process")
+        return None
+
+def _load_shared(table_name, query, version, load):
+    """Map a result another worker already published, or load and publish it"""
+    shared = get_shared_tables()
+    if shared is None:
+        return load()
+    df = shared.open(table_name, query, version)
+    if df is None:
+        df = shared.publish(table_name, query, version, load())
+    return df
+
+def snapshot_mode():
+    """Current snapshot mode: off, on or offline"""
+    return get_settings()["snapshot_mode"]
+
+def start_prefetch(loaders):
+    """Queue background loads for {table_name: loader} once per process"""
+    get_prefetcher().start(loaders)
+
+def wait_for_prefetch(table_name):
+    """Wait for an in-flight background load of a table so the page reuses its result"""
+    get_prefetcher().wait(table_name)
+
+# Query owner set on worker threads that load data on behalf of a script run
+_thread_owner = threading.local()
+
+def _streamlit_version():
+    """Installed Streamlit version as a tuple of ints, e.g. (1, 38)"""
+    return tuple(int(part) for part in re.findall(r"\d+", st.__version__)[:2])
+
+# Streamlit releases whose ScriptRunContext.script_requests._state is known to hold
+# the pending STOP/RERUN request; _run_interrupted reads it only on these
+_SCRIPT_REQUESTS_VERSIONS = ((1, 33), (2, 0))
+
+def _run_interrupted(ctx):
+    """Whether Streamlit has asked a script run to stop or to rerun in its place (best effort, internal API)
+
+    A run blocked on a query only sees a rerun request at its next Streamlit
+    call, so the query poller checks the request state directly. On Streamlit
+    versions outside _SCRIPT_REQUESTS_VERSIONS this returns False and queries
+    are only cancelled once the next run of the session begins.
+    """
+    low, high = _SCRIPT_REQUESTS_VERSIONS
+    if not low <= _streamlit_version() < high:
+        return False
+    requests = getattr(ctx, "script_requests", None)
+    state = getattr(getattr(requests, "_state", None), "value", None)
+    if state == "RERUN":
+        return _rerun_preempts_run(getattr(requests, "_rerun_data", None))
+    return state == "STOP"
+
+def _rerun_preempts_run(rerun_data):
+    """Whether a queued rerun will interrupt the current run
+
+    Mirrors Streamlit's _fragment_run_should_not_preempt_script: a widget in a
+    fragment queues a fragment rerun that waits for the running script instead
+    of stopping it, so it must not cancel that run's queries.
+    """
+    fragment_queue = getattr(rerun_data, "fragment_id_queue", None)
+    return not fragment_queue or getattr(rerun_data, "is_fragment_scoped_rerun", False)
+
+def begin_query_run():
+    """Start a new query generation for this session; queries of its earlier runs get cancelled"""
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        st.session_state.query_generation = get_query_tracker().begin_run(ctx.session_id)
+
+def _current_owner():
+    """Session run that queries issued from this thread belong to, or None outside a session"""
+    owner = getattr(_thread_owner, "value", None)
+    if owner is not None:
+        return owner
+    ctx = get_script_run_ctx()
+    if ctx is None or "query_generation" not in st.session_state:
+        return None
+    return {
+        "session_id": ctx.session_id,
+        "generation": st.session_state.query_generation,
+        "interrupted": lambda: _run_interrupted(ctx)
+    }
+
+def _run_as(owner, loader):
+    """Run a loader on a worker thread on behalf of a session run"""
+    _thread_owner.value = owner
+    try:
+        return loader()
+    finally:
+        _thread_owner.value = None
+
+def fragment(func):
+    """Make a page section rerun on its own when its widgets change (st.fragment)
+
+    Falls back to st.experimental_fragment, or to a plain function (full
+    reruns) on Streamlit versions without fragments.
+    """
+    decorator = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    return decorator(func) if decorator is not None else func
+
+@contextmanager
+def timed_render(name):
+    """Record how long a page or fragment took to render (shown in the sidebar)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = st.session_state.setdefault("render_times", {})
+        timings[name] = round(time.perf_counter() - start, 4)
+
+def get_render_times():
+    """Get this session's latest render time in seconds per page and fragment"""
+    return dict(st.session_state.get("render_times", {}))
+
+def get_query_stats():
+    """Get counts of started, cancelled and timed-out queries and the time saved"""
+    return get_query_tracker().stats()
+
+def load_progressively(loaders):
+    """Run {name: loader} concurrently and yield (name, result) pairs as each one finishes
+
+    Loaders run on the panel thread pool and must not call Streamlit; the
+    caller renders each panel from the main script thread as its data arrives.
+    A loader that raises yields None after its error is reported.
+    """
+    executor = get_panel_executor()
+    owner = _current_owner()
+    futures = {executor.submit(_run_as, owner, loader): name for name, loader in loaders.items()}
+    for future in as_completed(futures):
+        name = futures[future]
+        try:
+            yield name, future.result()
+        except Exception as e:
+            _report_error(f"Error loading {name}: {str(e)}")
+            yield name, None
+
+def get_prefetch_report():
+    """Get per-table background load status and latency"""
+    return get_prefetcher().report()
+
+def get_pool_metrics():
+    """Get connection pool size, checkout and wait metrics"""
+    if snapshot_mode() == "offline":
+        # Offline mode never builds the pool (it needs Snowflake credentials)
+        return {"snapshot_mode": "offline"}
+    return get_connection_pool().metrics()
 
 def init_connection():
-    """Initialize Snowflake connection and store in session state"""
-    if 'snowflake_cursor' not in st.session_state:
+    """Initialize the shared Snowflake connection pool once per session"""
+    if snapshot_mode() == "offline":
+        # Offline mode serves local snapshots only and never connects
+        return None
+    if 'snowflake_pool_ready' not in st.session_state:
         try:
-            conn = snowflake.connector.connect(**SNOWFLAKE_CONFIG)
-            st.session_state.snowflake_cursor = conn.cursor()
-            return conn
+            pool = get_connection_pool()
+            pool.warm_up()
+            st.session_state.snowflake_pool_ready = True
+            return pool
         except Exception as e:
             st.error(f"Error connecting to Snowflake: {str(e)}")
             st.info("Please check your .env file and ensure all credentials are correct.")
             return None
     return None
 
-def get_table_data(table_name):
-    """Get data from a specific table in Snowflake"""
+def _report_error(message):
+    """Show an error on the page, or log it when called outside a script run (e.g. prefetch threads)"""
+    if get_script_run_ctx() is None:
+        logger.error(message)
+    else:
+        st.error(message)
+
+def get_cache_stats():
+    """Get shared result cache hit/miss/coalesced counters and memory use"""
+    return get_result_cache().stats()
+
+def get_image_cache_stats():
+    """Get hit/miss/download counters and disk usage of the image cache"""
+    return get_image_cache().stats()
+
+def get_place_image(url):
+    """Resized image bytes for a place photo URL, or the URL itself if it cannot be cached"""
+    data = get_image_cache().get(url)
+    return data if data is not None else url
+
+def prefetch_place_images(urls):
+    """Start downloading and resizing the photos of a page of places in the background"""
+    get_image_cache().prefetch([url for url in urls if isinstance(url, str) and url])
+
+def get_figure_cache_stats():
+    """Get figure cache hit/miss counters and memory use"""
+    return get_figure_cache().stats()
+
+def refresh_data(table_name=None):
+    """Drop cached results so the next load re-queries Snowflake (or re-syncs snapshots)"""
+    get_result_cache().invalidate(table_name)
+    get_figure_cache().invalidate(table_name)
+    if snapshot_mode() == "on":
+        tables = [table_name] if table_name else list(get_snapshot_store().manifest())
+        for name in tables:
+            _schedule_snapshot_refresh(name)
+
+def _probe_table_version(conn, table_name):
+    """Read a cheap data version for a table from INFORMATION_SCHEMA"""
+    cur = conn.cursor()
     try:
-        conn = snowflake.connector.connect(**SNOWFLAKE_CONFIG)
-        cur = conn.cursor()
-        
-        cur.execute(f'SELECT * FROM TOURISM.PUBLIC.{table_name}')
-        columns = [desc[0] for desc in cur.description]
-        results = cur.fetchall()
-        df = pd.DataFrame(results, columns=columns)
-        
+        cur.execute(
+            "SELECT LAST_ALTERED, ROW_COUNT FROM TOURISM.INFORMATION_SCHEMA.TABLES "
+            "WHERE TABLE_SCHEMA = 'PUBLIC' AND TABLE_NAME = %s",
+            (table_name,)
+        )
+        row = cur.fetchone()
+    finally:
         cur.close()
-        conn.close()
-        
+    if row is None:
+        return None
+    return f"{row[0]}|{row[1]}"
+
+def get_table_version(table_name):
+    """Get the current data version of a table, probing Snowflake when the cache TTL has lapsed"""
+    if snapshot_mode() != "off":
+        return _snapshot_entry(table_name)["version"]
+    pool = get_connection_pool()
+    return get_result_cache().current_version(
+        table_name,
+        lambda: pool.run(lambda conn: _probe_table_version(conn, table_name))
+    )
+
+def _frame_from_cursor(cur):
+    """Build a DataFrame from an executed cursor, preferring Arrow result batches"""
+    from snowflake.connector.errors import NotSupportedError
+    if get_settings()["fetch_mode"] == "arrow" and ARROW_AVAILABLE:
+        try:
+            return cur.fetch_pandas_all()
+        except NotSupportedError:
+            # Result was not returned in Arrow format; fall back to row fetch
+            pass
+    columns = [desc[0] for desc in cur.description]
+    return pd.DataFrame(cur.fetchall(), columns=columns)
+
+def _cursor_batches(cur, batch_size):
+    """Yield an executed cursor's result as DataFrames of at most batch_size rows"""
+    from snowflake.connector.errors import NotSupportedError
+    if get_settings()["fetch_mode"] == "arrow" and ARROW_AVAILABLE:
+        started = False
+        try:
+            for chunk in cur.fetch_pandas_batches():
+                started = True
+                # Arrow chunk sizes are chosen by the server; re-slice to the batch size
+                for start in range(0, len(chunk), batch_size):
+                    yield chunk.iloc[start:start + batch_size]
+            return
+        except NotSupportedError:
+            if started:
+                raise
+            # Result was not returned in Arrow format; fall back to row fetch
+    columns = [desc[0] for desc in cur.description]
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        yield pd.DataFrame(rows, columns=columns)
+
+# Plain (unquoted) Snowflake identifiers accepted by the query builder
+_IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_$]*$')
+
+def _identifier(name):
+    """Validate a table or column name before it is placed into SQL"""
+    if not _IDENTIFIER_PATTERN.match(str(name)):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    return str(name)
+
+def _escape_like(text):
+    """Escape LIKE wildcards so user text is matched literally"""
+    return text.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+
+def build_where_clause(filters):
+    """Turn (column, op, value) filters into a WHERE clause and its parameters
+
+    Supported ops are "contains" (case-insensitive substring, via ILIKE), "eq"
+    and "in". Filters whose value is None, "" or an empty list are skipped.
+    """
+    clauses = []
+    params = []
+    for column, op, value in filters or []:
+        if value is None or value == "" or (isinstance(value, (list, tuple)) and not value):
+            continue
+        column = _identifier(column)
+        if op == "contains":
+            clauses.append(f"{column} ILIKE %s ESCAPE '!'")
+            params.append(f"%{_escape_like(str(value))}%")
+        elif op == "eq":
+            clauses.append(f"{column} = %s")
+            params.append(value)
+        elif op == "in":
+            clauses.append(f"{column} IN ({', '.join(['%s'] * len(value))})")
+            params.extend(value)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op!r}")
+    if not clauses:
+        return "", []
+    return " WHERE " + " AND ".join(clauses), params
+
+def filter_frame(df, filters):
+    """Apply (column, op, value) filters in pandas with the same semantics as build_where_clause"""
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters or []:
+        if value is None or value == "" or (isinstance(value, (list, tuple)) and not value):
+            continue
+        if op == "contains":
+            mask &= df[column].astype(str).str.contains(str(value), case=False, regex=False, na=False)
+        elif op == "eq":
+            mask &= df[column] == value
+        elif op == "in":
+            mask &= df[column].isin(list(value))
+        else:
+            raise ValueError(f"Unsupported filter operator: {op!r}")
+    return df[mask]
+
+def build_select_query(table_name, columns=None, filters=None):
+    """Build a parameterized SELECT with projected columns and pushed-down filters"""
+    projection = ", ".join(_identifier(col) for col in columns) if columns else "*"
+    where, params = build_where_clause(filters)
+    sql = f"SELECT {projection} FROM TOURISM.PUBLIC.{_identifier(table_name)}{where}"
+    return sql, params
+
+def _keyset_clause(sort_column, descending, key, after):
+    """Condition selecting the rows that sort after a (sort value, key) cursor
+
+    Rows are ordered by the sort column (missing values last), then by key.
+    """
+    sort_column, key = _identifier(sort_column), _identifier(key)
+    value, key_value = after[sort_column], after[key]
+    if value is None or pd.isna(value):
+        return f"({sort_column} IS NULL AND {key} > %s)", [key_value]
+    beyond = "<" if descending else ">"
+    clause = (f"({sort_column} {beyond} %s OR ({sort_column} = %s AND {key} > %s) "
+              f"OR {sort_column} IS NULL)")
+    return clause, [value, value, key_value]
+
+def build_page_query(table_name, columns, sort_column, key, descending=True, after=None, page_size=20, filters=None):
+    """Build a keyset-paginated SELECT: one page plus one row (to tell if more follow)
+
+    after is the {sort column: value, key: value} of the last row of the
+    previous page; Snowflake seeks past it instead of skipping an OFFSET.
+    """
+    sql, params = build_select_query(table_name, columns, filters)
+    if after is not None:
+        clause, keyset_params = _keyset_clause(sort_column, descending, key, after)
+        sql += f" {'AND' if params else 'WHERE'} {clause}"
+        params = params + keyset_params
+    direction = "DESC" if descending else "ASC"
+    sql += (f" ORDER BY {_identifier(sort_column)} {direction} NULLS LAST, {_identifier(key)} ASC"
+            f" LIMIT {int(page_size) + 1}")
+    return sql, params
+
+def page_frame(df, sort_column, key, descending=True, after=None, page_size=20):
+    """Apply build_page_query's ordering and keyset in pandas (for local snapshots)"""
+    ordered = df.sort_values(
+        [sort_column, key], ascending=[not descending, True], na_position='last', kind='stable'
+    )
+    if after is not None:
+        value, key_value = after[sort_column], after[key]
+        values, keys = ordered[sort_column], ordered[key].astype(str)
+        if value is None or pd.isna(value):
+            mask = values.isna() & (keys > str(key_value))
+        else:
+            beyond = values < value if descending else values > value
+            mask = beyond | ((values == value) & (keys > str(key_value))) | values.isna()
+        ordered = ordered[mask]
+    return ordered.head(int(page_size) + 1).reset_index(drop=True)
+
+# SQL for each aggregate op; column lists are summed row-wise first
+_AGGREGATE_SQL = {
+    "count": "COUNT({})",
+    "sum": "COALESCE(SUM({}), 0)",
+    "mean": "AVG({})",
+    "min": "MIN({})",
+    "max": "MAX({})"
+}
+
+def _bucket_case(bucket):
+    """CASE expression assigning pd.cut-style (right-inclusive) bucket labels"""
+    column = _identifier(bucket["column"])
+    bins = bucket["bins"]
+    whens = []
+    params = []
+    for low, high, label in zip(bins[:-1], bins[1:], bucket["labels"]):
+        condition = f"{column} > %s"
+        params.append(low)
+        if high != float('inf'):
+            condition += f" AND {column} <= %s"
+            params.append(high)
+        whens.append(f"WHEN {condition} THEN %s")
+        params.append(label)
+    return f"CASE {' '.join(whens)} END", params
+
+def build_aggregate_query(table_name, spec, filters=None):
+    """Build a parameterized GROUP BY query for an aggregate spec (see aggregates.py)"""
+    select = []
+    params = []
+    bucket = spec.get("bucket")
+    if bucket:
+        case_sql, case_params = _bucket_case(bucket)
+        select.append(f'{case_sql} AS "{_identifier(bucket["name"])}"')
+        params.extend(case_params)
+    select.extend(_identifier(col) for col in spec.get("group_by", []))
+    group_count = len(select)
+
+    for name, (op, column) in spec["measures"].items():
+        if op not in _AGGREGATE_SQL:
+            raise ValueError(f"Unsupported aggregate: {op!r}")
+        if isinstance(column, (list, tuple)):
+            expression = " + ".join(f"COALESCE({_identifier(col)}, 0)" for col in column)
+        elif column is None:
+            expression = "*"
+        else:
+            expression = _identifier(column)
+        select.append(f'{_AGGREGATE_SQL[op].format(expression)} AS "{_identifier(name)}"')
+
+    where, where_params = build_where_clause(filters)
+    if bucket:
+        # Rows outside the bins get no bucket, as with pd.cut
+        column = _identifier(bucket["column"])
+        bounds = f"{column} > %s"
+        bound_params = [bucket["bins"][0]]
+        if bucket["bins"][-1] != float('inf'):
+            bounds += f" AND {column} <= %s"
+            bound_params.append(bucket["bins"][-1])
+        where = f"{where} AND {bounds}" if where else f" WHERE {bounds}"
+        where_params = where_params + bound_params
+    params.extend(where_params)
+
+    sql = f"SELECT {', '.join(select)} FROM TOURISM.PUBLIC.{_identifier(table_name)}{where}"
+    if group_count:
+        sql += " GROUP BY " + ", ".join(str(i) for i in range(1, group_count + 1))
+    return sql, params
+
+def _cancel_query(conn, query_id):
+    """Cancel a running query in the warehouse"""
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT SYSTEM$CANCEL_QUERY(%s)", (query_id,))
+    except Exception as e:
+        logger.warning(f"Could not cancel query {query_id}: {e}")
+    finally:
+        cur.close()
+
+def _wait_for_query(conn, query_id, timeout):
+    """Poll an asynchronous query until it finishes, raising its error if it failed
+
+    The query is cancelled if its session run is superseded (QueryCancelledError)
+    or it runs longer than timeout seconds (QueryTimeoutError).
+    """
+    tracker = get_query_tracker()
+    interval = get_settings()["async_poll_interval"]
+    deadline = time.monotonic() + timeout if timeout > 0 else None
+    while conn.is_still_running(conn.get_query_status_throw_if_error(query_id)):
+        if tracker.should_cancel(query_id):
+            _cancel_query(conn, query_id)
+            raise QueryCancelledError(f"Query {query_id} was cancelled because its page was rerun")
+        if deadline is not None and time.monotonic() > deadline:
+            _cancel_query(conn, query_id)
+            raise QueryTimeoutError(f"Query {query_id} exceeded its {timeout:g}s statement timeout")
+        time.sleep(interval)
+        # Back off gently for long-running queries
+        interval = min(interval * 1.5, 1.0)
+
+def _run_query(conn, sql, params, timeout=None, read=_frame_from_cursor):
+    """Run a query on a borrowed connection and return its result as a DataFrame
+
+    With async queries enabled the statement is submitted with execute_async
+    and its status polled, so the query ID is tracked while it is running and
+    a superseded or overdue query can be cancelled. timeout defaults to the
+    statement timeout setting; read(cursor) consumes the result.
+    """
+    if timeout is None:
+        timeout = get_settings()["statement_timeout"]
+    cur = conn.cursor()
+    try:
+        if not get_settings()["async_queries"]:
+            cur.execute(sql, params or None)
+            return read(cur)
+        cur.execute_async(sql, params or None)
+        query_id = cur.sfqid
+        tracker = get_query_tracker()
+        tracker.start(query_id, sql, _current_owner())
+        status = "failed"
+        try:
+            _wait_for_query(conn, query_id, timeout)
+            cur.get_results_from_sfqid(query_id)
+            result = read(cur)
+            status = "completed"
+            return result
+        except QueryCancelledError:
+            status = "cancelled"
+            raise
+        except QueryTimeoutError:
+            status = "timed_out"
+            raise
+        finally:
+            tracker.finish(query_id, status)
+    finally:
+        cur.close()
+
+# Depth of shared (cached, coalesced) loads running on this thread
+_shared_loads = threading.local()
+
+def _inside_shared_load():
+    """Whether this thread is loading a value other sessions may be waiting on"""
+    return getattr(_shared_loads, "depth", 0) > 0
+
+def _shared_get_or_load(cache, key, load, size=None):
+    """cache.get_or_load for values shared across sessions
+
+    Cancellations propagate out of the load instead of being turned into None,
+    so every caller coalesced onto it sees the QueryCancelledError; a caller
+    whose own run is still current loads the value again.
+    """
+    def tracked_load():
+        _shared_loads.depth = getattr(_shared_loads, "depth", 0) + 1
+        try:
+            return load()
+        finally:
+            _shared_loads.depth -= 1
+
+    for attempt in range(3):
+        try:
+            return cache.get_or_load(key, tracked_load, size)
+        except QueryCancelledError:
+            # A coalesced load started by another session was cancelled when that
+            # session moved on; load it again unless this run is stale too
+            if attempt == 2 or get_query_tracker().is_stale(_current_owner()):
+                raise
+
+def _cached_query(table_name, sql, params, transform=None, timeout=None, shared=False):
+    """Run a query against a table, served from the result cache while the table is unchanged
+
+    transform(df), if given, is applied once to a fresh result before it is cached.
+    shared results are also published to the cross-process table store; only
+    full-table loads are, so the store holds one file per table and query
+    shape rather than one per page, lookup or aggregate.
+    """
+    def fetch():
+        df = get_connection_pool().run(lambda conn: _run_query(conn, sql, params, timeout))
+        return transform(df) if transform is not None else df
+
+    version = get_table_version(table_name)
+    key = (table_name, sql, tuple(params), version)
+    def load():
+        df = _load_shared(table_name, f"{sql}|{params!r}", version, fetch) if shared else fetch()
+        return _with_version(df, version)
+
+    return _shared_get_or_load(get_result_cache(), key, load)
+
+def _with_version(df, version):
+    """Tag a loaded frame with the data version it was loaded at (see data_version)"""
+    if isinstance(df, pd.DataFrame):
+        df.attrs["data_version"] = version
+    return df
+
+def data_version(df):
+    """Data version of the table a frame was loaded from, or None if unknown
+
+    Frames from get_table_data and the chart aggregates carry it, and so do
+    frames derived from them (pandas keeps attrs through copies, selections
+    and assignments). Stages
+    and figures built from a frame are keyed to it, so they stay on the
+    version of the data they were built from.
+    """
+    return df.attrs.get("data_version") if isinstance(df, pd.DataFrame) else None
+
+def _remote_columns(conn, table_name):
+    """List a table's columns in order from INFORMATION_SCHEMA"""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT COLUMN_NAME FROM TOURISM.INFORMATION_SCHEMA.COLUMNS "
+            "WHERE TABLE_SCHEMA = 'PUBLIC' AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION",
+            (table_name,)
+        )
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        cur.close()
+
+def _build_hash_query(table_name, hash_columns, key=None, filters=None):
+    """SELECT the key (or all hashed columns) plus a HASH over hash_columns per row"""
+    hashed = ", ".join(_identifier(col) for col in hash_columns)
+    projection = _identifier(key) if key else hashed
+    where, params = build_where_clause(filters)
+    sql = (f'SELECT {projection}, HASH({hashed}) AS "{ROW_HASH_COLUMN}" '
+           f'FROM TOURISM.PUBLIC.{_identifier(table_name)}{where}')
+    return sql, params
+
+def _query(sql, params=None):
+    """Run one uncached query on a pooled connection"""
+    return get_connection_pool().run(lambda conn: _run_query(conn, sql, params))
+
+def _full_snapshot(table_name, version, columns):
+    """Fetch a whole table (with row hashes when possible) into its snapshot"""
+    key = TABLE_KEYS.get(table_name)
+    if not columns:
+        df = apply_table_schema(table_name, _query(*build_select_query(table_name)))
+        return get_snapshot_store().save(table_name, df, version, sync={"mode": "full", "rows": len(df)})
+    fetched = _query(*_build_hash_query(table_name, columns))
+    row_hashes = None
+    if key is not None and keys_are_unique(fetched, key):
+        row_hashes = fetched[[key, ROW_HASH_COLUMN]]
+    df = apply_table_schema(table_name, fetched.drop(columns=ROW_HASH_COLUMN))
+    return get_snapshot_store().save(
+        table_name, df, version,
+        row_hashes=row_hashes,
+        hash_columns=list(columns),
+        sync={"mode": "full", "rows": len(df)}
+    )
+
+def _sync_snapshot(table_name, version, entry, columns):
+    """Apply only inserted, updated and deleted rows (and new columns) to a snapshot
+
+    Returns the new manifest entry, or None when a full reload is needed
+    (no key or stored hashes, duplicate keys, dropped columns, or too many
+    changes for a keyed fetch to pay off).
+    """
+    store = get_snapshot_store()
+    key = TABLE_KEYS.get(table_name)
+    hash_columns = entry.get("hash_columns")
+    local_hashes = store.load_row_hashes(table_name)
+    if key is None or not hash_columns or local_hashes is None or not columns:
+        return None
+    df, _ = store.load(table_name)
+    if df is None:
+        return None
+    added, removed = column_changes(list(df.columns), columns)
+    if removed or key not in columns:
+        return None
+
+    # Hash over the snapshot's columns so new columns don't mark every row as changed
+    remote_hashes = _query(*_build_hash_query(table_name, hash_columns, key=key))
+    if not keys_are_unique(remote_hashes, key):
+        return None
+    inserted, updated, deleted = diff_row_hashes(local_hashes, remote_hashes, key)
+    changed_keys = inserted + updated
+    if len(changed_keys) > MAX_CHANGED_FRACTION * max(len(remote_hashes), 1):
+        return None
+
+    added_frame = _query(*build_select_query(table_name, [key] + added)) if added else None
+    changed_rows = None
+    if changed_keys:
+        batch_size = get_settings()["sync_batch_size"]
+        changed_rows = pd.concat([
+            _query(*build_select_query(table_name, columns, [(key, 'in', changed_keys[i:i + batch_size])]))
+            for i in range(0, len(changed_keys), batch_size)
+        ], ignore_index=True)
+
+    merged = apply_table_schema(
+        table_name,
+        merge_changes(df, key, changed_rows=changed_rows, deleted_keys=deleted, added_columns=added_frame)
+    )
+    if added:
+        # Track changes to the new columns from now on
+        hash_columns = list(hash_columns) + added
+        remote_hashes = _query(*_build_hash_query(table_name, hash_columns, key=key))
+    return store.save(
+        table_name, merged, version,
+        row_hashes=remote_hashes,
+        hash_columns=hash_columns,
+        sync={
+            "mode": "incremental",
+            "inserted": len(inserted),
+            "updated": len(updated),
+            "deleted": len(deleted),
+            "added_columns": added
+        }
+    )
+
+def _refresh_snapshot(table_name):
+    """Bring a table's local snapshot up to date if its data version changed
+
+    Existing snapshots are synced incrementally when possible, so the cost
+    scales with the size of the change; otherwise the table is reloaded.
+    """
+    store = get_snapshot_store()
+    version = get_connection_pool().run(lambda conn: _probe_table_version(conn, table_name))
+    entry = store.entry(table_name)
+    if entry is not None and version is not None and entry["version"] == version:
+        store.touch(table_name)
+        return entry
+    version = version or f"fetched-{time.time()}"
+    columns = get_connection_pool().run(lambda conn: _remote_columns(conn, table_name))
+    new_entry = None
+    if entry is not None and get_settings()["incremental_sync"]:
+        try:
+            new_entry = _sync_snapshot(table_name, version, entry, columns)
+        except Exception as e:
+            # A sync that cannot be applied must not leave the snapshot stuck
+            logger.warning("Incremental sync of %s failed (%s); reloading it in full", table_name, e)
+    if new_entry is None:
+        new_entry = _full_snapshot(table_name, version, columns)
+    get_result_cache().invalidate(table_name)
+    return new_entry
+
+def _schedule_snapshot_refresh(table_name):
+    """Refresh a snapshot on the prefetch pool (deduplicated while one is running)"""
+    get_prefetcher().submit(f"snapshot:{table_name}", lambda: _refresh_snapshot(table_name))
+
+def _snapshot_entry(table_name):
+    """Manifest entry of a table's snapshot, fetching the first snapshot if needed"""
+    entry = get_snapshot_store().entry(table_name)
+    if entry is None:
+        if snapshot_mode() == "offline":
+            raise RuntimeError(f"No local snapshot of {table_name} is available in offline mode")
+        entry = _refresh_snapshot(table_name)
+    elif snapshot_mode() == "on" and time.time() - entry["checked_at"] > get_settings()["cache"]["ttl"]:
+        # Serve the snapshot now and bring it up to date in the background
+        _schedule_snapshot_refresh(table_name)
+    return entry
+
+def _snapshot_query(table_name, columns, filters):
+    """Answer a table query from the local snapshot, projecting and filtering in pandas"""
+    cache = get_result_cache()
+    version = _snapshot_entry(table_name)["version"]
+
+    def load_snapshot():
+        df, _ = get_snapshot_store().load(table_name)
+        if df is None:
+            raise RuntimeError(f"Snapshot file for {table_name} is missing")
+        return _with_version(df, version)
+
+    df = cache.get_or_load(
+        (table_name, "snapshot", version),
+        lambda: _load_shared(table_name, "snapshot", version, load_snapshot)
+    )
+    if not columns and not filters:
         return df
+
+    def load_query():
+        result = filter_frame(df, filters)
+        if columns:
+            result = result[list(columns)]
+        return result.reset_index(drop=True)
+
+    query_key = (table_name, "snapshot-query", tuple(columns or ()), repr(filters), version)
+    return cache.get_or_load(query_key, load_query)
+
+def get_table_data(table_name, columns=None, filters=None):
+    """Get data from a specific table in Snowflake, optionally projected and filtered server-side
+
+    Results are validated and converted to the table's declared compact dtypes
+    (see table_schemas.py) before they are cached. In snapshot modes the query
+    is answered from the table's local snapshot instead.
+    """
+    try:
+        if snapshot_mode() != "off":
+            return _snapshot_query(table_name, columns, filters)
+        sql, params = build_select_query(table_name, columns, filters)
+        return _cached_query(
+            table_name, sql, params,
+            transform=lambda df: apply_table_schema(table_name, df, require_all=columns is None),
+            shared=not columns and not filters
+        )
+    except QueryCancelledError:
+        if _inside_shared_load():
+            raise
+        # The run that asked for this data has been superseded; nothing to show
+        return None
+    except Exception as e:
+        _report_error(f"Error fetching data from {table_name}: {str(e)}")
+        return None
+
+def get_table_page(table_name, columns, sort_column, key, descending=True, after=None, page_size=20, filters=None):
+    """Get one keyset-paginated page of a table; returns (page frame, whether more rows follow)
+
+    Each page is its own small cached query (see build_page_query), so paging
+    never fetches the rows before or after it.
+    """
+    try:
+        if snapshot_mode() != "off":
+            df = _snapshot_query(table_name, None, filters)
+            page = page_frame(df, sort_column, key, descending, after, page_size)
+            if columns:
+                page = page[list(columns)]
+        else:
+            sql, params = build_page_query(
+                table_name, columns, sort_column, key, descending, after, page_size, filters
+            )
+            # Values are kept as Snowflake returns them: the next page's cursor is
+            # compared against the column, so it must not be narrowed to float32
+            page = _cached_query(table_name, sql, params)
+        return page.head(page_size), len(page) > page_size
+    except QueryCancelledError:
+        if _inside_shared_load():
+            raise
+        return None, False
+    except Exception as e:
+        _report_error(f"Error fetching a page of {table_name}: {str(e)}")
+        return None, False
+
+def get_table_columns(table_name):
+    """Column names of a table, cached per data version (from the snapshot in snapshot modes); None on error"""
+    try:
+        if snapshot_mode() != "off":
+            return list(_snapshot_query(table_name, None, None).columns)
+        key = (table_name, "columns", get_table_version(table_name))
+        return _shared_get_or_load(
+            get_result_cache(), key,
+            lambda: get_connection_pool().run(lambda conn: _remote_columns(conn, table_name))
+        )
+    except QueryCancelledError:
+        if _inside_shared_load():
+            raise
+        return None
     except Exception as e:
-        st.error(f"Error fetching data from {table_name}: {str(e)}")
-        return None
\ No newline at end of file
+        _report_error(f"Error listing the columns of {table_name}: {str(e)}")
+        return None
+
+def _stream_table(table_name, make_aggregators, columns, filters):
+    """Feed a projected, filtered table batch by batch to fresh make_aggregators(); returns them
+
+    The aggregators are created inside the function the connection pool
+    retries, so a query re-run after a reconnect starts from empty state
+    instead of counting the batches it already saw twice.
+    """
+    batch_size = get_settings()["stream_batch_size"]
+
+    def consume(batches):
+        aggregators = make_aggregators()
+        for batch in batches:
+            batch = apply_table_schema(table_name, batch, require_all=False)
+            for aggregator in aggregators.values():
+                aggregator.update(batch)
+        return aggregators
+
+    if snapshot_mode() != "off":
+        # The snapshot is already in memory; slicing it keeps the aggregators' code path
+        df = _snapshot_query(table_name, columns, filters)
+        return consume(df.iloc[start:start + batch_size] for start in range(0, len(df), batch_size))
+    sql, params = build_select_query(table_name, columns, filters)
+    return get_connection_pool().run(
+        lambda conn: _run_query(conn, sql, params, read=lambda cur: consume(_cursor_batches(cur, batch_size)))
+    )
+
+def get_streamed_aggregates(table_name, stream_name, make_aggregators, columns=None, filters=None):
+    """Aggregate a table in one streamed pass without materializing it, cached per data version
+
+    make_aggregators() returns fresh {name: aggregator} objects (see
+    streaming_aggregates.py); the result maps each name to aggregator.result().
+    Peak memory is bounded by STREAM_BATCH_SIZE rows plus the aggregators' state.
+    """
+    version = get_table_version(table_name)
+    def load():
+        aggregators = _stream_table(table_name, make_aggregators, columns, filters)
+        return {name: _with_version(aggregator.result(), version) for name, aggregator in aggregators.items()}
+
+    key = (table_name, f"stream:{stream_name}", tuple(columns or ()), repr(filters), version)
+    return _shared_get_or_load(get_result_cache(), key, load)
+
+def get_aggregate_data(table_name, spec, filters=None, fallback_df=None):
+    """Get a small chart aggregate computed in Snowflake, or in pandas if pushdown is unavailable
+
+    The pandas fallback aggregates fallback_df when given. Otherwise it
+    aggregates the projected table, streamed in batches when streaming
+    aggregation is enabled, and returns the same frame the warehouse query would.
+    """
+    if get_settings()["aggregate_pushdown"] and snapshot_mode() == "off":
+        try:
+            sql, params = build_aggregate_query(table_name, spec, filters)
+            timeout = get_settings()["aggregate_timeout"]
+            return normalize_aggregate(_cached_query(table_name, sql, params, timeout=timeout), spec)
+        except QueryCancelledError:
+            if _inside_shared_load():
+                raise
+            return None
+        except Exception as e:
+            # Fall through to the local computation below
+            logger.warning("Aggregate pushdown on %s failed (%s); computing it locally", table_name, e)
+    return _aggregate_locally(table_name, f"aggregate:{spec!r}", lambda: SpecAggregator(spec),
+                              aggregate_source_columns(spec), filters, fallback_df)
+
+def _aggregate_locally(table_name, stream_name, make_aggregator, columns, filters, fallback_df):
+    """Run a fresh make_aggregator() over fallback_df, or over the projected table
+
+    Without a frame, the table is streamed in batches when streaming
+    aggregation is enabled and loaded whole otherwise; both paths go through
+    the same aggregator, so they return the same result.
+    """
+    df = fallback_df
+    if df is None and get_settings()["streaming_aggregation"]:
+        try:
+            streamed = get_streamed_aggregates(
+                table_name, stream_name, lambda: {"result": make_aggregator()}, columns=columns, filters=filters
+            )
+            return streamed["result"]
+        except QueryCancelledError:
+            if _inside_shared_load():
+                raise
+            return None
+        except Exception as e:
+            _report_error(f"Error aggregating {table_name}: {str(e)}")
+            return None
+    if df is None:
+        df = get_table_data(table_name, columns=columns, filters=filters)
+        if df is None:
+            return None
+    aggregator = make_aggregator()
+    aggregator.update(df)
+    return _with_version(aggregator.result(), data_version(df))
+
+def get_histogram_data(table_name, column, bins, filters=None, fallback_df=None):
+    """Fixed-bin histogram of a numeric column: bin_start, bin_end and count per bin
+
+    Computed from fallback_df when given, otherwise from the table (streamed
+    in batches when streaming aggregation is enabled).
+    """
+    return _aggregate_locally(table_name, f"histogram:{column}:{list(bins)!r}",
+                              lambda: HistogramAggregator(column, bins), [column], filters, fallback_df)
+
+def get_top_k_data(table_name, k, score, score_name, columns, filters=None, fallback_df=None):
+    """The k rows with the highest score(df), with the score in a score_name column
+
+    Matches DataFrame.nlargest(k) on the whole table. Computed from
+    fallback_df when given, otherwise from the projected table (streamed in
+    batches when streaming aggregation is enabled).
+    """
+    return _aggregate_locally(table_name, f"top_k:{score_name}:{k}", lambda: TopKAggregator(k, score, score_name),
+                              columns, filters, fallback_df)
+
+def get_derived_data(table_name, stage_name, build, columns=None, source=None):
+    """Get a derived-metric stage for a table, built once per data version and cached
+
+    build(df) receives the (cached) table and must return a new object rather
+    than modifying the frame it was given. With source, a frame already loaded
+    (such as another stage's rows), the stage is built from that frame and
+    keyed to its data version, so stages that index the same rows stay on one
+    version without being built together.
+    """
+    try:
+        def load():
+            df = source if source is not None else get_table_data(table_name, columns=columns)
+            return build(df) if df is not None else None
+
+        version = data_version(source)
+        if version is None:
+            version = get_table_version(table_name)
+        key = (table_name, f"derived:{stage_name}", tuple(columns or ()), version)
+        return _shared_get_or_load(get_result_cache(), key, load)
+    except QueryCancelledError:
+        if _inside_shared_load():
+            raise
+        return None
+    except Exception as e:
+        _report_error(f"Error preparing {stage_name} data for {table_name}: {str(e)}")
+        return None
+
+def prepare_scatter(df, x, y, columns, precision=None):
+    """Slim a scatter chart's data (see chart_data.py); returns (data, px render_mode)"""
+    charts = get_settings()["charts"]
+    data = slim_scatter_data(df, x, y, columns, precision, charts["max_points"])
+    return data, scatter_render_mode(len(data), charts["webgl_threshold"])
+
+# Serialized size in bytes of the last build of each chart, by "page/chart id"
+_payload_sizes = {}
+
+def get_chart_payloads():
+    """Get the serialized size in bytes of each chart's latest build"""
+    return dict(_payload_sizes)
+
+def get_figure(table_name, page, chart_id, build, params=(), version=None):
+    """Get a chart figure, built once per page, chart, data version of table_name and widget inputs
+
+    build() is only called on a miss. The figure is shared by all sessions
+    and must not be modified after it is returned. version is the data
+    version of the frame build() draws from (see data_version), so the figure
+    is cached under the version it shows; without it the table is probed.
+    """
+    def measure(figure):
+        # Serialized once: the payload size is also the figure's size in the cache
+        size = len(figure.to_json())
+        _payload_sizes[f"{page}/{chart_id}"] = size
+        logger.info(f"Chart {page}/{chart_id} payload: {size:,} bytes")
+        return size
+
+    try:
+        if version is None:
+            version = get_table_version(table_name)
+        key = (table_name, "figure", page, chart_id, tuple(params), version)
+        return _shared_get_or_load(get_figure_cache(), key, build, measure)
+    except QueryCancelledError:
+        if _inside_shared_load():
+            raise
+        return None
+    except Exception as e:
+        _report_error(f"Error building chart {chart_id}: {str(e)}")
+        return None
+
+def render_figure(table_name, page, chart_id, build, params=(), version=None):
+    """Show a cached chart figure (see get_figure) at container width"""
+    figure = get_figure(table_name, page, chart_id, build, params, version)
+    if figure is not None:
+        st.plotly_chart(figure, use_container_width=True)
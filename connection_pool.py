@@ -0,0 +1,227 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Connector error numbers that mean the server-side session is gone and the
+# connection has to be re-established (session expired / no longer exists /
+# authentication token expired)
+SESSION_EXPIRED_ERRNOS = {390111, 390112, 390114}
+
+
+def is_session_expired(error):
+    """Check whether a connector error means the Snowflake session has expired"""
+    return getattr(error, "errno", None) in SESSION_EXPIRED_ERRNOS
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class SnowflakeConnectionPool:
+    """Thread-safe pool of reusable Snowflake connections
+
+    Connections are opened with connect(**connect_params), by default
+    snowflake.connector.connect.
+    """
+
+    def __init__(self, connect_params, size=4, idle_timeout=600,
+                 health_check_interval=60, wait_timeout=30, connect=None):
+        self.connect_params = connect_params
+        self.connect = connect
+        self.size = max(1, int(size))
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.wait_timeout = wait_timeout
+
+        self._cond = threading.Condition()
+        # Idle connections as (connection, last_used) pairs, most recent last
+        self._idle = []
+        self._open = 0
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_s": 0.0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "health_checks": 0,
+            "failed_health_checks": 0,
+            "reconnects": 0,
+        }
+
+    def _connect(self):
+        connect = self.connect
+        if connect is None:
+            # Imported on first connect so loading this module stays cheap
+            import snowflake.connector
+            connect = snowflake.connector.connect
+        conn = connect(**self.connect_params)
+        with self._cond:
+            self._stats["connections_created"] += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn):
+        """Run a trivial query to make sure the connection is still usable"""
+        with self._cond:
+            self._stats["health_checks"] += 1
+        try:
+            if conn.is_closed():
+                raise ConnectionError("connection is closed")
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            finally:
+                cur.close()
+            return True
+        except Exception:
+            with self._cond:
+                self._stats["failed_health_checks"] += 1
+            return False
+
+    def _discard(self, conn):
+        """Close a connection and free its slot in the pool"""
+        self._close_quietly(conn)
+        with self._cond:
+            self._open -= 1
+            self._stats["connections_discarded"] += 1
+            self._cond.notify()
+
+    def acquire(self):
+        """Borrow a connection, creating one or waiting if the pool is exhausted"""
+        deadline = None
+        waited_since = None
+        while True:
+            conn = None
+            last_used = None
+            # Connections that sat idle for too long, closed once the lock is released
+            stale = []
+            try:
+                with self._cond:
+                    now = time.monotonic()
+                    while self._idle:
+                        candidate, candidate_used = self._idle.pop()
+                        if now - candidate_used > self.idle_timeout:
+                            self._open -= 1
+                            self._stats["connections_discarded"] += 1
+                            stale.append(candidate)
+                            continue
+                        conn, last_used = candidate, candidate_used
+                        break
+
+                    if conn is None and self._open >= self.size:
+                        if stale:
+                            # Close them (outside the lock) before waiting
+                            continue
+                        if waited_since is None:
+                            waited_since = now
+                            deadline = now + self.wait_timeout
+                            self._stats["waits"] += 1
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self._stats["wait_time_s"] += now - waited_since
+                            raise PoolTimeoutError(
+                                f"No Snowflake connection available after {self.wait_timeout}s "
+                                f"(pool size {self.size})"
+                            )
+                        self._cond.wait(remaining)
+                        continue
+
+                    if conn is None:
+                        # Reserve a slot before connecting outside the lock
+                        self._open += 1
+                    if waited_since is not None:
+                        self._stats["wait_time_s"] += time.monotonic() - waited_since
+                    self._stats["checkouts"] += 1
+            finally:
+                for candidate in stale:
+                    self._close_quietly(candidate)
+
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+
+            if time.monotonic() - last_used > self.health_check_interval and not self._is_healthy(conn):
+                # Keep the slot and replace the dead connection in place
+                self._close_quietly(conn)
+                with self._cond:
+                    self._stats["connections_discarded"] += 1
+                    self._stats["reconnects"] += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+            return conn
+
+    def release(self, conn, discard=False):
+        """Return a borrowed connection to the pool"""
+        if discard or conn.is_closed():
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with-block"""
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception as e:
+            self.release(conn, discard=is_session_expired(e))
+            raise
+        else:
+            self.release(conn)
+
+    def run(self, func):
+        """Call func(connection), reconnecting once if the session has expired"""
+        try:
+            with self.connection() as conn:
+                return func(conn)
+        except Exception as e:
+            if not is_session_expired(e):
+                raise
+            with self._cond:
+                self._stats["reconnects"] += 1
+            with self.connection() as conn:
+                return func(conn)
+
+    def warm_up(self):
+        """Open (or health-check) one connection so the first query skips the handshake"""
+        conn = self.acquire()
+        self.release(conn)
+
+    def metrics(self):
+        """Snapshot of pool size, usage and checkout/wait counters"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "pool_size": self.size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+            })
+        stats["wait_time_s"] = round(stats["wait_time_s"], 3)
+        return stats
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
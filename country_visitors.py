@@ -1,144 +1,209 @@
 import plotly.express as px
 import plotly.graph_objects as go
-from config import get_table_data
+from config import get_table_data, get_aggregate_data, get_derived_data, load_progressively, render_figure, data_version
+from visitor_analytics import compute_visitor_trends
 import streamlit as st
-import pandas as pd
+
+TABLE_NAME = "COUNTRYWISEYEARLYVISITORS"
+PAGE_KEY = "country_visitors"
+
+# The page uses every column (the key column plus all year columns), so nothing is projected away
+PAGE_COLUMNS = None
+
+def country_totals_spec(year_columns):
+    """Aggregate spec for total visitors per country over the given year columns"""
+    return {
+        "group_by": ['COUNTRY'],
+        "measures": {"TOTAL_VISITORS": ("sum", list(year_columns))}
+    }
+
+def load_data():
+    """Fetch the page's table (cached per data version)"""
+    return get_table_data(TABLE_NAME, columns=PAGE_COLUMNS)
+
+def load_totals():
+    """Total visitors per country over every year column of the table"""
+    df = load_data()
+    if df is None:
+        return None
+    return get_aggregate_data(TABLE_NAME, country_totals_spec(df.columns[1:]), fallback_df=df)
+
+def load_trends():
+    """Growth, trend and COVID metrics, computed once per data version, with the rows they came from"""
+    return get_derived_data(
+        TABLE_NAME, 'visitor_trends',
+        lambda df: {**compute_visitor_trends(df, id_col='COUNTRY'), 'data': df},
+        columns=PAGE_COLUMNS
+    )
+
+def prefetch_data():
+    """Warm the table, trend metrics and chart aggregates ahead of the first visit"""
+    df = load_data()
+    if df is not None:
+        load_totals()
+        load_trends()
+    return df
+
 def show_country_visitors_analysis():
     """Display country-wise visitors analysis"""
-    # Fetch data
-    df = get_table_data("COUNTRYWISEYEARLYVISITORS")
-    if df is not None:
-        # Create visualizations
-        create_country_wise_visualizations(df)
+    create_country_wise_visualizations()
+
+def create_country_wise_visualizations():
+    """Create visualizations for country-wise visitors data
 
-def create_country_wise_visualizations(df):
-    """Create visualizations for country-wise visitors data"""
+    Each panel shows a placeholder and is filled in as soon as its own data
+    arrives, so a slow query only holds up the panels that need it.
+    """
     st.title("🌎 Country-wise Visitors Analysis (2014-2020)")
     st.markdown("---")
     
-    # Create two columns for layout
+    # Create the layout up front: two rows of two charts, then the insights
     col1, col2 = st.columns(2)
-    
-    with col1:
-        # Line chart showing trends for all countries with enhanced styling
-        fig_line = px.line(
-            df.melt(id_vars=['COUNTRY'], var_name='Year', value_name='Visitors'),
-            x='Year',
-            y='Visitors',
-            color='COUNTRY',
-            title='Tourist Visitor Trends by Country',
-            template='plotly_white',
-            line_shape='spline',
-            markers=True
-        )
-        fig_line.update_layout(
-            height=500,
-            hovermode='x unified',
-            title_x=0.5,
-            title_font_size=20,
-            legend_title_text='Countries',
-            xaxis_title_font_size=14,
-            yaxis_title_font_size=14,
-            showlegend=True
-        )
-        fig_line.update_traces(line_width=3)
-        st.plotly_chart(fig_line, use_container_width=True)
-
-    with col2:
-        # Enhanced bar chart comparing total visitors by country
-        total_visitors = df.iloc[:, 1:].sum(axis=1)
-        fig_bar = px.bar(
-            x=df['COUNTRY'],
-            y=total_visitors,
-            title='Total Visitors by Country',
-            labels={'x': 'Country', 'y': 'Total Visitors'},
-            template='plotly_white',
-            color=total_visitors,
-            color_continuous_scale='Viridis'
-        )
-        fig_bar.update_layout(
-            height=500,
-            title_x=0.5,
-            title_font_size=20,
-            xaxis_title_font_size=14,
-            yaxis_title_font_size=14,
-            bargap=0.2,
-            showlegend=False
-        )
-        fig_bar.update_traces(
-            marker_line_width=1.5,
-            marker_line_color='white',
-            opacity=0.8
-        )
-        st.plotly_chart(fig_bar, use_container_width=True)
-
-    # Create two more columns
     col3, col4 = st.columns(2)
-
-    with col3:
-        # Enhanced heatmap for year-over-year growth rate
-        years = df.columns[1:].astype(str).tolist()
-        growth_data = {}
-        
-        for country in df['COUNTRY']:
-            country_data = df[df['COUNTRY'] == country].iloc[0, 1:].astype(float)
-            growth = [(country_data[i] - country_data[i-1])/country_data[i-1] * 100 
-                     for i in range(1, len(country_data))]
-            growth_data[country] = growth
-
-        growth_df = pd.DataFrame(growth_data, index=years[1:]).T
-        fig_heatmap = px.imshow(
-            growth_df,
-            title='Year-over-Year Growth Rate (%)',
-            color_continuous_scale='RdYlBu',
-            aspect='auto',
-            labels={'x': 'Year', 'y': 'Country'}
-        )
-        fig_heatmap.update_layout(
-            height=500,
-            title_x=0.5,
-            title_font_size=20,
-            coloraxis_colorbar_title='Growth %'
-        )
-        st.plotly_chart(fig_heatmap, use_container_width=True)
-
-    with col4:
-        # Enhanced impact analysis visualization
-        impact_df = df[['COUNTRY', '_2019', '_2020']].copy()
-        impact_df['Decline (%)'] = ((impact_df['_2020'] - impact_df['_2019']) / impact_df['_2019'] * 100).round(1)
-        
-        fig_impact = px.bar(
-            impact_df,
-            x='COUNTRY',
-            y='Decline (%)',
-            title='COVID-19 Impact: Visitor Decline in 2020',
-            color='Decline (%)',
-            color_continuous_scale='RdBu_r'
-        )
-        fig_impact.update_layout(
-            height=500,
-            title_x=0.5,
-            title_font_size=20,
-            xaxis_title_font_size=14,
-            yaxis_title_font_size=14
-        )
-        fig_impact.update_traces(
-            marker_line_width=1.5,
-            marker_line_color='white'
-        )
-        st.plotly_chart(fig_impact, use_container_width=True)
-
-    # Enhanced insights section
     st.markdown("## 📊 Key Insights")
     st.markdown("---")
+    panels = {
+        'line': col1.empty(),
+        'bar': col2.empty(),
+        'heatmap': col3.empty(),
+        'impact': col4.empty(),
+        'insights': st.empty()
+    }
+    for panel in panels.values():
+        panel.info("Loading…")
+
+    # Table, totals and trend metrics load concurrently; render whatever is ready
+    loaded = {}
+    for name, result in load_progressively({'table': load_data, 'totals': load_totals, 'trends': load_trends}):
+        loaded[name] = result
+        if name == 'table':
+            _fill_panel(panels['line'], 'trend_line', build_trend_line, result, data_version(result))
+        elif name == 'totals':
+            _fill_panel(panels['bar'], 'totals_bar', build_totals_bar, result, data_version(result))
+        elif name == 'trends':
+            version = data_version(result['data']) if result is not None else None
+            _fill_panel(panels['heatmap'], 'growth_heatmap', build_growth_heatmap, result, version)
+            _fill_panel(panels['impact'], 'covid_impact', build_covid_impact, result, version)
+        if 'table' in loaded and 'trends' in loaded:
+            if loaded['table'] is None or loaded['trends'] is None:
+                panels['insights'].empty()
+            else:
+                with panels['insights'].container():
+                    render_insights(loaded['table'], loaded['trends'])
+
+def _fill_panel(panel, chart_id, build, data, version):
+    """Replace a panel's placeholder with its (cached) chart, or an error if its data failed to load
+
+    version is the data version data was built from, so the chart is cached under it.
+    """
+    if data is None:
+        panel.error("Could not load this chart's data (details in the server log)")
+        return
+    with panel.container():
+        render_figure(TABLE_NAME, PAGE_KEY, chart_id, lambda: build(data), version=version)
+
+def build_trend_line(df):
+    """Line chart showing trends for all countries with enhanced styling"""
+    fig_line = px.line(
+        df.melt(id_vars=['COUNTRY'], var_name='Year', value_name='Visitors'),
+        x='Year',
+        y='Visitors',
+        color='COUNTRY',
+        title='Tourist Visitor Trends by Country',
+        template='plotly_white',
+        line_shape='spline',
+        markers=True
+    )
+    fig_line.update_layout(
+        height=500,
+        hovermode='x unified',
+        title_x=0.5,
+        title_font_size=20,
+        legend_title_text='Countries',
+        xaxis_title_font_size=14,
+        yaxis_title_font_size=14,
+        showlegend=True
+    )
+    fig_line.update_traces(line_width=3)
+    return fig_line
+
+def build_totals_bar(totals):
+    """Enhanced bar chart comparing total visitors by country"""
+    total_visitors = totals['TOTAL_VISITORS']
+    fig_bar = px.bar(
+        x=totals['COUNTRY'],
+        y=total_visitors,
+        title='Total Visitors by Country',
+        labels={'x': 'Country', 'y': 'Total Visitors'},
+        template='plotly_white',
+        color=total_visitors,
+        color_continuous_scale='Viridis'
+    )
+    fig_bar.update_layout(
+        height=500,
+        title_x=0.5,
+        title_font_size=20,
+        xaxis_title_font_size=14,
+        yaxis_title_font_size=14,
+        bargap=0.2,
+        showlegend=False
+    )
+    fig_bar.update_traces(
+        marker_line_width=1.5,
+        marker_line_color='white',
+        opacity=0.8
+    )
+    return fig_bar
+
+def build_growth_heatmap(trends):
+    """Enhanced heatmap for year-over-year growth rate"""
+    growth_df = trends['yoy_growth']
+    fig_heatmap = px.imshow(
+        growth_df,
+        title='Year-over-Year Growth Rate (%)',
+        color_continuous_scale='RdYlBu',
+        aspect='auto',
+        labels={'x': 'Year', 'y': 'Country'}
+    )
+    fig_heatmap.update_layout(
+        height=500,
+        title_x=0.5,
+        title_font_size=20,
+        coloraxis_colorbar_title='Growth %'
+    )
+    return fig_heatmap
+
+def build_covid_impact(trends):
+    """Enhanced impact analysis visualization"""
+    impact_df = trends['covid_change'].round(1).rename('Decline (%)').reset_index()
     
-    # Create three columns with equal spacing
+    fig_impact = px.bar(
+        impact_df,
+        x='COUNTRY',
+        y='Decline (%)',
+        title='COVID-19 Impact: Visitor Decline in 2020',
+        color='Decline (%)',
+        color_continuous_scale='RdBu_r'
+    )
+    fig_impact.update_layout(
+        height=500,
+        title_x=0.5,
+        title_font_size=20,
+        xaxis_title_font_size=14,
+        yaxis_title_font_size=14
+    )
+    fig_impact.update_traces(
+        marker_line_width=1.5,
+        marker_line_color='white'
+    )
+    return fig_impact
+
+def render_insights(df, trends):
+    """Key insight metrics in three columns with equal spacing"""
     col5, col6, col7 = st.columns(3)
     
     with col5:
-        total_2019 = df['_2019'].sum()
-        total_2020 = df['_2020'].sum()
-        decline = ((total_2020 - total_2019) / total_2019 * 100).round(1)
+        decline = round(trends['overall_covid_change'], 1)
         st.metric("Overall Tourism Decline in 2020", f"{decline}%", 
                  delta=f"{abs(decline)}% decrease",
                  delta_color="inverse")
@@ -151,9 +216,10 @@ def create_country_wise_visualizations(df):
                  f"{max_visitors:,.0f} visitors")
         
     with col7:
-        avg_growth = growth_df.mean(axis=1)
-        fastest_growing = avg_growth.idxmax()
-        growth_rate = avg_growth.max().round(1)
-        st.metric("Fastest Growing Market",
-                 fastest_growing,
-                 f"{growth_rate}% avg. growth")
\ No newline at end of file
+        avg_growth = trends['avg_growth'].dropna()
+        if not avg_growth.empty:
+            fastest_growing = avg_growth.idxmax()
+            growth_rate = round(avg_growth.max(), 1)
+            st.metric("Fastest Growing Market",
+                     fastest_growing,
+                     f"{growth_rate}% avg. growth")
\ No newline at end of file
@@ -0,0 +1,202 @@
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pandas as pd
+
+
+def estimate_nbytes(value):
+    """Approximate in-memory size of a cached value"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(value, pd.DataFrame) else int(usage)
+    if isinstance(getattr(value, "nbytes", None), int):
+        # numpy arrays and index objects that report their own footprint
+        return value.nbytes
+    if hasattr(value, "to_plotly_json"):
+        # Plotly figures are charged at the size of their serialized spec
+        return len(value.to_json())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+# PROCESS-WIDE SIDE EFFECT: on pandas < 3, importing this module turns on
+# Copy-on-Write for every frame in the process (the default from pandas 3).
+# handout() relies on it to keep sessions apart; it cannot be scoped to the
+# handout path, since it has to hold whenever a caller later writes to its
+# copy. Chained assignment (df["x"][0] = ...) no longer writes through.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+def handout(value):
+    """A caller's own copy of a cached value, without copying any data
+
+    Frames and series (also inside dicts, lists and tuples) are shallow
+    Copy-on-Write copies: writes, in place or not, and new columns only
+    change the caller's copy, never the cached value other sessions get.
+    Other objects (index structures, figures) are shared as they are and
+    must not be modified.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, dict):
+        return {key: handout(item) for key, item in value.items()}
+    if type(value) in (list, tuple):
+        return type(value)(handout(item) for item in value)
+    return value
+
+
+class ResultCache:
+    """Versioned LRU cache for query results with TTL-based version checks
+
+    Entries are keyed by (table, query key, data version). A table's version is
+    trusted for `ttl` seconds; after that the next lookup re-probes it, and
+    entries of a superseded version are dropped.
+
+    The cache is shared by all sessions in the process. Concurrent misses for
+    the same key are coalesced into one in-flight load (single-flight), and
+    every caller gets its own copy of a value (see handout).
+    """
+
+    def __init__(self, ttl=300, max_bytes=256 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._bytes = 0
+        self._inflight = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "version_checks": 0}
+
+    def _single_flight(self, flight_key, load):
+        """Run load() once for concurrent callers with the same key; others wait for its result"""
+        with self._lock:
+            future = self._inflight.get(flight_key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[flight_key] = future
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+        try:
+            value = load()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(flight_key, None)
+
+    def current_version(self, table_name, probe):
+        """Get the table's data version, calling probe() when the TTL has lapsed"""
+        with self._lock:
+            known = self._versions.get(table_name)
+            if known is not None and time.monotonic() - known[1] < self.ttl:
+                return known[0]
+        return self._single_flight(("__version__", table_name), lambda: self._probe(table_name, probe))
+
+    def _probe(self, table_name, probe):
+        version = probe()
+        if version is None:
+            # No metadata available: fall back to plain TTL expiry
+            version = f"ttl-{uuid.uuid4().hex}"
+
+        with self._lock:
+            self._stats["version_checks"] += 1
+            known = self._versions.get(table_name)
+            if known is not None and known[0] != version:
+                self._drop_table(table_name)
+            self._versions[table_name] = (version, time.monotonic())
+        return version
+
+    def get_or_load(self, key, load, size=None):
+        """Get a cached value, loading it once (coalescing concurrent misses) if absent
+
+        size(value), if given, measures a loaded value for the byte limit in
+        place of estimate_nbytes (for callers that measure it anyway).
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        def load_and_store():
+            # Another caller may have stored it while this one waited for the lock
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            loaded = load()
+            if loaded is not None:
+                self.put(key, loaded, nbytes=size(loaded) if size is not None else None)
+            return loaded
+
+        return handout(self._single_flight(key, load_and_store))
+
+    def get(self, key):
+        """Get (a copy of) a cached value, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        return handout(entry[0])
+
+    def put(self, key, value, nbytes=None):
+        """Store a value and evict least recently used entries over the byte limit
+
+        nbytes is the value's size if already known; otherwise it is estimated.
+        """
+        if nbytes is None:
+            nbytes = estimate_nbytes(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._stats["evictions"] += 1
+
+    def _drop_table(self, table_name):
+        for key in [k for k in self._entries if k[0] == table_name]:
+            self._bytes -= self._entries.pop(key)[1]
+
+    def invalidate(self, table_name=None):
+        """Forget cached results and versions for one table, or for all tables"""
+        with self._lock:
+            if table_name is None:
+                self._entries.clear()
+                self._versions.clear()
+                self._bytes = 0
+            else:
+                self._drop_table(table_name)
+                self._versions.pop(table_name, None)
+
+    def stats(self):
+        """Snapshot of hit/miss counters and memory use"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            })
+        return stats
@@ -0,0 +1,91 @@
+import pandas as pd
+
+# Derived-metric stages run once per data version (see config.get_derived_data).
+# Each returns {"data": enriched copy of the table}, plus "kpis" (precomputed
+# values) for pages that show any; pages only read from the result, never
+# write into it.
+
+TOP_PLACES_NUMERIC_COLUMNS = [
+    'GOOGLE_REVIEW_RATING',
+    'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
+    'ENTRANCE_FEE_IN_INR',
+    'TIME_NEEDED_TO_VISIT_IN_HRS'
+]
+
+FEE_RANGE_BINS = [-1, 0, 100, 500, float('inf')]
+FEE_RANGE_LABELS = ['Free', '₹1-100', '₹101-500', '₹500+']
+
+
+def _row_at_max(df, column):
+    """Row with the largest non-null value in column, or None"""
+    values = df[column].dropna()
+    return df.loc[values.idxmax()] if not values.empty else None
+
+
+def popularity_score(df):
+    """Rating weighted by review volume (also used for streamed top-k rankings)"""
+    return df['GOOGLE_REVIEW_RATING'] * df['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS']
+
+
+def value_for_money_score(df):
+    """Entrance fee per rating point (lower is better; unrated places get no score)"""
+    # Ensure we don't divide by zero
+    return df['ENTRANCE_FEE_IN_INR'].div(df['GOOGLE_REVIEW_RATING'].replace(0, float('nan')))
+
+
+def time_efficiency_score(df):
+    """Review volume per hour of visit"""
+    return df['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'].div(df['TIME_NEEDED_TO_VISIT_IN_HRS'].replace(0, float('nan')))
+
+
+def bayesian_rating(df, prior_reviews=None):
+    """Rating shrunk towards the table's mean by review volume
+
+    A place with v lakh reviews and rating R scores (v * R + m * C) / (v + m),
+    where C is the mean rating and m (default: the median review count) is
+    how many reviews the prior is worth.
+    """
+    ratings = df['GOOGLE_REVIEW_RATING']
+    reviews = df['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'].fillna(0).clip(lower=0)
+    mean_rating = ratings.mean()
+    if prior_reviews is None:
+        prior_reviews = reviews[ratings.notna()].median()
+    if pd.isna(prior_reviews) or prior_reviews <= 0:
+        return ratings.astype('float64')
+    return (reviews * ratings + prior_reviews * mean_rating) / (reviews + prior_reviews)
+
+
+def enrich_top_places(df):
+    """Add numeric types and ranking scores to the top places table
+
+    Leaderboards and the best place per score come from rankings.RankingEngine,
+    so the result has no "kpis".
+    """
+    data = df.copy()
+    for column in TOP_PLACES_NUMERIC_COLUMNS:
+        data[column] = pd.to_numeric(data[column], errors='coerce')
+
+    data['popularity_score'] = popularity_score(data)
+    data['value_score'] = value_for_money_score(data)
+    data['time_efficiency'] = time_efficiency_score(data)
+    data['bayesian_rating'] = bayesian_rating(data)
+    return {'data': data}
+
+
+def enrich_tourist_places(df):
+    """Add numeric review counts and fee ranges to the famous places table, plus its KPI bundle"""
+    data = df.copy()
+    data['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'] = pd.to_numeric(data['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'], errors='coerce')
+    data['Fee_Range'] = pd.cut(
+        data['ENTRANCE_FEE_IN_INR'],
+        bins=FEE_RANGE_BINS,
+        labels=FEE_RANGE_LABELS
+    )
+
+    kpis = {
+        'avg_rating': data['GOOGLE_REVIEW_RATING'].mean(),
+        'total_reviews': data['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'].sum(),
+        'top_rated': _row_at_max(data, 'GOOGLE_REVIEW_RATING'),
+        'most_reviewed': _row_at_max(data, 'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'),
+    }
+    return {'data': data, 'kpis': kpis}
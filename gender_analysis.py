@@ -2,18 +2,151 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from config import get_table_data
+from config import get_table_data, get_derived_data, get_figure, render_figure, data_version, fragment, timed_render
+
+TABLE_NAME = "COUNTRYWISEGENDER"
+PAGE_KEY = "gender_analysis"
+
+# The page uses every column (the key column plus all year columns), so nothing is projected away
+PAGE_COLUMNS = None
+
+def load_data():
+    """Fetch the page's table (cached per data version)"""
+    return get_table_data(TABLE_NAME, columns=PAGE_COLUMNS)
+
+def load_insights():
+    """Insight values, computed once per data version"""
+    return get_derived_data(TABLE_NAME, 'gender_insights', compute_gender_insights, columns=PAGE_COLUMNS)
+
+def prefetch_data():
+    """Warm the table, insights and static figures ahead of the first visit"""
+    df = load_data()
+    if df is not None:
+        load_insights()
+        for chart_id, build in static_charts().items():
+            get_figure(TABLE_NAME, PAGE_KEY, chart_id, lambda build=build: build(df), version=data_version(df))
+    return df
 
 def show_gender_analysis():
     """Display country-wise gender distribution analysis"""
     # Fetch data
-    df = get_table_data("COUNTRYWISEGENDER")
-    if df is not None:
+    df = load_data()
+    insights = load_insights()
+    if df is not None and insights is not None:
         # Create visualizations
-        create_gender_visualizations(df)
+        create_gender_visualizations(df, insights)
+
+def static_charts():
+    """Charts that only depend on the table: {chart id: build(df)}"""
+    return {
+        'male_trend_line': build_male_trend_line,
+        'gender_stacked_bar': build_gender_stacked_bar,
+        'gender_gap_heatmap': build_gender_gap_heatmap
+    }
+
+def build_male_trend_line(df):
+    """Line chart showing male percentage trends with enhanced styling"""
+    male_cols = [col for col in df.columns if 'MALE' in col]
+    female_cols = [col for col in df.columns if 'FEMALE' in col]
+    
+    # Prepare data for plotting with better formatting
+    male_data = pd.melt(df, id_vars=['COUNTRY_OF_NATIONALITY'], value_vars=male_cols, 
+                      var_name='Year', value_name='Male Percentage')
+    male_data['Year'] = male_data['Year'].apply(lambda x: x.split('_')[1][:4])
+    
+    fig_line = px.line(
+        male_data,
+        x='Year',
+        y='Male Percentage',
+        color='COUNTRY_OF_NATIONALITY',
+        title='Male Tourist Percentage Trends by Country',
+        template='plotly_white',
+        line_shape='spline',
+        markers=True
+    )
+    fig_line.update_layout(
+        height=500,
+        hovermode='x unified',
+        title_x=0.5,
+        title_font_size=20,
+        legend_title_text='Countries',
+        xaxis_title_font_size=14,
+        yaxis_title_font_size=14
+    )
+    fig_line.update_traces(line_width=3)
+    return fig_line
 
-def create_gender_visualizations(df):
-    """Create visualizations for gender distribution data"""
+def build_gender_stacked_bar(df):
+    """Enhanced stacked bar chart for gender distribution"""
+    fig_stacked = go.Figure()
+    fig_stacked.add_trace(go.Bar(
+        name='Male',
+        x=df['COUNTRY_OF_NATIONALITY'],
+        y=df['_2020_MALE'],
+        marker_color='#2E86C1'
+    ))
+    fig_stacked.add_trace(go.Bar(
+        name='Female',
+        x=df['COUNTRY_OF_NATIONALITY'],
+        y=df['_2020_FEMALE'],
+        marker_color='#D35400'
+    ))
+    
+    fig_stacked.update_layout(
+        barmode='stack',
+        title={
+            'text': 'Gender Distribution by Country (2020)',
+            'x': 0.5,
+            'font_size': 20
+        },
+        height=500,
+        template='plotly_white',
+        xaxis_title='Country',
+        yaxis_title='Percentage',
+        legend_title_text='Gender',
+        bargap=0.3
+    )
+    return fig_stacked
+
+def build_gender_gap_heatmap(df):
+    """Enhanced gender gap evolution heatmap"""
+    gender_gap = pd.DataFrame()
+    for year in range(2014, 2021):
+        male_col = f'_{year}_MALE'
+        female_col = f'_{year}_FEMALE'
+        gender_gap[str(year)] = df[male_col] - df[female_col]
+    gender_gap.index = df['COUNTRY_OF_NATIONALITY']
+    
+    fig_heatmap = px.imshow(
+        gender_gap.T,
+        title='Gender Gap Evolution (Male% - Female%)',
+        color_continuous_scale='RdBu',
+        aspect='auto',
+        labels={'x': 'Country', 'y': 'Year'}
+    )
+    fig_heatmap.update_layout(
+        height=500,
+        title_x=0.5,
+        title_font_size=20,
+        coloraxis_colorbar_title='Gap %'
+    )
+    return fig_heatmap
+
+def compute_gender_insights(df):
+    """Insight values for the 2020 gender split"""
+    balanced_idx = abs(df['_2020_MALE'] - 50).idxmin()
+    largest_gap_idx = abs(df['_2020_MALE'] - df['_2020_FEMALE']).idxmax()
+    return {
+        'avg_male_2020': df['_2020_MALE'].mean(),
+        'avg_female_2020': df['_2020_FEMALE'].mean(),
+        'most_balanced': df.loc[balanced_idx, 'COUNTRY_OF_NATIONALITY'],
+        'balance_value': df.loc[balanced_idx, '_2020_MALE'],
+        'largest_gap_country': df.loc[largest_gap_idx, 'COUNTRY_OF_NATIONALITY'],
+        'gap_size': abs(df.loc[largest_gap_idx, '_2020_MALE'] - df.loc[largest_gap_idx, '_2020_FEMALE'])
+    }
+
+def create_gender_visualizations(df, insights):
+    """Create visualizations for gender distribution data (figures are cached per data version)"""
     st.title("👥 Country-wise Gender Distribution Analysis (2014-2020)")
     st.markdown("---")
     
@@ -21,126 +154,20 @@ def create_gender_visualizations(df):
     col1, col2 = st.columns(2)
     
     with col1:
-        # Line chart showing male percentage trends with enhanced styling
-        male_cols = [col for col in df.columns if 'MALE' in col]
-        female_cols = [col for col in df.columns if 'FEMALE' in col]
-        
-        # Prepare data for plotting with better formatting
-        male_data = pd.melt(df, id_vars=['COUNTRY_OF_NATIONALITY'], value_vars=male_cols, 
-                          var_name='Year', value_name='Male Percentage')
-        male_data['Year'] = male_data['Year'].apply(lambda x: x.split('_')[1][:4])
-        
-        fig_line = px.line(
-            male_data,
-            x='Year',
-            y='Male Percentage',
-            color='COUNTRY_OF_NATIONALITY',
-            title='Male Tourist Percentage Trends by Country',
-            template='plotly_white',
-            line_shape='spline',
-            markers=True
-        )
-        fig_line.update_layout(
-            height=500,
-            hovermode='x unified',
-            title_x=0.5,
-            title_font_size=20,
-            legend_title_text='Countries',
-            xaxis_title_font_size=14,
-            yaxis_title_font_size=14
-        )
-        fig_line.update_traces(line_width=3)
-        st.plotly_chart(fig_line, use_container_width=True)
+        render_figure(TABLE_NAME, PAGE_KEY, 'male_trend_line', lambda: build_male_trend_line(df), version=data_version(df))
 
     with col2:
-        # Enhanced stacked bar chart for gender distribution
-        latest_year_male = df[['COUNTRY_OF_NATIONALITY', '_2020_MALE']].copy()
-        latest_year_female = df[['COUNTRY_OF_NATIONALITY', '_2020_FEMALE']].copy()
-        
-        fig_stacked = go.Figure()
-        fig_stacked.add_trace(go.Bar(
-            name='Male',
-            x=df['COUNTRY_OF_NATIONALITY'],
-            y=df['_2020_MALE'],
-            marker_color='#2E86C1'
-        ))
-        fig_stacked.add_trace(go.Bar(
-            name='Female',
-            x=df['COUNTRY_OF_NATIONALITY'],
-            y=df['_2020_FEMALE'],
-            marker_color='#D35400'
-        ))
-        
-        fig_stacked.update_layout(
-            barmode='stack',
-            title={
-                'text': 'Gender Distribution by Country (2020)',
-                'x': 0.5,
-                'font_size': 20
-            },
-            height=500,
-            template='plotly_white',
-            xaxis_title='Country',
-            yaxis_title='Percentage',
-            legend_title_text='Gender',
-            bargap=0.3
-        )
-        st.plotly_chart(fig_stacked, use_container_width=True)
+        render_figure(TABLE_NAME, PAGE_KEY, 'gender_stacked_bar', lambda: build_gender_stacked_bar(df), version=data_version(df))
 
     # Create two more columns
     col3, col4 = st.columns(2)
 
     with col3:
-        # Enhanced gender gap evolution heatmap
-        gender_gap = pd.DataFrame()
-        for year in range(2014, 2021):
-            male_col = f'_{year}_MALE'
-            female_col = f'_{year}_FEMALE'
-            gender_gap[str(year)] = df[male_col] - df[female_col]
-        gender_gap.index = df['COUNTRY_OF_NATIONALITY']
-        
-        fig_heatmap = px.imshow(
-            gender_gap.T,
-            title='Gender Gap Evolution (Male% - Female%)',
-            color_continuous_scale='RdBu',
-            aspect='auto',
-            labels={'x': 'Country', 'y': 'Year'}
-        )
-        fig_heatmap.update_layout(
-            height=500,
-            title_x=0.5,
-            title_font_size=20,
-            coloraxis_colorbar_title='Gap %'
-        )
-        st.plotly_chart(fig_heatmap, use_container_width=True)
+        render_figure(TABLE_NAME, PAGE_KEY, 'gender_gap_heatmap', lambda: build_gender_gap_heatmap(df), version=data_version(df))
 
     with col4:
-        # Enhanced pie chart with country selector
-        selected_country = st.selectbox(
-            "📍 Select Country for Gender Distribution",
-            df['COUNTRY_OF_NATIONALITY'].tolist()
-        )
-        
-        country_data = df[df['COUNTRY_OF_NATIONALITY'] == selected_country]
-        gender_values = [
-            country_data['_2020_MALE'].iloc[0],
-            country_data['_2020_FEMALE'].iloc[0]
-        ]
-        
-        fig_pie = px.pie(
-            values=gender_values,
-            names=['Male', 'Female'],
-            title=f'Gender Distribution in {selected_country} (2020)',
-            color_discrete_sequence=['#2E86C1', '#D35400'],
-            hole=0.4
-        )
-        fig_pie.update_layout(
-            height=500,
-            title_x=0.5,
-            title_font_size=20,
-            showlegend=True
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
+        # Only this panel reruns when another country is picked
+        render_country_pie(df)
 
     # Enhanced insights section
     st.markdown("## 📊 Key Insights")
@@ -148,8 +175,8 @@ def create_gender_visualizations(df):
     col5, col6, col7 = st.columns(3)
     
     with col5:
-        avg_male_2020 = df['_2020_MALE'].mean()
-        avg_female_2020 = df['_2020_FEMALE'].mean()
+        avg_male_2020 = insights['avg_male_2020']
+        avg_female_2020 = insights['avg_female_2020']
         st.metric(
             "Gender Distribution (2020)", 
             f"M: {avg_male_2020:.1f}% | F: {avg_female_2020:.1f}%",
@@ -157,20 +184,55 @@ def create_gender_visualizations(df):
         )
         
     with col6:
-        most_balanced = df.loc[abs(df['_2020_MALE'] - 50).idxmin(), 'COUNTRY_OF_NATIONALITY']
-        balance_value = df.loc[abs(df['_2020_MALE'] - 50).idxmin(), '_2020_MALE']
+        balance_value = insights['balance_value']
         st.metric(
             "Most Gender Balanced Country", 
-            most_balanced,
+            insights['most_balanced'],
             f"M: {balance_value:.1f}% | F: {(100-balance_value):.1f}%"
         )
         
     with col7:
-        largest_gap_idx = abs(df['_2020_MALE'] - df['_2020_FEMALE']).idxmax()
-        largest_gap_country = df.loc[largest_gap_idx, 'COUNTRY_OF_NATIONALITY']
-        gap_size = abs(df.loc[largest_gap_idx, '_2020_MALE'] - df.loc[largest_gap_idx, '_2020_FEMALE'])
         st.metric(
             "Largest Gender Gap", 
-            largest_gap_country,
-            f"{gap_size:.1f}% difference"
-        )
\ No newline at end of file
+            insights['largest_gap_country'],
+            f"{insights['gap_size']:.1f}% difference"
+        )
+
+@fragment
+def render_country_pie(df):
+    """Enhanced pie chart with country selector (reruns on its own as a fragment)"""
+    with timed_render("gender_pie_fragment"):
+        selected_country = st.selectbox(
+            "📍 Select Country for Gender Distribution",
+            df['COUNTRY_OF_NATIONALITY'].tolist()
+        )
+        
+        render_figure(
+            TABLE_NAME, PAGE_KEY, 'country_pie',
+            lambda: build_country_pie(df, selected_country),
+            params=(selected_country,),
+            version=data_version(df)
+        )
+
+def build_country_pie(df, selected_country):
+    """Pie chart of one country's 2020 gender split"""
+    country_data = df[df['COUNTRY_OF_NATIONALITY'] == selected_country]
+    gender_values = [
+        country_data['_2020_MALE'].iloc[0],
+        country_data['_2020_FEMALE'].iloc[0]
+    ]
+    
+    fig_pie = px.pie(
+        values=gender_values,
+        names=['Male', 'Female'],
+        title=f'Gender Distribution in {selected_country} (2020)',
+        color_discrete_sequence=['#2E86C1', '#D35400'],
+        hole=0.4
+    )
+    fig_pie.update_layout(
+        height=500,
+        title_x=0.5,
+        title_font_size=20,
+        showlegend=True
+    )
+    return fig_pie
@@ -0,0 +1,73 @@
+import pandas as pd
+
+# Key column identifying a row in each table, used to match local snapshot rows
+# against the warehouse when syncing incrementally
+TABLE_KEYS = {
+    "COUNTRYWISEYEARLYVISITORS": "COUNTRY",
+    "COUNTRYWISEGENDER": "COUNTRY_OF_NATIONALITY",
+    "INDIAFAMOUSTOURISTPLACES": "NAME",
+    "TOPPLACESTOVISIT": "NAME",
+}
+
+# Name of the per-row hash column returned with synced rows
+ROW_HASH_COLUMN = "__ROW_HASH"
+
+# Above this share of changed rows a full reload is cheaper than a keyed fetch
+MAX_CHANGED_FRACTION = 0.5
+
+
+def keys_are_unique(frame, key):
+    """Whether a key column identifies rows unambiguously (required for merging)"""
+    return frame[key].notna().all() and frame[key].is_unique
+
+
+def diff_row_hashes(local_hashes, remote_hashes, key):
+    """Compare (key, row hash) frames; returns (inserted, updated, deleted) key lists"""
+    local = local_hashes.set_index(key)[ROW_HASH_COLUMN]
+    remote = remote_hashes.set_index(key)[ROW_HASH_COLUMN]
+    inserted = remote.index.difference(local.index)
+    deleted = local.index.difference(remote.index)
+    common = remote.index.intersection(local.index)
+    updated = common[remote.loc[common].to_numpy() != local.loc[common].to_numpy()]
+    return list(inserted), list(updated), list(deleted)
+
+
+def column_changes(local_columns, remote_columns):
+    """Columns added to and removed from the warehouse table since the snapshot"""
+    added = [col for col in remote_columns if col not in local_columns]
+    removed = [col for col in local_columns if col not in remote_columns]
+    return added, removed
+
+
+def merge_changes(df, key, changed_rows=None, deleted_keys=(), added_columns=None):
+    """Merge a sync into a snapshot frame
+
+    changed_rows replaces rows with the same key in place and appends new
+    keys; deleted_keys are dropped; added_columns is a (key + new columns)
+    frame joined onto every row. Column order follows the snapshot, with new
+    columns appended.
+    """
+    # Work on plain values so changed rows can bring new category values;
+    # the caller re-applies the table schema afterwards
+    merged = df.astype({col: object for col, dtype in df.dtypes.items()
+                        if isinstance(dtype, pd.CategoricalDtype)})
+    if added_columns is not None and len(added_columns.columns) > 1:
+        new_columns = [col for col in added_columns.columns if col != key]
+        merged = merged.drop(columns=[col for col in new_columns if col in merged.columns])
+        merged = merged.merge(added_columns, on=key, how="left")
+    if len(deleted_keys):
+        merged = merged[~merged[key].isin(list(deleted_keys))].copy()
+    if changed_rows is not None and not changed_rows.empty:
+        merged = merged.reset_index(drop=True)
+        changed = changed_rows.set_index(key)
+        is_update = merged[key].isin(changed.index)
+        updated = changed.loc[merged.loc[is_update, key]].reset_index()
+        updated.index = merged.index[is_update]
+        inserted = changed.loc[~changed.index.isin(merged[key])].reset_index()
+        # Updated rows are swapped in whole rather than assigned into the snapshot's
+        # compact columns, which may not hold the warehouse's wider values;
+        # sorting by the old positions keeps them where they were
+        merged = pd.concat([merged[~is_update], updated]).sort_index(kind="stable")
+        merged = pd.concat([merged, inserted], ignore_index=True)
+    columns = list(df.columns) + [col for col in merged.columns if col not in df.columns]
+    return merged[columns].reset_index(drop=True)
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+# Keyset-paginated browsing over the place tables. Every sort column has a
+# precomputed order (ties broken by NAME, missing values last) and its inverse,
+# so the page after a cursor starts at a known position instead of a scan. A
+# cursor is the (sort value, NAME) of the last row shown, the same key
+# config.build_page_query uses to continue the listing in Snowflake.
+
+# Sort choices offered by the browser: {label: column}
+SORT_COLUMNS = {
+    'Rating': 'GOOGLE_REVIEW_RATING',
+    'Reviews': 'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
+    'Entrance fee': 'ENTRANCE_FEE_IN_INR'
+}
+
+# Unique key of a place, used for tie-breaking and detail lookups
+KEY_COLUMN = 'NAME'
+
+# Rows per page
+PAGE_SIZE = 20
+
+
+def _sort_key(values, descending):
+    """Numeric sort key with missing values last in either direction"""
+    key = -values if descending else values.copy()
+    key[np.isnan(key)] = np.inf
+    return key
+
+
+class StaleCursorError(LookupError):
+    """Raised when a page cursor's place is no longer in the indexed rows"""
+
+
+class PlaceBrowserIndex:
+    """NAME -> row lookup and keyset pagination over a place frame
+
+    Results are row positions in the indexed frame.
+    """
+
+    def __init__(self, df, sort_columns=None):
+        names = df[KEY_COLUMN].astype(str).to_numpy()
+        # First row of each name (NAME is the table key, duplicates are not expected)
+        self.name_rows = {}
+        for position, name in enumerate(names):
+            self.name_rows.setdefault(name, position)
+        name_ranks = np.empty(len(names), dtype='int64')
+        name_ranks[np.argsort(names, kind='stable')] = np.arange(len(names))
+
+        self.orders = {}
+        self.ranks = {}
+        for column in (sort_columns or SORT_COLUMNS.values()):
+            values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64')
+            for descending in (False, True):
+                order = np.lexsort((name_ranks, _sort_key(values, descending)))
+                ranks = np.empty(len(order), dtype='int64')
+                ranks[order] = np.arange(len(order))
+                self.orders[column, descending] = order
+                self.ranks[column, descending] = ranks
+        self.row_count = len(df)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the orders and the name lookup"""
+        arrays = list(self.orders.values()) + list(self.ranks.values())
+        return sum(array.nbytes for array in arrays) + 100 * len(self.name_rows)
+
+    def row_of(self, name):
+        """Row position of a place by NAME, or None"""
+        return self.name_rows.get(name)
+
+    def page(self, sort_column, descending=True, after=None, mask=None, page_size=PAGE_SIZE):
+        """Row positions of the page after a cursor, and whether more rows follow
+
+        mask is an optional boolean array over rows (e.g. search and filter
+        matches); rows outside it are skipped. The work done is proportional
+        to the rows scanned to fill the page, not to the table size. Raises
+        StaleCursorError if the cursor's place is gone (the data changed since
+        the cursor was handed out).
+        """
+        order = self.orders[sort_column, descending]
+        start = 0
+        if after is not None:
+            row = self.row_of(str(after[KEY_COLUMN]))
+            if row is None:
+                raise StaleCursorError(f"Place {after[KEY_COLUMN]!r} is no longer listed")
+            start = self.ranks[sort_column, descending][row] + 1
+        wanted = page_size + 1
+        taken, found, chunk = [], 0, max(4 * wanted, 256)
+        while start < len(order) and found < wanted:
+            block = order[start:start + chunk]
+            start += chunk
+            if mask is not None:
+                block = block[mask[block]]
+            taken.append(block)
+            found += len(block)
+            # Sparse masks need larger steps to fill a page
+            chunk *= 2
+        rows = np.concatenate(taken) if taken else np.array([], dtype='int64')
+        return rows[:page_size], len(rows) > page_size
@@ -0,0 +1,257 @@
+import hashlib
+import io
+import json
+import itertools
+import os
+import queue
+import threading
+import time
+import urllib.request
+from collections import Counter
+from concurrent.futures import Future
+
+
+def image_key(url, width):
+    """Cache key of an image URL at a display width"""
+    return hashlib.sha256(f"{width}|{url}".encode("utf-8")).hexdigest()
+
+
+def make_thumbnail(data, width, quality=85):
+    """Downscale encoded image bytes to at most width pixels wide; returns (bytes, extension)
+
+    Images with transparency are kept as PNG, everything else becomes JPEG.
+    Raises ValueError if the bytes are not a readable image.
+    """
+    # Imported on the first download rather than with config, to keep app start-up light
+    try:
+        from PIL import Image
+    except ImportError:
+        # Pillow comes with Streamlit; without it images are cached at their original size
+        return data, "img"
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception as e:
+        raise ValueError(f"Not a readable image: {e}")
+    if image.width > width:
+        image.thumbnail((width, max(1, image.height * width // image.width)))
+    out = io.BytesIO()
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image.save(out, format="PNG", optimize=True)
+        return out.getvalue(), "png"
+    image.convert("RGB").save(out, format="JPEG", quality=quality, optimize=True)
+    return out.getvalue(), "jpg"
+
+
+class ImageCache:
+    """Display-sized thumbnails of remote images in a content-addressed disk cache
+
+    Downloads run on max_workers threads and concurrent requests for the
+    same image share one download. Images someone is waiting for (get) are
+    downloaded before prefetched ones, even if they were queued by an
+    earlier prefetch. Thumbnails are stored once per content
+    hash (blobs/<hash[:2]>/<hash>.<ext>); index.json maps each (URL, width)
+    key to its blob, size and last use. When the blobs outgrow max_bytes the
+    least recently used keys are dropped, along with blobs nothing refers to.
+    Failed downloads are not retried for failure_ttl seconds.
+    """
+
+    INDEX_FILE = "index.json"
+
+    # Download queue priorities (lower runs first)
+    PRIORITY_GET = 0
+    PRIORITY_PREFETCH = 1
+
+    def __init__(self, directory, max_bytes, width=640, max_workers=4, timeout=10.0,
+                 max_download_bytes=20 * 1024 * 1024, failure_ttl=300.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.width = width
+        self.timeout = timeout
+        self.max_download_bytes = max_download_bytes
+        self.failure_ttl = failure_ttl
+        self._lock = threading.Lock()
+        # Pending downloads: (priority, sequence, key, url); a key may be queued
+        # again at a higher priority, later copies are skipped
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._inflight = {}
+        self._priorities = {}
+        self._started = set()
+        self._failures = {}
+        self._index = self._load_index()
+        self._stats = {"hits": 0, "misses": 0, "downloads": 0, "failures": 0, "evictions": 0,
+                       "downloaded_bytes": 0}
+        for number in range(max_workers):
+            threading.Thread(target=self._work, name=f"images-{number}", daemon=True).start()
+
+    def _path(self, *parts):
+        return os.path.join(self.directory, *parts)
+
+    def _blob_path(self, blob):
+        return self._path("blobs", blob[:2], blob)
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _load_index(self):
+        try:
+            with open(self._path(self.INDEX_FILE), encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        # Drop entries whose blob has gone missing
+        return {key: entry for key, entry in index.items() if os.path.exists(self._blob_path(entry["blob"]))}
+
+    def _save_index(self):
+        data = json.dumps(self._index, sort_keys=True).encode("utf-8")
+        self._write_atomic(self._path(self.INDEX_FILE), data)
+
+    def _blob_sizes(self):
+        return {entry["blob"]: entry["bytes"] for entry in self._index.values()}
+
+    def _evict(self):
+        """Drop least recently used keys until the blobs fit in max_bytes (lock held)"""
+        sizes = self._blob_sizes()
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        references = Counter(entry["blob"] for entry in self._index.values())
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            del self._index[key]
+            self._stats["evictions"] += 1
+            references[entry["blob"]] -= 1
+            if references[entry["blob"]] == 0:
+                total -= sizes[entry["blob"]]
+                try:
+                    os.remove(self._blob_path(entry["blob"]))
+                except FileNotFoundError:
+                    pass
+
+    def _lookup(self, key):
+        """Blob of a cached key, marked as just used, or None (lock held)"""
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        entry["last_used"] = time.time()
+        return entry["blob"]
+
+    def _read_blob(self, blob):
+        """Bytes of a stored thumbnail, or None if it has been removed"""
+        try:
+            with open(self._blob_path(blob), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _download(self, url):
+        if not str(url).lower().startswith(("http://", "https://")):
+            raise ValueError(f"Unsupported image URL: {url!r}")
+        request = urllib.request.Request(url, headers={"User-Agent": "tourism-explorer/1.0"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            data = response.read(self.max_download_bytes + 1)
+        if len(data) > self.max_download_bytes:
+            raise ValueError(f"Image larger than {self.max_download_bytes} bytes")
+        return data
+
+    def _fetch(self, key, url):
+        """Download, resize and store one image; returns the thumbnail bytes or None"""
+        try:
+            data = self._download(url)
+            thumbnail, extension = make_thumbnail(data, self.width)
+        except Exception:
+            with self._lock:
+                self._stats["failures"] += 1
+                self._failures[key] = time.time()
+            return None
+        blob = f"{hashlib.sha256(thumbnail).hexdigest()}.{extension}"
+        if not os.path.exists(self._blob_path(blob)):
+            self._write_atomic(self._blob_path(blob), thumbnail)
+        with self._lock:
+            self._index[key] = {"blob": blob, "bytes": len(thumbnail), "url": url, "last_used": time.time()}
+            self._stats["downloads"] += 1
+            self._stats["downloaded_bytes"] += len(data)
+            self._evict()
+            self._save_index()
+        return thumbnail
+
+    def _work(self):
+        """Download thread: run queued downloads, most urgent first"""
+        while True:
+            _, _, key, url = self._queue.get()
+            with self._lock:
+                future = self._inflight.get(key)
+                if future is None or key in self._started:
+                    # Already downloaded through a copy queued at another priority
+                    continue
+                self._started.add(key)
+            thumbnail = None
+            try:
+                thumbnail = self._fetch(key, url)
+            except Exception:
+                # e.g. the disk is full; the image is shown from its URL instead
+                pass
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                    self._priorities.pop(key, None)
+                    self._started.discard(key)
+                future.set_result(thumbnail)
+
+    def _submit(self, key, url, priority):
+        """Future of the (possibly shared) download of an uncached image, or None (lock held)"""
+        failed_at = self._failures.get(key)
+        if failed_at is not None and time.time() - failed_at < self.failure_ttl:
+            return None
+        future = self._inflight.get(key)
+        if future is None:
+            future = Future()
+            self._inflight[key] = future
+        if priority < self._priorities.get(key, priority + 1) and key not in self._started:
+            self._priorities[key] = priority
+            self._queue.put((priority, next(self._sequence), key, url))
+        return future
+
+    def get(self, url):
+        """Thumbnail bytes of an image, downloading it if needed; None if it cannot be fetched"""
+        key = image_key(url, self.width)
+        with self._lock:
+            blob = self._lookup(key)
+        if blob is not None:
+            # Read outside the lock so other requests are not held up by disk I/O
+            data = self._read_blob(blob)
+            with self._lock:
+                if data is not None:
+                    self._stats["hits"] += 1
+                    return data
+                # Evicted since the lookup
+                if self._index.get(key, {}).get("blob") == blob:
+                    del self._index[key]
+        with self._lock:
+            self._stats["misses"] += 1
+            future = self._submit(key, url, self.PRIORITY_GET)
+        return future.result() if future is not None else None
+
+    def prefetch(self, urls):
+        """Queue downloads of images that are not cached yet, behind any get(), without waiting"""
+        with self._lock:
+            for url in urls:
+                key = image_key(url, self.width)
+                if self._lookup(key) is None:
+                    self._submit(key, url, self.PRIORITY_PREFETCH)
+
+    def stats(self):
+        """Hit/miss/download counters, entries and bytes on disk"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._index)
+            stats["blobs"] = len(self._blob_sizes())
+            stats["bytes"] = sum(self._blob_sizes().values())
+            stats["downloading"] = len(self._inflight)
+        return stats
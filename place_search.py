@@ -0,0 +1,299 @@
+import re
+import unicodedata
+from bisect import bisect_left
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+# Search-as-you-type index over the place tables. Text is normalized (accents
+# stripped, lower-cased, punctuation treated as spaces) and split into tokens.
+# Every query word must match a token of the row in some field: exactly, as a
+# prefix of a token, or (with fuzzy matching) by trigram similarity. Rows are
+# ranked by the sum over query words of field weight x match quality.
+
+# Relative weight of a match in each indexed field
+FIELD_WEIGHTS = {'NAME': 3.0, 'CITY': 2.0, 'STATE': 1.5, 'TYPE': 1.0}
+
+# Match quality of an exact token, a token prefix and (scaled by similarity) a fuzzy match
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.7
+FUZZY_MATCH = 0.5
+
+# Minimum trigram Jaccard similarity for a fuzzy token match
+MIN_FUZZY_SIMILARITY = 0.4
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_text(text):
+    """Lower-case text without accents, with anything but letters and digits turned into spaces"""
+    text = str(text)
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(' ', text.lower()).strip()
+
+
+def tokenize(text):
+    """Normalized words of a text"""
+    return normalize_text(text).split()
+
+
+def trigrams(token):
+    """Character trigrams of a token, padded so short tokens and word edges count"""
+    padded = f"^{token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# A word or a value break in the joined text of a column's values
+_WORD_OR_BREAK = re.compile(r'[0-9a-z]+|\n')
+
+
+def _value_tokens(values):
+    """Words of each distinct value of a column: (value code of each word, words)
+
+    The values are joined into one text and split by a single regex pass;
+    only non-ASCII values go through normalize_text one by one.
+    """
+    texts = [str(value).replace('\n', ' ') for value in values]
+    joined = '\n'.join(texts)
+    if not joined.isascii():
+        joined = '\n'.join(text if text.isascii() else normalize_text(text) for text in texts)
+    parts = np.array(_WORD_OR_BREAK.findall(joined.lower()), dtype=object)
+    breaks = parts == '\n'
+    return np.cumsum(breaks)[~breaks], parts[~breaks]
+
+
+def _trigram_code(gram):
+    """Integer code of a three-character ASCII trigram"""
+    return int.from_bytes(gram.encode('ascii'), 'big')
+
+
+def _trigram_index(vocab):
+    """Trigram sets of the vocabulary as CSR arrays: (trigrams per token, sorted codes, offsets, token ids)"""
+    if not vocab:
+        empty = np.zeros(0, dtype='int32')
+        return empty, empty.astype('int64'), np.zeros(1, dtype='int64'), empty
+    # Every three-byte window of "^token$" lines that does not cross a line break
+    text = np.frombuffer(('^' + '$\n^'.join(vocab) + '$').encode('ascii'), dtype=np.uint8)
+    breaks = text == ord('\n')
+    windows = np.flatnonzero(~(breaks[:-2] | breaks[1:-1] | breaks[2:]))
+    grams = (text[windows].astype('int64') << 16) | (text[windows + 1].astype('int64') << 8) | text[windows + 2]
+    # One entry per (token, trigram), like trigrams() sets
+    pairs = _sorted_unique(np.cumsum(breaks)[windows] << 24 | grams)
+    token_ids, grams = pairs >> 24, pairs & 0xFFFFFF
+    codes = _sorted_unique(grams)
+    order, offsets = _group(np.searchsorted(codes, grams), len(codes))
+    counts = np.bincount(token_ids, minlength=len(vocab)).astype('int32')
+    return counts, codes, offsets, token_ids[order].astype('int32')
+
+
+def _ranges(starts, lengths):
+    """Positions starts[i]:starts[i] + lengths[i] of every range, back to back"""
+    total = int(lengths.sum())
+    shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return shifts + np.arange(total, dtype=shifts.dtype)
+
+
+def _sorted_unique(values):
+    """Sorted distinct values (a sort and a neighbour compare, cheaper than np.unique on large arrays)"""
+    values = np.sort(values)
+    return values[np.r_[True, values[1:] != values[:-1]][:len(values)]]
+
+
+def _group(codes, count):
+    """Positions of codes grouped by code (stable) and each code's bounds in them"""
+    order = np.argsort(codes, kind='stable')
+    return order, np.searchsorted(codes[order], np.arange(count + 1))
+
+
+def _top(rows, scores, limit):
+    """Rows by score, best first (ties in row order), cut to limit; rows must be ascending"""
+    if limit is not None and limit < len(rows):
+        # Keep the limit best (the earliest rows among those tied at the cut) before sorting
+        kth = np.partition(scores, len(rows) - limit)[len(rows) - limit]
+        better = np.flatnonzero(scores > kth)
+        tied = np.flatnonzero(scores == kth)[:limit - len(better)]
+        keep = np.sort(np.concatenate([better, tied]))
+        rows, scores = rows[keep], scores[keep]
+    return rows[np.lexsort((rows, -scores))]
+
+
+class PlaceSearchIndex:
+    """Inverted token index with prefix and trigram lookup over a place table
+
+    Postings are row positions grouped by field, then token id, then row;
+    the vocabulary is sorted, so a prefix maps to one contiguous run of
+    postings per field. A forward index (each row's tokens and field weights)
+    scores the rows matching multi-word queries. Results are row positions
+    in the indexed frame.
+    """
+
+    def __init__(self, df, fields=None):
+        self.fields = [field for field in (fields or FIELD_WEIGHTS) if field in df.columns]
+        self.field_weights = np.array([FIELD_WEIGHTS.get(field, 1.0) for field in self.fields], dtype='float32')
+        self.row_count = n = len(df)
+
+        # Tokenize each distinct value once: (value code, token) pairs per field
+        field_codes, field_pairs = [], []
+        for field in self.fields:
+            codes, values = pd.factorize(df[field])
+            field_codes.append(codes)
+            field_pairs.append(_value_tokens(values))
+        self.vocab = sorted(set(chain.from_iterable(tokens for _, tokens in field_pairs)))
+        vocabulary = pd.Index(self.vocab)
+
+        # Fan each pair out to the rows holding its value, sorted by (token, row) within the field
+        rows, tokens, offsets = [], [], []
+        for codes, (pair_values, pair_tokens) in zip(field_codes, field_pairs):
+            value_rows, bounds = _group(codes, int(codes.max(initial=-1)) + 1)
+            pair_counts = np.diff(bounds)[pair_values]
+            keys = (vocabulary.get_indexer(pair_tokens).repeat(pair_counts) * max(n, 1)
+                    + value_rows[_ranges(bounds[pair_values], pair_counts)])
+            # A value repeating a word yields the same posting twice
+            field_tokens, field_rows = np.divmod(_sorted_unique(keys), max(n, 1))
+            offsets.append(sum(map(len, rows)) + np.searchsorted(field_tokens, np.arange(len(self.vocab) + 1)))
+            rows.append(field_rows)
+            tokens.append(field_tokens)
+        self.rows = np.concatenate(rows or [np.zeros(0, 'int64')]).astype('int32')
+        self.offsets = np.array(offsets, dtype='int64').reshape(len(self.fields), len(self.vocab) + 1)
+
+        # Forward index: each row's postings, with the field weight of each
+        forward, self.row_offsets = _group(self.rows, n)
+        self.row_tokens = np.concatenate(tokens or [np.zeros(0, 'int64')]).astype('int32')[forward]
+        self.row_weights = self.field_weights.repeat(list(map(len, rows)))[forward]
+
+        # Trigram -> token ids, as CSR arrays over the sorted trigram codes
+        self.trigram_counts, self.trigram_codes, self.trigram_offsets, self.trigram_tokens = _trigram_index(self.vocab)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the index arrays and vocabularies"""
+        arrays = (self.rows, self.offsets, self.row_offsets, self.row_tokens, self.row_weights,
+                  self.trigram_counts, self.trigram_codes, self.trigram_offsets, self.trigram_tokens)
+        return sum(array.nbytes for array in arrays) + sum(len(token) + 49 for token in self.vocab)
+
+    def _match_term(self, term, fuzzy):
+        """Token ids (ascending) matching a query word, with their match quality"""
+        start = bisect_left(self.vocab, term)
+        end = bisect_left(self.vocab, term + '\uffff', lo=start)
+        token_ids = np.arange(start, end)
+        quality = np.full(len(token_ids), PREFIX_MATCH)
+        if len(token_ids) and self.vocab[start] == term:
+            quality[0] = EXACT_MATCH
+        if fuzzy and not len(token_ids):
+            grams = trigrams(term)
+            codes = np.array([_trigram_code(gram) for gram in grams])
+            ids = np.searchsorted(self.trigram_codes, codes)
+            ids = ids[(ids < len(self.trigram_codes)) & (self.trigram_codes[np.minimum(ids, len(self.trigram_codes) - 1)] == codes)]
+            if len(ids):
+                candidates = self.trigram_tokens[_ranges(self.trigram_offsets[ids], self.trigram_offsets[ids + 1] - self.trigram_offsets[ids])]
+                shared = np.bincount(candidates, minlength=len(self.vocab))
+                union = self.trigram_counts + len(grams) - shared
+                similarity = np.where(union > 0, shared / np.maximum(union, 1), 0.0)
+                token_ids = np.flatnonzero(similarity >= MIN_FUZZY_SIMILARITY)
+                quality = FUZZY_MATCH * similarity[token_ids]
+        return token_ids, quality
+
+    def _postings(self, token_ids):
+        """Start and length of every (field, token) posting list of the token ids"""
+        starts = self.offsets[:, token_ids]
+        return starts.ravel(), (self.offsets[:, token_ids + 1] - starts).ravel()
+
+    def _term_mask(self, token_ids, allowed):
+        """Boolean mask of rows holding any of the token ids"""
+        mask = np.zeros(self.row_count, dtype=bool)
+        if len(token_ids) and np.all(np.diff(token_ids) == 1):
+            # A prefix is one contiguous run of postings per field
+            for start, end in self.offsets[:, [token_ids[0], token_ids[-1] + 1]]:
+                mask[self.rows[start:end]] = True
+        elif len(token_ids):
+            mask[self.rows[_ranges(*self._postings(token_ids))]] = True
+        return mask & allowed if allowed is not None else mask
+
+    def _score(self, rows, terms):
+        """Sum over terms of each row's best field weight x match quality (rows must hold every term)"""
+        starts = self.row_offsets[rows]
+        lengths = self.row_offsets[rows + 1] - starts
+        entries = _ranges(starts, lengths)
+        tokens, weights = self.row_tokens[entries], self.row_weights[entries].astype('float64')
+        segments = np.cumsum(lengths) - lengths
+        total = np.zeros(len(rows))
+        for token_ids, quality in terms:
+            position = np.minimum(np.searchsorted(token_ids, tokens), len(token_ids) - 1)
+            value = np.where(token_ids[position] == tokens, weights * quality[position], 0.0)
+            total += np.maximum.reduceat(value, segments)
+        return total
+
+    def _tier_top(self, token_ids, quality, limit, allowed):
+        """The limit best rows of a single non-fuzzy query word, without visiting every posting
+
+        Each (field, match quality) pair is a tier with one score; tiers are
+        taken best first and each one's earliest rows are merged from the
+        heads of its posting lists until enough rows are known to rank first.
+        """
+        tiers = {}
+        for field, weight in enumerate(self.field_weights):
+            for quality_value in np.unique(quality):
+                ids = token_ids[quality == quality_value]
+                score = float(np.float64(weight) * quality_value)
+                tiers.setdefault(score, []).append((self.offsets[field, ids], self.offsets[field, ids + 1]))
+        found = []
+        taken = np.zeros(0, dtype='int64')
+        for score in sorted(tiers, reverse=True):
+            starts = np.concatenate([starts for starts, _ in tiers[score]])
+            lengths = np.concatenate([ends for _, ends in tiers[score]]) - starts
+            starts, lengths = starts[lengths > 0], lengths[lengths > 0]
+            need = limit - len(taken)
+            head = limit
+            while True:
+                heads = np.minimum(lengths, head)
+                rows = np.unique(self.rows[_ranges(starts, heads)])
+                cut = lengths > head
+                if cut.any():
+                    # Unseen rows come after the last row read from every cut list
+                    rows = rows[rows <= self.rows[starts[cut] + head - 1].min()]
+                if allowed is not None:
+                    rows = rows[allowed[rows]]
+                rows = rows[~np.isin(rows, taken, assume_unique=True)]
+                if len(rows) >= need or not cut.any():
+                    break
+                head *= 4
+            rows = rows[:need]
+            found.append(rows)
+            taken = np.union1d(taken, rows)
+            if len(taken) >= limit:
+                break
+        return np.concatenate(found) if found else taken
+
+    def match_mask(self, text, fuzzy=False, allowed=None):
+        """Boolean mask of rows matching every word of text (within allowed), or None for a query without words"""
+        terms = list(dict.fromkeys(tokenize(text)))
+        if not terms:
+            return None
+        mask = allowed
+        for term in terms:
+            mask = self._term_mask(self._match_term(term, fuzzy)[0], mask)
+        return mask
+
+    def search(self, text, limit=None, fuzzy=False, allowed=None):
+        """Row positions matching every word of text, best match first
+
+        Returns None for a query without words (no text filter). Ties keep
+        table order. allowed is an optional boolean mask of rows that may be
+        returned; limit cuts the ranking to its first rows.
+        """
+        terms = [self._match_term(term, fuzzy) for term in dict.fromkeys(tokenize(text))]
+        if not terms:
+            return None
+        if any(not len(token_ids) for token_ids, _ in terms):
+            return np.array([], dtype='int64')
+        if limit is not None and len(terms) == 1 and np.all(np.diff(terms[0][0]) == 1):
+            return self._tier_top(*terms[0], limit, allowed).astype('int64')
+        # Rows holding every word, scored from the forward index
+        mask = allowed
+        for token_ids, _ in terms:
+            mask = self._term_mask(token_ids, mask)
+        rows = np.flatnonzero(mask)
+        return _top(rows, self._score(rows, terms), limit)
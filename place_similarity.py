@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+
+# Nearest-neighbour "similar places" over normalized feature vectors. Numeric
+# columns are z-scored (missing values sit at the mean) and categorical columns
+# are one-hot encoded, so the squared distance between two places adds up the
+# standardized numeric gaps and a fixed penalty per differing category.
+
+# Numeric features and whether they are log-scaled first (fees are heavily skewed)
+NUMERIC_FEATURES = {
+    'GOOGLE_REVIEW_RATING': False,
+    'ENTRANCE_FEE_IN_INR': True,
+    'TIME_NEEDED_TO_VISIT_IN_HRS': False
+}
+
+# Categorical features and the distance between two places that differ in them
+CATEGORY_WEIGHTS = {'TYPE': 1.5, 'ZONE': 0.5, 'BEST_TIME_TO_VISIT': 0.5}
+
+# Where neighbours may come from: anywhere, or places sharing the place's zone or state
+SCOPES = ('all', 'ZONE', 'STATE')
+
+# Distance matrix cells computed per batch (bounds peak memory at ~64 MB of float32)
+BATCH_CELLS = 1 << 24
+
+# Fewest distance cells a search computes per step (smaller penalty levels are visited together)
+MIN_CELLS = 1 << 14
+
+
+def feature_matrix(df):
+    """Float32 feature vectors of a place frame (one row per place)"""
+    blocks = []
+    for column, log_scale in NUMERIC_FEATURES.items():
+        if column not in df.columns:
+            continue
+        values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype='float64')
+        if log_scale:
+            values = np.log1p(np.clip(values, 0, None))
+        std = np.nanstd(values) if np.isfinite(values).any() else 0.0
+        scaled = (values - np.nanmean(values)) / std if std > 0 else np.zeros(len(values))
+        blocks.append(np.nan_to_num(scaled, nan=0.0)[:, None])
+    for column, weight in CATEGORY_WEIGHTS.items():
+        if column not in df.columns:
+            continue
+        codes, categories = pd.factorize(df[column])
+        one_hot = np.zeros((len(df), len(categories)))
+        known = codes >= 0
+        # Two places in different categories differ in two cells: weight^2 in total
+        one_hot[np.flatnonzero(known), codes[known]] = weight / np.sqrt(2)
+        blocks.append(one_hot)
+    if not blocks:
+        return np.zeros((len(df), 0), dtype='float32')
+    return np.hstack(blocks).astype('float32')
+
+
+def _merge_nearest(rows, squared, candidate_positions, distance, k):
+    """Fold a batch's distances to some candidates into its current k nearest (rows, squared), nearest first"""
+    take = min(k, distance.shape[1])
+    if take < distance.shape[1]:
+        best = np.argpartition(distance, take - 1, axis=1)[:, :take]
+    else:
+        best = np.broadcast_to(np.arange(take), distance.shape)
+    rows = np.hstack([rows, candidate_positions[best]])
+    squared = np.hstack([squared, np.take_along_axis(distance, best, axis=1)])
+    order = np.argsort(squared, axis=1, kind='stable')[:, :k]
+    return np.take_along_axis(rows, order, axis=1), np.take_along_axis(squared, order, axis=1)
+
+
+class SimilarPlacesIndex:
+    """Top-k most similar places per place, anywhere or within its zone or state
+
+    Places are grouped by their combination of categories (plus zone and
+    state, which scope the search) and their feature vectors stored in
+    combination order, so every combination is one contiguous block. Two
+    combinations are at least a fixed category penalty apart; a search visits
+    blocks in increasing penalty and stops once no farther block can beat the
+    k neighbours found, which keeps the precomputed lists exact without
+    comparing every pair of places. Neighbour lists for every place and scope
+    are computed combination by combination in batches; a larger k is
+    answered by the same search for one place. Results are row positions in
+    the indexed frame.
+    """
+
+    def __init__(self, df, k=10):
+        self.k = k
+        key_columns = [column for column in CATEGORY_WEIGHTS if column in df.columns]
+        key_columns += [scope for scope in SCOPES[1:] if scope in df.columns and scope not in key_columns]
+        # Squared distance between two places differing in a key column (scopes that are not features add none)
+        self.key_weights = np.array([CATEGORY_WEIGHTS.get(column, 0.0) ** 2 for column in key_columns])
+        self.scope_columns = {scope: key_columns.index(scope) for scope in SCOPES[1:] if scope in key_columns}
+        codes = np.stack([pd.factorize(df[column])[0] for column in key_columns], axis=1) if key_columns \
+            else np.zeros((len(df), 0), dtype='int64')
+        if len(df):
+            self.combos, combo_ids = np.unique(codes, axis=0, return_inverse=True)
+            combo_ids = combo_ids.ravel()
+        else:
+            self.combos, combo_ids = codes[:0], np.zeros(0, dtype='int64')
+
+        # Rows in combination order: order[i] is the row at position i, position[row] its inverse
+        self.order = np.argsort(combo_ids, kind='stable')
+        self.position = np.empty(len(df), dtype='int64')
+        self.position[self.order] = np.arange(len(df))
+        self.combo_bounds = np.searchsorted(combo_ids[self.order], np.arange(len(self.combos) + 1))
+        self.features = feature_matrix(df)[self.order]
+        self.norms = np.einsum('ij,ij->i', self.features, self.features)
+
+        self.neighbours = {}
+        for scope in SCOPES:
+            if scope == 'all' or scope in self.scope_columns:
+                self.neighbours[scope] = self._precompute(scope)
+
+    def _penalties(self, combo, scope):
+        """Category part of the squared distance from a combination to each one in the scope (inf outside it)"""
+        codes = self.combos[combo]
+        differ = self.combos != codes
+        # A missing category (code -1) is half as far from any category as two categories are
+        one_missing = differ & ((self.combos < 0) | (codes < 0))
+        penalties = np.where(one_missing, 0.5, differ.astype('float64')) @ self.key_weights
+        if scope != 'all':
+            column = self.scope_columns[scope]
+            penalties[self.combos[:, column] != codes[column]] = np.inf
+        return penalties
+
+    def _block_positions(self, combos):
+        """Rows of some combinations: (index into the features, their positions)
+
+        Adjacent combinations are one slice, so their features are a view.
+        """
+        starts, ends = self.combo_bounds[combos], self.combo_bounds[combos + 1]
+        if np.all(starts[1:] == ends[:-1]):
+            return slice(starts[0], ends[-1]), np.arange(starts[0], ends[-1])
+        lengths = ends - starts
+        # Each block's start, shifted by the rows before it, plus a running count
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return positions, positions
+
+    def _search(self, combo, positions, k, scope):
+        """k nearest positions of query positions (all in one combination) other than themselves
+
+        Returns (positions, squared distances), nearest first, padded with
+        -1/inf. Blocks of the scope are visited by increasing penalty while
+        some query's k-th best is still farther than that penalty; penalty
+        levels with few rows are visited together (MIN_CELLS).
+        """
+        rows = np.full((len(positions), k), -1, dtype='int64')
+        squared = np.full((len(positions), k), np.inf, dtype='float32')
+        if k <= 0 or (scope != 'all' and self.combos[combo, self.scope_columns[scope]] < 0):
+            return rows, squared
+        penalties = self._penalties(combo, scope)
+        in_scope = np.flatnonzero(np.isfinite(penalties))
+        levels, level_of = np.unique(penalties[in_scope], return_inverse=True)
+        level_rows = np.bincount(level_of, weights=np.diff(self.combo_bounds)[in_scope])
+        first = 0
+        while first < len(levels):
+            active = np.flatnonzero(squared[:, -1] > levels[first])
+            if not len(active):
+                break
+            enough = np.searchsorted(np.cumsum(level_rows[first:]), MIN_CELLS // len(positions))
+            last = first + min(enough, len(levels) - 1 - first)
+            # Blocks stay in combination order, so adjacent ones are a single slice
+            visited = in_scope[(level_of >= first) & (level_of <= last)]
+            candidates, candidate_positions = self._block_positions(visited)
+            first = last + 1
+            candidate_features, candidate_norms = self.features[candidates], self.norms[candidates]
+            batch_size = max(1, BATCH_CELLS // len(candidate_positions))
+            for start in range(0, len(active), batch_size):
+                batch = active[start:start + batch_size]
+                query = positions[batch]
+                distance = self.norms[query][:, None] + candidate_norms[None, :] \
+                    - 2 * self.features[query] @ candidate_features.T
+                np.maximum(distance, 0, out=distance)
+                # A place is not its own neighbour
+                own = np.minimum(np.searchsorted(candidate_positions, query), len(candidate_positions) - 1)
+                is_candidate = candidate_positions[own] == query
+                distance[np.flatnonzero(is_candidate), own[is_candidate]] = np.inf
+                rows[batch], squared[batch] = _merge_nearest(rows[batch], squared[batch], candidate_positions,
+                                                             distance, k)
+        rows[~np.isfinite(squared)] = -1
+        return rows, squared
+
+    def _precompute(self, scope):
+        """Neighbour lists of every row in a scope, searched one combination at a time"""
+        rows = np.full((len(self.order), self.k), -1, dtype='int32')
+        distances = np.full((len(self.order), self.k), np.inf, dtype='float32')
+        for combo in range(len(self.combos)):
+            positions = np.arange(self.combo_bounds[combo], self.combo_bounds[combo + 1])
+            found, squared = self._search(combo, positions, self.k, scope)
+            targets = self.order[positions]
+            rows[targets] = np.where(found >= 0, self.order[found], -1)
+            distances[targets] = np.sqrt(squared)
+        return rows, distances
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the features and neighbour lists"""
+        arrays = [self.features, self.norms, self.order, self.position, self.combos, self.combo_bounds]
+        arrays += [array for pair in self.neighbours.values() for array in pair]
+        return sum(array.nbytes for array in arrays)
+
+    def similar(self, row, k=None, scope='all'):
+        """Rows of the k places most similar to a row and their distances, nearest first"""
+        k = k or self.k
+        if scope != 'all' and scope not in self.scope_columns:
+            raise ValueError(f"Unsupported similarity scope: {scope!r}")
+        if k <= self.k:
+            rows, distances = self.neighbours[scope][0][row, :k], self.neighbours[scope][1][row, :k]
+        else:
+            position = self.position[row]
+            combo = np.searchsorted(self.combo_bounds, position, side='right') - 1
+            found, squared = self._search(combo, np.array([position]), k, scope)
+            rows = np.where(found[0] >= 0, self.order[found[0]], -1)
+            distances = np.sqrt(squared[0])
+        found = rows >= 0
+        return rows[found].astype('int64'), distances[found]
@@ -0,0 +1,64 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TablePrefetcher:
+    """Loads dashboard tables on a bounded thread pool ahead of navigation
+
+    Each table is loaded by a loader callable that warms the shared result
+    cache. Foreground requests wait on an in-flight load of the same table
+    instead of issuing a second query.
+    """
+
+    def __init__(self, max_workers=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._report = {}
+        self._started = False
+
+    def start(self, loaders):
+        """Queue loads for {table_name: loader} once; later calls are no-ops"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for table_name, loader in loaders.items():
+            self.submit(table_name, loader)
+
+    def submit(self, table_name, loader):
+        """Start loading a table unless a load is already queued or running"""
+        with self._lock:
+            future = self._futures.get(table_name)
+            if future is not None and not future.done():
+                return future
+            self._report[table_name] = {"status": "queued", "seconds": None}
+            future = self._executor.submit(self._run, table_name, loader)
+            self._futures[table_name] = future
+            return future
+
+    def _update(self, table_name, **fields):
+        with self._lock:
+            self._report[table_name].update(fields)
+
+    def _run(self, table_name, loader):
+        self._update(table_name, status="loading")
+        start = time.perf_counter()
+        try:
+            status = "ready" if loader() is not None else "failed"
+        except Exception as e:
+            status = f"failed: {e}"
+        self._update(table_name, status=status, seconds=round(time.perf_counter() - start, 3))
+
+    def wait(self, table_name, timeout=None):
+        """Block until an in-flight load of the table finishes; returns immediately otherwise"""
+        with self._lock:
+            future = self._futures.get(table_name)
+        if future is not None and not future.done():
+            future.result(timeout)
+
+    def report(self):
+        """Per-table load status and latency in seconds"""
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._report.items()}
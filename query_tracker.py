@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCancelledError(Exception):
+    """Raised when a running query is cancelled because its session moved on"""
+
+
+class QueryTimeoutError(Exception):
+    """Raised when a query runs past its statement timeout and is cancelled"""
+
+
+class QueryTracker:
+    """Tracks running Snowflake queries by session so superseded ones can be cancelled
+
+    Every script run of a session gets a new generation number. A query is
+    started on behalf of an owner, {"session_id", "generation", "interrupted"},
+    and becomes stale once its session has started a newer run or its own run
+    was asked to stop (interrupted() returns True). The code polling a query
+    checks should_cancel() and cancels it in the warehouse. Queries without an
+    owner (background prefetch, snapshot refreshes) are never cancelled.
+
+    Sessions idle for session_ttl seconds are forgotten (their late queries
+    are then simply not cancelled), and durations are kept for at most
+    max_statements distinct SQL texts, least recently completed dropped first.
+    """
+
+    def __init__(self, session_ttl=3600.0, max_statements=1000):
+        self.session_ttl = session_ttl
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        # Session id -> (current generation, last run start)
+        self._generations = {}
+        self._last_prune = time.monotonic()
+        self._running = {}
+        # Completed query durations per SQL text: (count, total seconds)
+        self._durations = OrderedDict()
+        self._stats = {
+            "started": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "timed_out": 0,
+            "cancelled_elapsed_s": 0.0,
+            "estimated_saved_s": 0.0,
+        }
+
+    def begin_run(self, session_id):
+        """Start a new script run for a session; queries of its earlier runs become stale"""
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generations.get(session_id, (0, now))[0] + 1
+            self._generations[session_id] = (generation, now)
+            if now - self._last_prune > min(self.session_ttl, 60.0):
+                self._last_prune = now
+                for idle in [sid for sid, (_, seen) in self._generations.items() if now - seen > self.session_ttl]:
+                    del self._generations[idle]
+            return generation
+
+    def is_stale(self, owner):
+        """Whether an owner's run has been superseded or interrupted"""
+        if owner is None:
+            return False
+        with self._lock:
+            current = self._generations.get(owner["session_id"], (owner["generation"], None))[0]
+        if current > owner["generation"]:
+            return True
+        interrupted = owner.get("interrupted")
+        return bool(interrupted and interrupted())
+
+    def start(self, query_id, sql, owner=None):
+        """Register a query that has been submitted to the warehouse"""
+        with self._lock:
+            self._running[query_id] = {"sql": sql, "owner": owner, "started": time.monotonic()}
+            self._stats["started"] += 1
+
+    def should_cancel(self, query_id):
+        """Whether a running query's result is no longer wanted by its owner"""
+        with self._lock:
+            record = self._running.get(query_id)
+        return record is not None and self.is_stale(record["owner"])
+
+    def finish(self, query_id, status):
+        """Record how a query ended: completed, failed, cancelled or timed_out"""
+        with self._lock:
+            record = self._running.pop(query_id, None)
+            if record is None:
+                return
+            elapsed = time.monotonic() - record["started"]
+            self._stats[status] += 1
+            if status == "completed":
+                count, total = self._durations.pop(record["sql"], (0, 0.0))
+                self._durations[record["sql"]] = (count + 1, total + elapsed)
+                if len(self._durations) > self.max_statements:
+                    self._durations.popitem(last=False)
+            elif status == "cancelled":
+                self._stats["cancelled_elapsed_s"] += elapsed
+                # The rest of a typical run of the same statement is what cancelling saved
+                count, total = self._durations.get(record["sql"], (0, 0.0))
+                if count:
+                    self._stats["estimated_saved_s"] += max(total / count - elapsed, 0.0)
+
+    def stats(self):
+        """Counters of started, completed, cancelled and timed-out queries and time saved"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["running"] = len(self._running)
+        stats["cancelled_elapsed_s"] = round(stats["cancelled_elapsed_s"], 3)
+        stats["estimated_saved_s"] = round(stats["estimated_saved_s"], 3)
+        return stats
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+from derived_metrics import (TOP_PLACES_NUMERIC_COLUMNS, popularity_score, value_for_money_score,
+                             time_efficiency_score, bayesian_rating)
+
+# Materialized leaderboards for the top places page. Every scoring formula is
+# ranked once per data version, overall and within each TYPE, ZONE and STATE,
+# so top-N pages are array slices and a place's rank is an array lookup.
+
+# Scoring formulas: {name: {"label", "score": score(df) -> Series, "higher_is_better"}}
+RANKING_SCORES = {
+    'popularity': {"label": "Popularity", "score": popularity_score, "higher_is_better": True},
+    'value': {"label": "Value for money", "score": value_for_money_score, "higher_is_better": False},
+    'time_efficiency': {"label": "Time efficiency", "score": time_efficiency_score, "higher_is_better": True},
+    'bayesian_rating': {"label": "Bayesian rating", "score": bayesian_rating, "higher_is_better": True}
+}
+
+# Columns with a leaderboard per value
+RANKING_GROUPS = ['TYPE', 'ZONE', 'STATE']
+
+
+class RankingEngine:
+    """Leaderboards of a place frame for several scores, overall and per group value
+
+    Places without a score are left out of that score's boards. Ranks are
+    competition ranks (tied places share a rank, the next one skips); tied
+    places are listed in table order. Results are row positions in the
+    ranked frame.
+    """
+
+    def __init__(self, df, scores=None, groups=None):
+        self.formulas = scores or RANKING_SCORES
+        self.groups = [group for group in (groups or RANKING_GROUPS) if group in df.columns]
+        numeric = df.assign(**{
+            column: pd.to_numeric(df[column], errors='coerce')
+            for column in TOP_PLACES_NUMERIC_COLUMNS if column in df.columns
+        })
+        self.name_rows = {}
+        for position, name in enumerate(df['NAME'].astype(str)):
+            self.name_rows.setdefault(name, position)
+        group_codes = {None: (np.zeros(len(df), dtype='int64'), [None])}
+        for group in self.groups:
+            codes, categories = pd.factorize(df[group])
+            group_codes[group] = (codes, list(categories))
+
+        self.scores = {}
+        self.boards = {}
+        for name, formula in self.formulas.items():
+            values = formula["score"](numeric).to_numpy(dtype='float64')
+            keys = -values if formula["higher_is_better"] else values
+            scored = np.flatnonzero(np.isfinite(keys))
+            order = scored[np.argsort(keys[scored], kind='stable')]
+            self.scores[name] = values
+            for group, (codes, categories) in group_codes.items():
+                self.boards[name, group] = self._board(order, keys, codes, categories)
+
+    @staticmethod
+    def _board(order, keys, codes, categories):
+        """Rows of every group value's leaderboard, back to back, with each row's rank"""
+        # A stable sort by group keeps each group's rows in score order
+        rows = order[np.argsort(codes[order], kind='stable')]
+        rows = rows[codes[rows] >= 0]
+        sorted_codes, sorted_keys = codes[rows], keys[rows]
+        bounds = np.searchsorted(sorted_codes, np.arange(len(categories) + 1))
+        positions = np.arange(len(rows))
+        new_run = np.r_[True, (sorted_codes[1:] != sorted_codes[:-1]) | (sorted_keys[1:] != sorted_keys[:-1])][:len(rows)]
+        run_start = np.maximum.accumulate(np.where(new_run, positions, 0)) if len(rows) else positions
+        ranks = np.zeros(len(codes), dtype='int64')
+        ranks[rows] = run_start - bounds[sorted_codes] + 1
+        return {
+            "rows": rows,
+            "codes": codes,
+            "bounds": bounds,
+            "values": {value: i for i, value in enumerate(categories)},
+            "ranks": ranks
+        }
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the scores and leaderboards"""
+        arrays = list(self.scores.values())
+        arrays += [board[part] for board in self.boards.values() for part in ("rows", "bounds", "ranks")]
+        # Group codes are shared by the boards of every score
+        arrays += list({id(board["codes"]): board["codes"] for board in self.boards.values()}.values())
+        return sum(array.nbytes for array in arrays) + 100 * len(self.name_rows)
+
+    def labels(self):
+        """Display label of each score: {name: label}"""
+        return {name: formula["label"] for name, formula in self.formulas.items()}
+
+    def group_values(self, group):
+        """Values of a grouping column that have a leaderboard"""
+        return list(self.boards[next(iter(self.formulas)), group]["values"])
+
+    def row_of(self, name):
+        """Row position of a place by NAME, or None"""
+        return self.name_rows.get(name)
+
+    def _slice(self, score, group, value):
+        board = self.boards[score, group]
+        index = board["values"].get(value)
+        if index is None:
+            return board, 0, 0
+        return board, board["bounds"][index], board["bounds"][index + 1]
+
+    def leaderboard(self, score, group=None, value=None, offset=0, limit=10):
+        """A page of a leaderboard: (rows, ranks, scores, total places on the board)"""
+        board, start, end = self._slice(score, group, value)
+        rows = board["rows"][min(start + offset, end):min(start + offset + limit, end)]
+        return rows, board["ranks"][rows], self.scores[score][rows], end - start
+
+    def top(self, score, n=1, group=None, value=None):
+        """Rows of the n best places for a score"""
+        return self.leaderboard(score, group, value, limit=n)[0]
+
+    def rank_of(self, row, score, group=None):
+        """(rank, places on the board) of a row overall or within its group value, or None if unranked"""
+        board = self.boards[score, group]
+        rank = int(board["ranks"][row])
+        if rank == 0:
+            return None
+        index = board["codes"][row]
+        return rank, int(board["bounds"][index + 1] - board["bounds"][index])
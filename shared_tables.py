@@ -0,0 +1,130 @@
+import hashlib
+import os
+import re
+import threading
+import time
+
+
+def _digest(text):
+    return hashlib.sha1(str(text).encode("utf-8")).hexdigest()[:12]
+
+
+class SharedTableStore:
+    """Versioned Arrow IPC files that every worker process memory-maps read-only
+
+    A result is published once as <table>-<query digest>-<version digest>.arrow
+    (written to a temporary name and renamed into place). Other processes on
+    the host map the same file, so the OS page cache holds one copy however many
+    workers there are. Publishing a new version removes the older files of the
+    same query; processes that still map them keep valid pages until they
+    drop their reference. Each publish also prunes the whole directory: only
+    the newest version of every query is kept, and files nobody has mapped
+    for max_age seconds (plus abandoned temporary files) are removed.
+    """
+
+    def __init__(self, directory, max_age=24 * 3600.0):
+        # pyarrow is required; raise ImportError here so callers can disable the store
+        import pyarrow  # noqa: F401
+        self.directory = directory
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stats = {"published": 0, "mapped": 0, "removed": 0}
+
+    def _prefix(self, table_name, query):
+        safe_table = re.sub(r'[^A-Za-z0-9_]', '_', table_name)
+        return f"{safe_table}-{_digest(query)}-"
+
+    def _path(self, table_name, query, version):
+        return os.path.join(self.directory, f"{self._prefix(table_name, query)}{_digest(version)}.arrow")
+
+    def _touch(self, path):
+        """Record a use of a published file (its mtime) for prune"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            self._count("removed")
+        except OSError:
+            # Already gone, or still mapped on a platform that locks mapped files;
+            # retried on the next publish
+            pass
+
+    def _count(self, stat, amount=1):
+        with self._lock:
+            self._stats[stat] += amount
+
+    def open(self, table_name, query, version):
+        """Map a published result read-only; returns None if this version is not published"""
+        import pyarrow as pa
+        try:
+            source = pa.memory_map(self._path(table_name, query, version), "r")
+        except FileNotFoundError:
+            return None
+        self._touch(self._path(table_name, query, version))
+        table = pa.ipc.open_file(source).read_all()
+        self._count("mapped")
+        # split_blocks keeps null-free numeric columns as views of the mapped pages
+        return table.to_pandas(split_blocks=True)
+
+    def publish(self, table_name, query, version, df):
+        """Write a result for other workers and return this process's mapped view of it"""
+        import pyarrow as pa
+        path = self._path(table_name, query, version)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        self._count("published")
+        self.cleanup(table_name, query, keep=path)
+        self.prune()
+        return self.open(table_name, query, version)
+
+    def cleanup(self, table_name, query, keep=None):
+        """Remove published versions of a query other than keep"""
+        prefix = self._prefix(table_name, query)
+        for file_name in os.listdir(self.directory):
+            path = os.path.join(self.directory, file_name)
+            if file_name.startswith(prefix) and file_name.endswith(".arrow") and path != keep:
+                self._remove(path)
+
+    def prune(self):
+        """Remove superseded versions of every query, and files unused for max_age seconds"""
+        now = time.time()
+        newest = {}
+        for file_name in os.listdir(self.directory):
+            path = os.path.join(self.directory, file_name)
+            try:
+                modified = os.path.getmtime(path)
+            except OSError:
+                continue
+            if file_name.endswith(".tmp"):
+                # Left behind by a worker that died while publishing
+                if now - modified > self.max_age:
+                    self._remove(path)
+                continue
+            if not file_name.endswith(".arrow"):
+                continue
+            if now - modified > self.max_age:
+                self._remove(path)
+                continue
+            # <table>-<query digest>-<version digest>.arrow: keep the newest version per query
+            query_prefix = file_name.rsplit("-", 1)[0]
+            kept = newest.get(query_prefix)
+            if kept is None or modified > kept[0]:
+                newest[query_prefix] = (modified, path)
+                if kept is not None:
+                    self._remove(kept[1])
+            else:
+                self._remove(path)
+
+    def stats(self):
+        """Counters of published, mapped and removed files"""
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+
+def schema_hash(df):
+    """Short hash of a frame's column names and dtypes"""
+    spec = [[str(column), str(dtype)] for column, dtype in df.dtypes.items()]
+    return hashlib.sha256(json.dumps(spec).encode("utf-8")).hexdigest()[:16]
+
+
+class SnapshotStore:
+    """Local Parquet snapshots of full tables with a JSON manifest
+
+    The manifest records, per table, the data version the snapshot was taken
+    at, when it was fetched and last confirmed current, its row count and a
+    schema hash. Files are written to a temporary name and renamed into place
+    so readers never see a partial snapshot.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._manifest = None
+
+    def _path(self, file_name):
+        return os.path.join(self.directory, file_name)
+
+    def _write_atomic(self, file_name, write):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(file_name)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, path)
+
+    def _load_manifest(self):
+        if self._manifest is None:
+            try:
+                with open(self._path(self.MANIFEST_FILE), encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._manifest = {}
+        return self._manifest
+
+    def _save_manifest(self, manifest):
+        def write(path):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+        self._write_atomic(self.MANIFEST_FILE, write)
+        self._manifest = manifest
+
+    def manifest(self):
+        """Copy of the manifest: {table_name: entry}"""
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._load_manifest().items()}
+
+    def entry(self, table_name):
+        """Manifest entry for a table, or None if there is no snapshot"""
+        with self._lock:
+            entry = self._load_manifest().get(table_name)
+            return dict(entry) if entry is not None else None
+
+    def save(self, table_name, df, version, row_hashes=None, **details):
+        """Persist a table snapshot and record it in the manifest
+
+        row_hashes, if given, is a (key, row hash) frame stored next to the
+        snapshot for incremental syncs; details are extra manifest fields.
+        """
+        file_name = f"{table_name}.parquet"
+        self._write_atomic(file_name, lambda path: df.to_parquet(path, index=False))
+        hashes_file = None
+        if row_hashes is not None:
+            hashes_file = f"{table_name}.hashes.parquet"
+            self._write_atomic(hashes_file, lambda path: row_hashes.to_parquet(path, index=False))
+        now = time.time()
+        entry = {
+            "file": file_name,
+            "hashes_file": hashes_file,
+            "version": version,
+            "fetched_at": now,
+            "checked_at": now,
+            "row_count": int(len(df)),
+            "schema_hash": schema_hash(df),
+        }
+        entry.update(details)
+        with self._lock:
+            manifest = dict(self._load_manifest())
+            manifest[table_name] = entry
+            self._save_manifest(manifest)
+        return dict(entry)
+
+    def touch(self, table_name):
+        """Record that a snapshot was confirmed current without rewriting it"""
+        with self._lock:
+            manifest = dict(self._load_manifest())
+            if table_name in manifest:
+                manifest[table_name] = dict(manifest[table_name], checked_at=time.time())
+                self._save_manifest(manifest)
+
+    def load(self, table_name):
+        """Read a table snapshot; returns (df, entry) or (None, None)"""
+        entry = self.entry(table_name)
+        if entry is None:
+            return None, None
+        try:
+            df = pd.read_parquet(self._path(entry["file"]))
+        except FileNotFoundError:
+            return None, None
+        return df, entry
+
+    def load_row_hashes(self, table_name):
+        """Read the stored (key, row hash) frame of a snapshot, or None"""
+        entry = self.entry(table_name)
+        if entry is None or not entry.get("hashes_file"):
+            return None
+        try:
+            return pd.read_parquet(self._path(entry["hashes_file"]))
+        except FileNotFoundError:
+            return None
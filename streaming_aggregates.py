@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import aggregate_frame, aggregate_keys, aggregate_source_columns, normalize_aggregate
+
+# Incremental aggregators for streamed query results (see
+# config.get_streamed_aggregates). Each one is fed a table in batches with
+# update(batch) and returns the same result as its in-memory counterpart from
+# result(); the state kept between batches depends on the number of groups,
+# bins or k, not on the number of rows.
+
+# How partial results of each op combine across batches
+_COMBINE_OPS = {"count": "sum", "sum": "sum", "min": "min", "max": "max"}
+
+
+class SpecAggregator:
+    """Streaming version of aggregates.aggregate_frame for one aggregate spec
+
+    Means are carried as a sum and a non-null count per group and divided at
+    the end; the other ops combine their per-batch partials directly.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self._keys = aggregate_keys(spec)
+        self._partial_spec = dict(spec, measures=self._partial_measures(spec))
+        self._partials = None
+
+    @staticmethod
+    def _partial_measures(spec):
+        measures = {}
+        for name, (op, column) in spec["measures"].items():
+            if op == "mean":
+                measures[f"{name}__sum"] = ("sum", column)
+                measures[f"{name}__n"] = ("count", column)
+            else:
+                measures[name] = (op, column)
+        return measures
+
+    def update(self, batch):
+        partial = aggregate_frame(batch, self._partial_spec)
+        if self._partials is not None:
+            partial = pd.concat([self._partials, partial], ignore_index=True)
+        grouped_input = partial.astype({key: object for key in self._keys})
+        combine = {name: _COMBINE_OPS[op] for name, (op, _) in self._partial_spec["measures"].items()}
+        if not self._keys:
+            # One running row over every batch
+            self._partials = grouped_input.agg(combine).to_frame().T
+            return
+        self._partials = grouped_input.groupby(self._keys, dropna=False, sort=False).agg(combine).reset_index()
+
+    def result(self):
+        measures = self.spec["measures"]
+        if self._partials is None:
+            if not self._keys:
+                # Like SQL without GROUP BY: one row even over no rows
+                return aggregate_frame(pd.DataFrame(columns=aggregate_source_columns(self.spec)), self.spec)
+            return normalize_aggregate(pd.DataFrame(columns=self._keys + list(measures)), self.spec)
+        result = self._partials[self._keys].copy()
+        for name, (op, _) in measures.items():
+            if op == "mean":
+                count = self._partials[f"{name}__n"].astype("float64")
+                result[name] = self._partials[f"{name}__sum"] / count.where(count > 0)
+            else:
+                result[name] = self._partials[name]
+        return normalize_aggregate(result, self.spec)
+
+
+class HistogramAggregator:
+    """Fixed-bin histogram of a numeric column (missing values are skipped)
+
+    Bins follow numpy.histogram: half-open except the last, which includes
+    its right edge.
+    """
+
+    def __init__(self, column, bins):
+        self.column = column
+        self.edges = np.asarray(bins, dtype="float64")
+        self.counts = np.zeros(len(self.edges) - 1, dtype="int64")
+
+    def update(self, batch):
+        values = pd.to_numeric(batch[self.column], errors="coerce").dropna().to_numpy(dtype="float64")
+        self.counts += np.histogram(values, bins=self.edges)[0]
+
+    def result(self):
+        return pd.DataFrame({
+            "bin_start": self.edges[:-1],
+            "bin_end": self.edges[1:],
+            "count": self.counts.copy()
+        })
+
+
+class TopKAggregator:
+    """Running top-k rows by a score, matching DataFrame.nlargest(k) on the whole table
+
+    score(batch) returns the score Series for a batch; it is kept in a column
+    named score_name. Row labels are the rows' positions in the full stream.
+    """
+
+    def __init__(self, k, score, score_name):
+        self.k = k
+        self.score = score
+        self.score_name = score_name
+        self._top = None
+        self._offset = 0
+
+    def update(self, batch):
+        scored = batch.assign(**{self.score_name: self.score(batch)})
+        scored.index = pd.RangeIndex(self._offset, self._offset + len(scored))
+        self._offset += len(scored)
+        candidates = scored.nlargest(self.k, self.score_name)
+        if self._top is not None:
+            # Earlier rows come first so ties resolve as in a single nlargest
+            candidates = pd.concat([self._top, candidates]).nlargest(self.k, self.score_name)
+        self._top = candidates
+
+    def result(self):
+        return self._top if self._top is not None else pd.DataFrame(columns=[self.score_name])
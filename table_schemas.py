@@ -0,0 +1,117 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Declared load-time schema for each dashboard table. "dtypes" maps columns to
+# compact types, "pattern_dtypes" covers the year columns by name pattern and
+# "required" lists the columns the pages cannot work without.
+#
+# Low-cardinality text becomes categorical; counts and fees use 32-bit ints.
+# Ratings, durations, review counts and percentages stay float64: they are
+# printed and charted as they are, and a float32 4.7 reads 4.699999809265137.
+# Int columns with missing or fractional values are kept as floats so NaN
+# marks the gaps (float32 while every whole number in them is exact).
+
+TABLE_SCHEMAS = {
+    "COUNTRYWISEYEARLYVISITORS": {
+        "required": ['COUNTRY', '_2019', '_2020'],
+        "dtypes": {'COUNTRY': 'category'},
+        "pattern_dtypes": [(r'^_\d{4}$', 'int32')],
+    },
+    "COUNTRYWISEGENDER": {
+        "required": ['COUNTRY_OF_NATIONALITY'] + [
+            f'_{year}_{gender}' for year in range(2014, 2021) for gender in ('MALE', 'FEMALE')
+        ],
+        "dtypes": {'COUNTRY_OF_NATIONALITY': 'category'},
+        "pattern_dtypes": [(r'^_\d{4}_(MALE|FEMALE)$', 'float64')],
+    },
+    "INDIAFAMOUSTOURISTPLACES": {
+        "required": [
+            'NAME', 'ZONE', 'STATE', 'CITY', 'TYPE', 'GOOGLE_REVIEW_RATING',
+            'TIME_NEEDED_TO_VISIT_IN_HRS', 'ENTRANCE_FEE_IN_INR',
+            'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS', 'BEST_TIME_TO_VISIT',
+            'DSLR_ALLOWED', 'IMAGE_URL'
+        ],
+        "dtypes": {
+            'ZONE': 'category',
+            'STATE': 'category',
+            'CITY': 'category',
+            'TYPE': 'category',
+            'BEST_TIME_TO_VISIT': 'category',
+            'DSLR_ALLOWED': 'category',
+            'GOOGLE_REVIEW_RATING': 'float64',
+            'TIME_NEEDED_TO_VISIT_IN_HRS': 'float64',
+            'ENTRANCE_FEE_IN_INR': 'int32',
+            'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': 'float64',
+        },
+        "pattern_dtypes": [],
+    },
+    "TOPPLACESTOVISIT": {
+        "required": [
+            'NAME', 'CITY', 'TYPE', 'GOOGLE_REVIEW_RATING', 'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
+            'ENTRANCE_FEE_IN_INR', 'TIME_NEEDED_TO_VISIT_IN_HRS'
+        ],
+        "dtypes": {
+            'ZONE': 'category',
+            'STATE': 'category',
+            'CITY': 'category',
+            'TYPE': 'category',
+            'GOOGLE_REVIEW_RATING': 'float64',
+            'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': 'float64',
+            'ENTRANCE_FEE_IN_INR': 'int32',
+            'TIME_NEEDED_TO_VISIT_IN_HRS': 'float64',
+        },
+        "pattern_dtypes": [],
+    },
+}
+
+
+class SchemaError(ValueError):
+    """Raised when a fetched table does not match its declared schema"""
+
+
+def column_dtype(schema, column):
+    """Declared dtype for a column, or None if the schema leaves it alone"""
+    if column in schema["dtypes"]:
+        return schema["dtypes"][column]
+    for pattern, dtype in schema["pattern_dtypes"]:
+        if re.match(pattern, column):
+            return dtype
+    return None
+
+
+def _coerce(series, dtype):
+    if dtype == 'category':
+        return series.astype('category')
+    numeric = pd.to_numeric(series, errors='coerce')
+    if dtype.startswith('int'):
+        info = np.iinfo(dtype)
+        whole = (numeric.dropna() % 1 == 0).all()
+        if numeric.notna().all() and whole and numeric.between(info.min, info.max).all():
+            return numeric.astype(dtype)
+        # Missing, fractional or out-of-range values: use the smallest float that keeps them exact
+        return numeric.astype('float32' if whole and numeric.abs().max() < 2 ** 24 else 'float64')
+    return numeric.astype(dtype)
+
+
+def apply_table_schema(table_name, df, require_all=True):
+    """Validate a fetched table against its schema and convert it to compact dtypes
+
+    With require_all, every required column must be present (full-table loads);
+    projected loads only convert the columns they contain.
+    """
+    schema = TABLE_SCHEMAS.get(table_name)
+    if schema is None:
+        return df
+    if require_all:
+        missing = [col for col in schema["required"] if col not in df.columns]
+        if missing:
+            raise SchemaError(f"{table_name} is missing required columns: {', '.join(missing)}")
+
+    converted = {}
+    for column in df.columns:
+        dtype = column_dtype(schema, column)
+        if dtype is not None and str(df[column].dtype) != dtype:
+            converted[column] = _coerce(df[column], dtype)
+    return df.assign(**converted) if converted else df
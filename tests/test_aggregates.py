@@ -0,0 +1,88 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import aggregate_frame, normalize_aggregate
+from config import build_aggregate_query
+
+TABLE = "PLACES"
+
+PLACES = pd.DataFrame({
+    'ZONE': ['North', 'North', 'South', None, 'South', 'North', None, 'East'],
+    'TYPE': ['Fort', 'Fort', 'Temple', 'Fort', None, 'Lake', 'Lake', 'Fort'],
+    'GOOGLE_REVIEW_RATING': [4.5, None, 4.7, 4.1, 3.9, None, 4.4, None],
+    'ENTRANCE_FEE_IN_INR': [0, 50, 600, None, 100, 250, 0, -5],
+    '_2019': [10, None, 30, 5, 7, 2, None, 1],
+    '_2020': [1, 2, None, 4, None, 6, 1, 1]
+})
+
+SPECS = {
+    'counts and means by two keys': {
+        "group_by": ['ZONE', 'TYPE'],
+        "measures": {
+            "count": ("count", None),
+            "rated": ("count", 'GOOGLE_REVIEW_RATING'),
+            "GOOGLE_REVIEW_RATING": ("mean", 'GOOGLE_REVIEW_RATING'),
+            "lowest": ("min", 'GOOGLE_REVIEW_RATING'),
+            "highest": ("max", 'GOOGLE_REVIEW_RATING')
+        }
+    },
+    'row-wise sums': {
+        "group_by": ['ZONE'],
+        "measures": {"TOTAL": ("sum", ['_2019', '_2020']), "FEES": ("sum", 'ENTRANCE_FEE_IN_INR')}
+    },
+    'bucketed fees': {
+        "group_by": ['TYPE'],
+        "measures": {"count": ("count", None), "mean_rating": ("mean", 'GOOGLE_REVIEW_RATING')},
+        "bucket": {"column": "ENTRANCE_FEE_IN_INR", "name": "Fee_Range",
+                   "bins": [-1, 0, 100, 500, float('inf')],
+                   "labels": ["Free", "₹1-100", "₹101-500", "₹500+"]}
+    },
+    'no group keys': {
+        "measures": {"count": ("count", None), "TOTAL": ("sum", '_2020'), "avg": ("mean", '_2019')}
+    }
+}
+
+
+@pytest.fixture(scope="module")
+def warehouse():
+    """The table in an in-memory SQLite database (NULLs for missing values)"""
+    conn = sqlite3.connect(":memory:")
+    PLACES.to_sql(TABLE, conn, index=False)
+    yield conn
+    conn.close()
+
+
+def _run_in_sql(conn, spec, filters=None):
+    sql, params = build_aggregate_query(TABLE, spec, filters)
+    # Same statement, in SQLite's placeholder style and without the database prefix
+    sql = sql.replace("%s", "?").replace("TOURISM.PUBLIC.", "")
+    return normalize_aggregate(pd.read_sql_query(sql, conn, params=params), spec)
+
+
+@pytest.mark.parametrize("name", list(SPECS))
+@pytest.mark.parametrize("filters", [None, [('TYPE', 'eq', 'Fort')]])
+def test_sql_and_pandas_agree(warehouse, name, filters):
+    spec = SPECS[name]
+    expected = aggregate_frame(PLACES[PLACES['TYPE'] == 'Fort'] if filters else PLACES, spec)
+    pd.testing.assert_frame_equal(_run_in_sql(warehouse, spec, filters), expected)
+
+
+def test_null_keys_form_their_own_group_last(warehouse):
+    result = _run_in_sql(warehouse, SPECS['row-wise sums'])
+    assert result['ZONE'].tolist()[:-1] == ['East', 'North', 'South']
+    assert pd.isna(result['ZONE'].iloc[-1])
+    # NULL measure values count as 0 in row-wise sums
+    assert result['TOTAL'].tolist() == [2.0, 21.0, 37.0, 10.0]
+
+
+def test_all_null_groups_sum_to_zero_and_average_to_nan(warehouse):
+    spec = {"group_by": ['TYPE'], "measures": {"s": ("sum", 'GOOGLE_REVIEW_RATING'),
+                                               "m": ("mean", 'GOOGLE_REVIEW_RATING')}}
+    filters = [('ZONE', 'eq', 'East')]
+    result = _run_in_sql(warehouse, spec, filters)
+    assert result['s'].tolist() == [0.0]
+    assert np.isnan(result['m'].iloc[0])
+    pd.testing.assert_frame_equal(result, aggregate_frame(PLACES[PLACES['ZONE'] == 'East'], spec))
@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+
+import config
+
+
+def _ctx(state, **rerun):
+    requests = SimpleNamespace(_state=SimpleNamespace(value=state), _rerun_data=SimpleNamespace(**rerun))
+    return SimpleNamespace(script_requests=requests)
+
+
+@pytest.fixture
+def supported_streamlit(monkeypatch):
+    monkeypatch.setattr(config, "_streamlit_version", lambda: config._SCRIPT_REQUESTS_VERSIONS[0])
+
+
+def test_full_rerun_and_stop_interrupt_the_run(supported_streamlit):
+    assert config._run_interrupted(_ctx("RERUN", fragment_id_queue=[], is_fragment_scoped_rerun=False))
+    assert config._run_interrupted(_ctx("STOP"))
+    assert not config._run_interrupted(_ctx("CONTINUE"))
+
+
+def test_fragment_widget_rerun_does_not_interrupt_the_run(supported_streamlit):
+    # A widget inside a fragment queues its rerun behind the running script
+    assert not config._run_interrupted(_ctx("RERUN", fragment_id_queue=["search"], is_fragment_scoped_rerun=False))
+    # st.rerun(scope="fragment") does preempt it
+    assert config._run_interrupted(_ctx("RERUN", fragment_id_queue=["search"], is_fragment_scoped_rerun=True))
+
+
+def test_offline_pool_metrics_skip_the_pool(monkeypatch):
+    for name in config.REQUIRED_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(config, "snapshot_mode", lambda: "offline")
+    monkeypatch.setattr(config, "get_connection_pool", lambda: pytest.fail("pool built in offline mode"))
+    assert config.get_pool_metrics() == {"snapshot_mode": "offline"}
+
+
+def test_streamed_chart_data_matches_the_loaded_frame(monkeypatch):
+    import numpy as np
+    import pandas as pd
+    from data_cache import ResultCache
+
+    rng = np.random.default_rng(3)
+    places = pd.DataFrame({
+        "NAME": [f"place {i}" for i in range(300)],
+        "TYPE": rng.choice(["Fort", "Temple", "Lake"], 300),
+        "GOOGLE_REVIEW_RATING": rng.uniform(1, 5, 300).round(1),
+        "NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS": rng.uniform(0, 2, 300).round(1)
+    })
+    settings = dict(config.get_settings(), streaming_aggregation=True, stream_batch_size=7)
+    monkeypatch.setattr(config, "get_settings", lambda: settings)
+    monkeypatch.setattr(config, "snapshot_mode", lambda: "on")
+    monkeypatch.setattr(config, "_snapshot_query", lambda table_name, columns, filters: places[columns])
+    monkeypatch.setattr(config, "get_table_version", lambda table_name: 1)
+    monkeypatch.setattr(config, "get_result_cache", lambda cache=ResultCache(): cache)
+
+    bins = [step / 4 for step in range(21)]
+    streamed = config.get_histogram_data("PLACES", "GOOGLE_REVIEW_RATING", bins)
+    assert streamed["count"].sum() == len(places)
+    pd.testing.assert_frame_equal(streamed, config.get_histogram_data("PLACES", "GOOGLE_REVIEW_RATING", bins,
+                                                                      fallback_df=places))
+    score = lambda df: df["GOOGLE_REVIEW_RATING"] * df["NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS"]
+    columns = ["NAME", "GOOGLE_REVIEW_RATING", "NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS"]
+    pd.testing.assert_frame_equal(config.get_top_k_data("PLACES", 5, score, "popularity", columns),
+                                  places[columns].assign(popularity=score(places)).nlargest(5, "popularity"))
+    spec = {"group_by": ["TYPE"], "measures": {"count": ("count", None)}}
+    pd.testing.assert_frame_equal(config.get_aggregate_data("PLACES", spec),
+                                  config.get_aggregate_data("PLACES", spec, fallback_df=places))
+
+
+def test_stage_over_a_loaded_frame_is_keyed_to_its_version(monkeypatch):
+    import pandas as pd
+    from data_cache import ResultCache
+
+    monkeypatch.setattr(config, "get_result_cache", lambda cache=ResultCache(): cache)
+    monkeypatch.setattr(config, "get_table_version", lambda table_name: pytest.fail("version probed"))
+    rows = config._with_version(pd.DataFrame({"NAME": ["a", "b"]}), 7)
+    # Selections and copies of a loaded frame keep its version
+    assert config.data_version(rows[["NAME"]].copy()) == 7
+
+    builds = []
+    build = lambda df: builds.append(len(df)) or len(df)
+    assert config.get_derived_data("PLACES", "names", build, source=rows) == 2
+    assert config.get_derived_data("PLACES", "names", build, source=rows.copy()) == 2
+    assert builds == [2]
+    newer = config._with_version(rows.iloc[:1], 8)
+    assert config.get_derived_data("PLACES", "names", build, source=newer) == 1
+    assert builds == [2, 1]
+
+
+def test_figures_are_cached_under_the_version_of_their_data(monkeypatch):
+    import pandas as pd
+    from data_cache import ResultCache
+
+    settings = dict(config.get_settings(), aggregate_pushdown=False)
+    monkeypatch.setattr(config, "get_settings", lambda: settings)
+    monkeypatch.setattr(config, "get_figure_cache", lambda cache=ResultCache(): cache)
+    monkeypatch.setattr(config, "get_table_version", lambda table_name: pytest.fail("version probed"))
+    rows = config._with_version(pd.DataFrame({"TYPE": ["Fort", "Fort", "Lake"]}), 7)
+    spec = {"group_by": ["TYPE"], "measures": {"count": ("count", None)}}
+    # Aggregates computed from a loaded frame keep its version
+    counts = config.get_aggregate_data("PLACES", spec, fallback_df=rows)
+    assert config.data_version(counts) == 7
+
+    figure = SimpleNamespace(to_json=lambda: "{}")
+    builds = []
+    build = lambda: builds.append(1) or figure
+    assert config.get_figure("PLACES", "page", "chart", build, version=config.data_version(counts)) is figure
+    assert config.get_figure("PLACES", "page", "chart", build, version=7) is figure
+    config.get_figure("PLACES", "page", "chart", build, version=8)
+    assert len(builds) == 2
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from connection_pool import PoolTimeoutError, SnowflakeConnectionPool
+
+
+class FakeConnection:
+    def __init__(self, pool_lock=None):
+        self.closed = False
+        self.pool_lock = pool_lock
+        self.closed_under_lock = False
+
+    def close(self):
+        # A real close is a network round-trip; it must not hold up other borrowers
+        if self.pool_lock is not None and self.pool_lock._is_owned():
+            self.closed_under_lock = True
+        self.closed = True
+
+    def is_closed(self):
+        return self.closed
+
+
+def _pool(**settings):
+    """A pool over fake connections, and the connections it opened so far"""
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection(pool._cond))
+        return opened[-1]
+
+    pool = SnowflakeConnectionPool({}, connect=connect, **settings)
+    return pool, opened
+
+
+def test_connections_are_reused_up_to_the_size_limit():
+    pool, opened = _pool(size=2, wait_timeout=0.05)
+    first, second = pool.acquire(), pool.acquire()
+    assert len(opened) == 2
+    pool.release(first)
+    assert pool.acquire() is first
+    assert pool.metrics()["open"] == 2
+    pool.release(second)
+
+
+def test_waiting_for_a_connection_times_out():
+    pool, _ = _pool(size=1, wait_timeout=0.05)
+    pool.acquire()
+    started = time.monotonic()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert time.monotonic() - started >= 0.05
+    assert pool.metrics()["waits"] == 1
+
+
+def test_a_released_connection_wakes_a_waiting_borrower():
+    pool, _ = _pool(size=1, wait_timeout=5)
+    conn = pool.acquire()
+    borrowed = []
+    waiter = threading.Thread(target=lambda: borrowed.append(pool.acquire()))
+    waiter.start()
+    time.sleep(0.05)
+    pool.release(conn)
+    waiter.join(5)
+    assert borrowed == [conn]
+
+
+def test_idle_connections_are_evicted_outside_the_lock():
+    pool, opened = _pool(size=2, idle_timeout=0.01)
+    conn = pool.acquire()
+    pool.release(conn)
+    time.sleep(0.02)
+    fresh = pool.acquire()
+    assert fresh is not conn and conn.closed
+    assert not conn.closed_under_lock
+    metrics = pool.metrics()
+    assert (metrics["open"], metrics["connections_discarded"]) == (1, 1)
+
+
+def test_a_connection_is_returned_after_an_error():
+    pool, opened = _pool(size=1, wait_timeout=0.05)
+    with pytest.raises(ValueError):
+        with pool.connection():
+            raise ValueError("query failed")
+    # The connection is healthy, so the next borrower gets it back
+    with pool.connection() as conn:
+        assert conn is opened[0]
+    assert pool.metrics()["in_use"] == 0
+
+
+def test_an_expired_session_is_discarded_and_retried_once():
+    pool, opened = _pool(size=1, wait_timeout=0.05)
+    calls = []
+
+    def query(conn):
+        calls.append(conn)
+        if len(calls) == 1:
+            error = RuntimeError("session expired")
+            error.errno = 390112
+            raise error
+        return "ok"
+
+    assert pool.run(query) == "ok"
+    assert calls == opened and opened[0].closed and not opened[1].closed
+
+
+def test_a_failed_connect_frees_its_slot():
+    pool, _ = _pool(size=1, wait_timeout=0.05)
+
+    def refuse():
+        raise ConnectionError("unreachable")
+
+    pool.connect = refuse
+    with pytest.raises(ConnectionError):
+        pool.acquire()
+    assert pool.metrics()["open"] == 0
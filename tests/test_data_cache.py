@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pandas as pd
+
+from data_cache import ResultCache
+
+
+def test_writes_to_a_handed_out_frame_stay_private():
+    cache = ResultCache()
+    first = cache.get_or_load(("t", "q", 1), lambda: {"data": pd.DataFrame({"x": [1.0, 2.0, 3.0]})})["data"]
+    first.loc[0, "x"] = 10.0
+    first["x"] *= 2
+    first["y"] = 1
+    second = cache.get(("t", "q", 1))["data"]
+    assert second["x"].tolist() == [1.0, 2.0, 3.0]
+    assert list(second.columns) == ["x"]
+
+
+def test_concurrent_misses_share_one_load():
+    cache = ResultCache()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return pd.DataFrame({"x": [1]})
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load(("t", "q", 1), load)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    # Release the load only once every other caller is waiting on it
+    deadline = time.monotonic() + 5
+    while cache.stats()["coalesced"] < len(threads) - 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == len(threads) - 1
+    assert [result["x"].tolist() for result in results] == [[1]] * len(threads)
+
+
+def test_importing_the_cache_turns_on_copy_on_write():
+    df = pd.DataFrame({"x": [1, 2]})
+    column = df["x"]
+    column.iloc[0] = 5
+    assert df.loc[0, "x"] == 1
+
+
+def test_a_measured_size_replaces_the_estimate():
+    class Figure:
+        serialized = 0
+
+        def to_plotly_json(self):
+            return {}
+
+        def to_json(self):
+            Figure.serialized += 1
+            return "{}" * 50
+
+    cache = ResultCache()
+    cache.get_or_load(("t", "figure", 1), Figure, size=lambda figure: len(figure.to_json()))
+    assert Figure.serialized == 1
+    assert cache.stats()["bytes"] == 100
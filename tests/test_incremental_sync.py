@@ -0,0 +1,84 @@
+import warnings
+
+import pandas as pd
+
+from incremental_sync import ROW_HASH_COLUMN, column_changes, diff_row_hashes, merge_changes
+from table_schemas import apply_table_schema
+
+TABLE = "COUNTRYWISEYEARLYVISITORS"
+
+
+def snapshot():
+    """A snapshot frame with the table's compact schema applied (int32 years, categorical keys)"""
+    return apply_table_schema(TABLE, pd.DataFrame({
+        "COUNTRY": ["India", "Japan", "Peru"],
+        "_2019": [10, 20, 30],
+        "_2020": [1, 2, 3],
+    }))
+
+
+def hashes(pairs):
+    return pd.DataFrame(pairs, columns=["COUNTRY", ROW_HASH_COLUMN])
+
+
+def test_diff_row_hashes_finds_inserts_updates_and_deletes():
+    local = hashes([("India", 1), ("Japan", 2), ("Peru", 3)])
+    remote = hashes([("India", 1), ("Japan", 5), ("Chad", 7)])
+    assert diff_row_hashes(local, remote, "COUNTRY") == (["Chad"], ["Japan"], ["Peru"])
+
+
+def test_column_changes():
+    assert column_changes(["COUNTRY", "_2019"], ["COUNTRY", "_2019", "_2021"]) == (["_2021"], [])
+
+
+def test_merge_applies_update_insert_delete_and_new_column():
+    df = snapshot()
+    assert str(df["_2019"].dtype) == "int32"
+    # Warehouse values arrive as wide int64, as the connector returns them
+    changed = pd.DataFrame({
+        "COUNTRY": ["Japan", "Chad"],
+        "_2019": [25, 40],
+        "_2020": [4, 5],
+        "_2021": [6, 7],
+    }).astype({"_2019": "int64", "_2020": "int64", "_2021": "int64"})
+    added = pd.DataFrame({"COUNTRY": ["India", "Japan", "Chad"], "_2021": [8, 6, 7]})
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        merged = merge_changes(df, "COUNTRY", changed_rows=changed, deleted_keys=["Peru"], added_columns=added)
+    merged = apply_table_schema(TABLE, merged)
+
+    expected = pd.DataFrame({
+        "COUNTRY": ["India", "Japan", "Chad"],
+        "_2019": [10, 25, 40],
+        "_2020": [1, 4, 5],
+        "_2021": [8, 6, 7],
+    })
+    pd.testing.assert_frame_equal(
+        merged.astype({"COUNTRY": object}).astype({col: "int64" for col in ["_2019", "_2020", "_2021"]}),
+        expected, check_dtype=False
+    )
+    assert str(merged["_2019"].dtype) == "int32"
+    assert isinstance(merged["COUNTRY"].dtype, pd.CategoricalDtype)
+
+
+def test_merge_updates_float32_columns_with_float64_values():
+    df = apply_table_schema("COUNTRYWISEGENDER", pd.DataFrame({
+        "COUNTRY_OF_NATIONALITY": ["India", "Japan"],
+        **{f"_{year}_{gender}": [50.0, 40.0] for year in range(2014, 2021) for gender in ("MALE", "FEMALE")},
+    }))
+    changed = pd.DataFrame({
+        "COUNTRY_OF_NATIONALITY": ["Japan"],
+        **{f"_{year}_{gender}": [45.5] for year in range(2014, 2021) for gender in ("MALE", "FEMALE")},
+    })
+    merged = merge_changes(df, "COUNTRY_OF_NATIONALITY", changed_rows=changed)
+    assert merged["COUNTRY_OF_NATIONALITY"].tolist() == ["India", "Japan"]
+    assert merged["_2020_MALE"].tolist() == [50.0, 45.5]
+
+
+def test_merge_keeps_untouched_rows_and_order():
+    df = snapshot()
+    changed = pd.DataFrame({"COUNTRY": ["India"], "_2019": [11], "_2020": [1]})
+    merged = merge_changes(df, "COUNTRY", changed_rows=changed)
+    assert merged["COUNTRY"].tolist() == ["India", "Japan", "Peru"]
+    assert merged["_2019"].tolist() == [11, 20, 30]
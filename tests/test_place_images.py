@@ -0,0 +1,117 @@
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from place_images import ImageCache
+
+
+def _png(width, height, color):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(out, format="PNG")
+    return out.getvalue()
+
+
+class _ImageServer:
+    """Local HTTP server: /<n>.png is a 1200x800 image, anything else is a 404"""
+
+    def __init__(self):
+        self.requests = []
+        # Requests for paths starting with /slow wait until the gate opens
+        self.gate = threading.Event()
+        self.gate.set()
+        self.waiting = threading.Event()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.path)
+                if self.path.startswith("/slow"):
+                    server.waiting.set()
+                    server.gate.wait(5)
+                name = self.path.rsplit("/", 1)[-1]
+                if not name.endswith(".png"):
+                    self.send_error(404)
+                    return
+                body = _png(1200, 800, (int(name[:-4]) * 40 % 256, 90, 160))
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}{path}"
+
+
+@pytest.fixture
+def server():
+    server = _ImageServer()
+    yield server
+    server.gate.set()
+    server.httpd.shutdown()
+
+
+def test_downloads_resizes_and_serves_from_disk(tmp_path, server):
+    cache = ImageCache(str(tmp_path), max_bytes=10 * 1024 * 1024, width=300)
+    data = cache.get(server.url("/1.png"))
+    assert Image.open(io.BytesIO(data)).size == (300, 200)
+    assert cache.get(server.url("/1.png")) == data
+    assert server.requests == ["/1.png"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["downloads"]) == (1, 1, 1)
+    # A new cache over the same directory reuses the stored thumbnail
+    reopened = ImageCache(str(tmp_path), max_bytes=10 * 1024 * 1024, width=300)
+    assert reopened.get(server.url("/1.png")) == data
+    assert server.requests == ["/1.png"]
+
+
+def test_failing_url_returns_none_and_is_not_retried(tmp_path, server):
+    cache = ImageCache(str(tmp_path), max_bytes=1024 * 1024, width=300)
+    assert cache.get(server.url("/missing")) is None
+    assert cache.get(server.url("/missing")) is None
+    assert server.requests == ["/missing"]
+    assert cache.stats()["failures"] == 1
+
+
+def test_least_recently_used_images_are_evicted(tmp_path, server):
+    cache = ImageCache(str(tmp_path), max_bytes=10 * 1024 * 1024, width=300)
+    size = len(cache.get(server.url("/1.png")))
+    cache.max_bytes = 2 * size + size // 2
+    cache.get(server.url("/2.png"))
+    cache.get(server.url("/1.png"))
+    cache.get(server.url("/3.png"))
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 2
+    assert stats["bytes"] <= cache.max_bytes
+    # /2.png was the least recently used and has to be downloaded again
+    cache.get(server.url("/1.png"))
+    cache.get(server.url("/2.png"))
+    assert server.requests.count("/1.png") == 1
+    assert server.requests.count("/2.png") == 2
+
+
+def test_waited_for_image_runs_ahead_of_prefetches(tmp_path, server):
+    cache = ImageCache(str(tmp_path), max_bytes=10 * 1024 * 1024, width=300, max_workers=1)
+    server.gate.clear()
+    cache.prefetch([server.url("/slow/1.png"), server.url("/2.png"), server.url("/3.png")])
+    assert server.waiting.wait(5)
+    selected = threading.Thread(target=cache.get, args=(server.url("/4.png"),))
+    selected.start()
+    while cache.stats()["misses"] == 0:
+        time.sleep(0.01)
+    server.gate.set()
+    selected.join(5)
+    cache.get(server.url("/3.png"))
+    assert server.requests[:2] == ["/slow/1.png", "/4.png"]
+    assert sorted(server.requests[2:]) == ["/2.png", "/3.png"]
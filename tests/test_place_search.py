@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from place_search import FIELD_WEIGHTS, EXACT_MATCH, PREFIX_MATCH, PlaceSearchIndex, tokenize
+
+WORDS = ['temple', 'tea', 'fort', 'fortress', 'jaipur', 'jai', 'kochi', 'kerala', 'lake', 'sun']
+
+
+def _places(rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS)
+    df = pd.DataFrame({
+        'NAME': [' '.join(words[rng.integers(0, len(words), 2)]) + f" {i % 7}" for i in range(rows)],
+        'CITY': words[rng.integers(0, len(words), rows)],
+        'STATE': pd.Categorical(words[rng.integers(0, 4, rows)]),
+        'TYPE': words[rng.integers(0, len(words), rows)]
+    })
+    df.loc[3, 'NAME'] = None
+    df.loc[5, 'CITY'] = 'Café Jaipur'
+    return df
+
+
+def _reference(df, text):
+    """Every row scored word by word in plain Python, ranked best first and then by row"""
+    ranked = []
+    for row, place in enumerate(df.itertuples(index=False)):
+        total = 0.0
+        for term in dict.fromkeys(tokenize(text)):
+            best = 0.0
+            for field, weight in FIELD_WEIGHTS.items():
+                value = getattr(place, field)
+                for token in (tokenize(value) if pd.notna(value) else []):
+                    if token == term:
+                        best = max(best, float(np.float32(weight)) * EXACT_MATCH)
+                    elif token.startswith(term):
+                        best = max(best, float(np.float32(weight)) * PREFIX_MATCH)
+            if best == 0:
+                break
+            total += best
+        else:
+            ranked.append((-total, row))
+    return np.array([row for _, row in sorted(ranked)], dtype='int64')
+
+
+@pytest.mark.parametrize("text", ['t', 'te', 'temple', 'fort jai', 'jaipur cafe', 'sun 3', 'zzz'])
+def test_search_matches_a_plain_ranking(text):
+    df = _places()
+    index = PlaceSearchIndex(df)
+    expected = _reference(df, text)
+    np.testing.assert_array_equal(index.search(text), expected)
+    mask = np.zeros(len(df), dtype=bool)
+    mask[expected] = True
+    np.testing.assert_array_equal(index.match_mask(text), mask)
+
+
+@pytest.mark.parametrize("text", ['t', 'fo', 'kerala', 'fort jai', 'temple 1'])
+def test_limited_search_is_a_prefix_of_the_full_ranking(text):
+    df = _places()
+    index = PlaceSearchIndex(df)
+    full = index.search(text)
+    allowed = np.random.default_rng(1).random(len(df)) < 0.3
+    for limit in (1, 7, 20, 1000):
+        np.testing.assert_array_equal(index.search(text, limit=limit), full[:limit])
+        np.testing.assert_array_equal(index.search(text, limit=limit, allowed=allowed), full[allowed[full]][:limit])
+
+
+def test_fuzzy_matches_misspelled_words():
+    df = pd.DataFrame({'NAME': ['Golden Temple', 'Red Fort', 'Lotus Temple'], 'CITY': ['Amritsar', 'Delhi', 'Delhi']})
+    index = PlaceSearchIndex(df)
+    assert len(index.search('templr')) == 0
+    np.testing.assert_array_equal(index.search('templr', fuzzy=True), [0, 2])
+    np.testing.assert_array_equal(index.search('templr delhi', limit=5, fuzzy=True), [2])
+    assert index.search('  ') is None and index.match_mask('!!') is None
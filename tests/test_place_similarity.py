@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import place_similarity
+from place_similarity import SimilarPlacesIndex, feature_matrix
+
+
+def _places(rows=600, seed=0):
+    rng = np.random.default_rng(seed)
+    states = np.array([f"state{i}" for i in range(8)])
+    zones = np.array(['North', 'South', 'East', 'West'])[np.arange(8) % 4]
+    state = rng.integers(0, 8, rows)
+    df = pd.DataFrame({
+        'GOOGLE_REVIEW_RATING': rng.uniform(3, 5, rows).round(1),
+        'ENTRANCE_FEE_IN_INR': np.where(rng.random(rows) < 0.4, 0, rng.lognormal(4, 1, rows).round()),
+        'TIME_NEEDED_TO_VISIT_IN_HRS': rng.choice([0.5, 1, 2, 3], rows),
+        'TYPE': rng.choice(['Fort', 'Temple', 'Lake', None], rows),
+        'ZONE': zones[state],
+        'STATE': states[state],
+        'BEST_TIME_TO_VISIT': rng.choice(['Morning', 'Evening', None], rows)
+    })
+    df.loc[rng.random(rows) < 0.05, 'GOOGLE_REVIEW_RATING'] = np.nan
+    df.loc[rng.random(rows) < 0.05, 'STATE'] = None
+    return df
+
+
+def _brute_force(df, row, k, scope):
+    """Distances to the k nearest other rows in the scope, comparing every pair"""
+    features = feature_matrix(df).astype('float64')
+    distance = np.sqrt(((features - features[row]) ** 2).sum(axis=1))
+    distance[row] = np.inf
+    if scope != 'all':
+        if pd.isna(df[scope].iloc[row]):
+            return np.zeros(0)
+        distance[(df[scope] != df[scope].iloc[row]).to_numpy()] = np.inf
+    distance = np.sort(distance)[:k]
+    return distance[np.isfinite(distance)]
+
+
+@pytest.mark.parametrize("scope", ['all', 'ZONE', 'STATE'])
+@pytest.mark.parametrize("k", [5, 25])
+def test_neighbours_match_brute_force(scope, k):
+    df = _places()
+    index = SimilarPlacesIndex(df, k=10)
+    for row in range(0, len(df), 13):
+        rows, distances = index.similar(row, k, scope)
+        np.testing.assert_allclose(distances, _brute_force(df, row, k, scope), atol=1e-4)
+        assert row not in rows
+        if scope != 'all':
+            assert (df[scope].iloc[rows] == df[scope].iloc[row]).all()
+
+
+def test_small_batches_give_the_same_lists(monkeypatch):
+    df = _places(200)
+    expected = SimilarPlacesIndex(df).neighbours
+    monkeypatch.setattr(place_similarity, 'BATCH_CELLS', 7)
+    batched = SimilarPlacesIndex(df).neighbours
+    for scope, (rows, distances) in expected.items():
+        np.testing.assert_allclose(batched[scope][1], distances, atol=1e-5)
+
+
+def test_frames_without_categories_or_rows():
+    index = SimilarPlacesIndex(pd.DataFrame({'GOOGLE_REVIEW_RATING': [1.0, 2.0, 4.0]}))
+    rows, _ = index.similar(0, 2)
+    assert list(rows) == [1, 2]
+    with pytest.raises(ValueError):
+        index.similar(0, scope='STATE')
+    assert SimilarPlacesIndex(pd.DataFrame({'TYPE': []})).nbytes >= 0
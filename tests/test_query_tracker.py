@@ -0,0 +1,27 @@
+from query_tracker import QueryTracker
+
+
+def test_later_run_makes_earlier_queries_stale():
+    tracker = QueryTracker()
+    generation = tracker.begin_run("a")
+    owner = {"session_id": "a", "generation": generation}
+    assert not tracker.is_stale(owner)
+    tracker.begin_run("a")
+    assert tracker.is_stale(owner)
+
+
+def test_idle_sessions_are_pruned():
+    tracker = QueryTracker(session_ttl=0.0)
+    tracker.begin_run("idle")
+    tracker.begin_run("active")
+    assert "idle" not in tracker._generations
+    # A forgotten session's queries are not cancelled
+    assert not tracker.is_stale({"session_id": "idle", "generation": 1})
+
+
+def test_durations_are_capped():
+    tracker = QueryTracker(max_statements=2)
+    for index in range(5):
+        tracker.start(f"q{index}", f"SELECT {index}", None)
+        tracker.finish(f"q{index}", "completed")
+    assert list(tracker._durations) == ["SELECT 3", "SELECT 4"]
@@ -0,0 +1,45 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from shared_tables import SharedTableStore
+
+
+def _arrow_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".arrow"))
+
+
+def test_publish_and_open_round_trip(tmp_path):
+    store = SharedTableStore(str(tmp_path))
+    df = pd.DataFrame({"NAME": ["a", "b"], "RATING": [4.5, 3.0]})
+    store.publish("PLACES", "full", "v1", df)
+    pd.testing.assert_frame_equal(store.open("PLACES", "full", "v1"), df)
+    assert store.open("PLACES", "full", "v2") is None
+
+
+def test_publish_keeps_only_the_newest_version_of_each_query(tmp_path):
+    store = SharedTableStore(str(tmp_path))
+    df = pd.DataFrame({"x": [1]})
+    store.publish("A", "full", "v1", df)
+    store.publish("B", "full", "v1", df)
+    store.publish("A", "full", "v2", df)
+    assert len(_arrow_files(tmp_path)) == 2
+    assert store.open("A", "full", "v1") is None
+    assert store.open("A", "full", "v2") is not None
+
+
+def test_prune_removes_unused_files_and_leftover_temporaries(tmp_path):
+    store = SharedTableStore(str(tmp_path), max_age=60)
+    df = pd.DataFrame({"x": [1]})
+    store.publish("OLD", "full", "v1", df)
+    leftover = tmp_path / "OLD-abc-def.arrow.123.456.tmp"
+    leftover.write_bytes(b"partial")
+    stale = time.time() - 120
+    for name in os.listdir(tmp_path):
+        os.utime(tmp_path / name, (stale, stale))
+    store.publish("NEW", "full", "v1", df)
+    assert [name.split("-")[0] for name in os.listdir(tmp_path)] == ["NEW"]
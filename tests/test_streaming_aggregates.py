@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import aggregate_frame
+from streaming_aggregates import HistogramAggregator, SpecAggregator, TopKAggregator
+
+SPECS = [
+    {"group_by": ["ZONE", "TYPE"], "measures": {"count": ("count", None)}},
+    {
+        "group_by": ["TYPE"],
+        "measures": {
+            "RATING": ("mean", "RATING"),
+            "REVIEWS": ("sum", "REVIEWS"),
+            "LOW": ("min", "RATING"),
+            "HIGH": ("max", "RATING"),
+            "RATED": ("count", "RATING")
+        }
+    },
+    {
+        "group_by": [],
+        "measures": {"count": ("count", None), "FEE": ("mean", "FEE")},
+        "bucket": {"column": "FEE", "name": "Fee_Range", "bins": [-1, 0, 100, 500, float("inf")],
+                   "labels": ["Free", "1-100", "101-500", "500+"]}
+    },
+    {"measures": {"count": ("count", None), "RATING": ("mean", "RATING"), "HIGH": ("max", "RATING")}}
+]
+
+
+def _places(rows=500, seed=7):
+    rng = np.random.default_rng(seed)
+    rating = rng.uniform(1, 5, rows)
+    rating[rng.random(rows) < 0.1] = np.nan
+    return pd.DataFrame({
+        "ZONE": rng.choice(["North", "South", None], rows),
+        "TYPE": rng.choice(["Fort", "Temple", "Beach", "Park"], rows),
+        "RATING": rating,
+        "REVIEWS": rng.uniform(0, 2, rows),
+        "FEE": rng.choice([0, 25, 50, 300, 1000, np.nan], rows)
+    })
+
+
+@pytest.mark.parametrize("spec", SPECS)
+@pytest.mark.parametrize("batch_size", [7, 64, 1000, 5000])
+def test_streamed_matches_in_memory(spec, batch_size):
+    df = _places()
+    aggregator = SpecAggregator(spec)
+    for start in range(0, len(df), batch_size):
+        aggregator.update(df.iloc[start:start + batch_size])
+    pd.testing.assert_frame_equal(aggregator.result(), aggregate_frame(df, spec))
+
+
+def test_empty_stream_has_the_result_columns():
+    spec = SPECS[1]
+    assert list(SpecAggregator(spec).result().columns) == ["TYPE", *spec["measures"]]
+
+
+def test_empty_stream_without_keys_has_one_row():
+    result = SpecAggregator(SPECS[3]).result()
+    assert result["count"].tolist() == [0]
+    assert result["RATING"].isna().all()
+
+
+def _stream(aggregator, df, batch_size):
+    for start in range(0, len(df), batch_size):
+        aggregator.update(df.iloc[start:start + batch_size])
+    return aggregator.result()
+
+
+@pytest.mark.parametrize("batch_size", [7, 64, 5000])
+def test_streamed_histogram_matches_in_memory(batch_size):
+    df = _places()
+    bins = [step / 4 for step in range(21)]
+    result = _stream(HistogramAggregator("RATING", bins), df, batch_size)
+    counts, edges = np.histogram(df["RATING"].dropna(), bins=bins)
+    np.testing.assert_array_equal(result["count"], counts)
+    np.testing.assert_array_equal(result["bin_start"], edges[:-1])
+    np.testing.assert_array_equal(result["bin_end"], edges[1:])
+
+
+@pytest.mark.parametrize("batch_size", [7, 64, 5000])
+def test_streamed_top_k_matches_nlargest(batch_size):
+    # Rounded scores give ties, which must resolve in table order
+    df = _places().assign(REVIEWS=lambda frame: frame["REVIEWS"].round(1))
+    score = lambda frame: frame["RATING"].round() * frame["REVIEWS"]
+    result = _stream(TopKAggregator(10, score, "popularity"), df, batch_size)
+    expected = df.assign(popularity=score(df)).nlargest(10, "popularity")
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_empty_top_k_has_the_score_column():
+    assert list(TopKAggregator(3, lambda frame: frame["RATING"], "score").result().columns) == ["score"]
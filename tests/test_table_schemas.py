@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from table_schemas import SchemaError, TABLE_SCHEMAS, apply_table_schema, column_dtype
+
+PLACES = "TOPPLACESTOVISIT"
+
+
+def _places(**overrides):
+    columns = {
+        'NAME': ['Fort', 'Temple', 'Lake'],
+        'CITY': ['Jaipur', 'Madurai', 'Jaipur'],
+        'TYPE': ['Fort', 'Temple', 'Lake'],
+        'GOOGLE_REVIEW_RATING': ['4.5', '4.7', None],
+        'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': [1.2, 0.8, 0.5],
+        'ENTRANCE_FEE_IN_INR': [100, 0, 50],
+        'TIME_NEEDED_TO_VISIT_IN_HRS': [2.0, 1.5, 1.0]
+    }
+    columns.update(overrides)
+    return pd.DataFrame(columns)
+
+
+def test_columns_get_their_declared_dtypes():
+    df = apply_table_schema(PLACES, _places())
+    assert isinstance(df['CITY'].dtype, pd.CategoricalDtype)
+    assert df['CITY'].cat.categories.tolist() == ['Jaipur', 'Madurai']
+    assert df['ENTRANCE_FEE_IN_INR'].dtype == np.int32
+    assert df['GOOGLE_REVIEW_RATING'].dtype == np.float64
+    # Text is parsed; unparseable or missing values become NaN
+    assert df['GOOGLE_REVIEW_RATING'].iloc[1] == 4.7
+    assert df['GOOGLE_REVIEW_RATING'].isna().iloc[2]
+    # Columns the schema does not declare are left alone
+    assert df['NAME'].dtype == _places()['NAME'].dtype
+
+
+def test_int_columns_with_gaps_fall_back_to_floats():
+    missing = apply_table_schema(PLACES, _places(ENTRANCE_FEE_IN_INR=[100, None, 50]))
+    assert missing['ENTRANCE_FEE_IN_INR'].dtype == np.float32
+    assert missing['ENTRANCE_FEE_IN_INR'].isna().tolist() == [False, True, False]
+    # Fractional or out-of-int32-range values are only exact as float64
+    fractional = apply_table_schema(PLACES, _places(ENTRANCE_FEE_IN_INR=[100, 12.3, 50]))
+    assert fractional['ENTRANCE_FEE_IN_INR'].dtype == np.float64
+    assert fractional['ENTRANCE_FEE_IN_INR'].iloc[1] == 12.3
+    large = apply_table_schema(PLACES, _places(ENTRANCE_FEE_IN_INR=[100, 2 ** 40, 50]))
+    assert large['ENTRANCE_FEE_IN_INR'].dtype == np.float64
+    assert large['ENTRANCE_FEE_IN_INR'].iloc[1] == 2 ** 40
+
+
+def test_year_columns_match_by_pattern():
+    schema = TABLE_SCHEMAS["COUNTRYWISEYEARLYVISITORS"]
+    assert column_dtype(schema, '_2019') == 'int32'
+    assert column_dtype(schema, '_2019_TOTAL') is None
+    df = apply_table_schema("COUNTRYWISEYEARLYVISITORS", pd.DataFrame({
+        'COUNTRY': ['India', 'Nepal'], '_2019': [10.0, 20.0], '_2020': [5, 8], 'NOTE': [1.5, 2.5]
+    }))
+    assert df['_2019'].dtype == np.int32 and df['_2020'].dtype == np.int32
+    assert df['NOTE'].dtype == np.float64
+
+
+def test_full_loads_need_every_required_column():
+    with pytest.raises(SchemaError, match="TIME_NEEDED_TO_VISIT_IN_HRS"):
+        apply_table_schema(PLACES, _places().drop(columns='TIME_NEEDED_TO_VISIT_IN_HRS'))
+    # Projected loads only convert the columns they have
+    projected = apply_table_schema(PLACES, _places()[['NAME', 'ENTRANCE_FEE_IN_INR']], require_all=False)
+    assert projected['ENTRANCE_FEE_IN_INR'].dtype == np.int32
+
+
+def test_unknown_tables_pass_through():
+    df = _places()
+    assert apply_table_schema("OTHER", df) is df
@@ -0,0 +1,47 @@
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from rankings import RankingEngine
+from top_places import build_page_data, leaderboard_columns
+
+# A TOPPLACESTOVISIT frame without the optional ZONE and STATE columns
+PLACES = pd.DataFrame({
+    'NAME': ['Fort', 'Temple', 'Lake', 'Beach'],
+    'CITY': ['Jaipur', 'Madurai', 'Udaipur', 'Goa'],
+    'TYPE': ['Fort', 'Temple', 'Lake', 'Beach'],
+    'GOOGLE_REVIEW_RATING': [4.5, 4.7, 4.4, 4.2],
+    'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': [1.2, 0.8, 0.5, 2.0],
+    'ENTRANCE_FEE_IN_INR': [100, 0, 50, 0],
+    'TIME_NEEDED_TO_VISIT_IN_HRS': [2.0, 1.5, 1.0, 3.0]
+})
+
+
+def test_leaderboard_columns_skip_missing_state():
+    assert leaderboard_columns(PLACES) == ['NAME', 'CITY', 'TYPE']
+    assert leaderboard_columns(PLACES.assign(STATE='Goa')) == ['NAME', 'CITY', 'STATE', 'TYPE']
+
+
+def test_page_data_ranks_its_own_rows():
+    derived = build_page_data(PLACES)
+    data, rankings = derived['data'], derived['rankings']
+    # Positions on every board index the stage's own frame
+    assert data.iloc[rankings.top('popularity', n=len(PLACES))]['NAME'].tolist() == \
+        data.sort_values('popularity_score', ascending=False)['NAME'].tolist()
+    assert rankings.row_of('Lake') == data.index[data['NAME'] == 'Lake'][0]
+
+
+def _leaderboards_app(places):
+    from rankings import RankingEngine
+    from top_places import render_leaderboards
+    render_leaderboards(places, RankingEngine(places))
+
+
+def test_leaderboards_render_without_state():
+    app = AppTest.from_function(_leaderboards_app, kwargs={"places": PLACES}).run()
+    assert not app.exception
+    board = app.dataframe[0].value
+    assert 'STATE' not in board.columns
+    assert len(board) == len(PLACES)
+    # Only the type scope is offered
+    assert app.selectbox[1].options == ['All places', 'Type']
+    assert RankingEngine(PLACES).groups == ['TYPE']
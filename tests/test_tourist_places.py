@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from derived_metrics import enrich_tourist_places
+from place_browser import StaleCursorError
+from table_schemas import apply_table_schema
+from tourist_places import (BEST_MATCH, PAGE_SIZE, TABLE_NAME, browse_places, build_explorer, page_cursor,
+                            paging_mode)
+
+ROWS = 2 * PAGE_SIZE + 5
+PLACES = pd.DataFrame({
+    'NAME': [f"Temple {i}" for i in range(ROWS)],
+    'CITY': ['Madurai'] * ROWS,
+    'STATE': ['Tamil Nadu'] * ROWS,
+    'ZONE': ['Southern'] * ROWS,
+    'TYPE': ['Temple'] * ROWS,
+    'GOOGLE_REVIEW_RATING': np.linspace(3.0, 5.0, ROWS),
+    'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': np.linspace(0.1, 2.0, ROWS),
+    'ENTRANCE_FEE_IN_INR': [0] * ROWS,
+    'TIME_NEEDED_TO_VISIT_IN_HRS': [1.0] * ROWS,
+    'BEST_TIME_TO_VISIT': ['Morning'] * ROWS
+})
+
+
+def _pages(explorer, search_term, sort_label):
+    """Names of every page, following the cursors browse_places hands out"""
+    names, after = [], None
+    while True:
+        page, has_more, after = browse_places(explorer, search_term, None, None, False, sort_label, True, after)
+        names += page['NAME'].tolist()
+        if not has_more:
+            return names
+
+
+def test_best_match_pages_by_offset_and_sorts_by_keyset():
+    explorer = build_explorer(PLACES)
+    assert paging_mode(explorer, BEST_MATCH) == 'offset'
+    assert paging_mode(explorer, 'Rating') == 'keyset'
+    assert paging_mode(None, BEST_MATCH) == 'keyset'
+    assert sorted(_pages(explorer, 'temple', BEST_MATCH)) == sorted(PLACES['NAME'])
+    assert _pages(explorer, 'temple', 'Rating') == PLACES['NAME'][::-1].tolist()
+
+
+def test_best_match_without_words_keeps_offset_cursors():
+    # Nothing to rank by: rows come in table order, still paged by offset
+    assert _pages(build_explorer(PLACES), '!!', BEST_MATCH) == PLACES['NAME'].tolist()
+
+
+def test_cursor_of_a_removed_place_is_reported():
+    explorer = build_explorer(PLACES)
+    _, _, after = browse_places(explorer, '', None, None, False, 'Rating', True, None)
+    # The table is reloaded without the place the first page ended on
+    reloaded = build_explorer(PLACES[PLACES['NAME'] != after['NAME']].reset_index(drop=True))
+    with pytest.raises(StaleCursorError):
+        browse_places(reloaded, '', None, None, False, 'Rating', True, after)
+    # A cursor whose place is still there continues after it
+    first = page_cursor(PLACES.iloc[0], 'GOOGLE_REVIEW_RATING')
+    page, _, _ = browse_places(reloaded, '', None, None, False, 'Rating', False, first)
+    assert page['NAME'][0] == 'Temple 1'
+
+
+# One place as the page loads it: converted to the table's declared dtypes
+PLACE = apply_table_schema(TABLE_NAME, pd.DataFrame({
+    'NAME': ['Hawa Mahal'],
+    'ZONE': ['Northern'],
+    'STATE': ['Rajasthan'],
+    'CITY': ['Jaipur'],
+    'TYPE': ['Palace'],
+    'TIME_NEEDED_TO_VISIT_IN_HRS': [2.3],
+    'ENTRANCE_FEE_IN_INR': [50],
+    'GOOGLE_REVIEW_RATING': [4.7],
+    'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': [1.2],
+    'DSLR_ALLOWED': ['Yes'],
+    'BEST_TIME_TO_VISIT': ['Evening'],
+    'IMAGE_URL': [None]
+}), require_all=False)
+
+
+def _details_app(place):
+    from tourist_places import render_place_details
+    render_place_details(place)
+
+
+def _insights_app(kpis):
+    from tourist_places import render_key_insights
+    render_key_insights(kpis)
+
+
+def test_place_details_show_values_as_stored():
+    app = AppTest.from_function(_details_app, kwargs={"place": PLACE.iloc[0]}).run()
+    assert not app.exception
+    text = [element.value for element in app.markdown]
+    assert "⏱️ **Time needed:** 2.3 hours" in text
+    assert "⭐ **Rating:** 4.7/5" in text
+    assert "💰 **Entrance Fee:** ₹50" in text
+
+
+def test_key_insights_show_the_top_rating_as_stored():
+    app = AppTest.from_function(_insights_app, kwargs={"kpis": enrich_tourist_places(PLACE)['kpis']}).run()
+    assert not app.exception
+    assert app.metric[1].delta == "4.7⭐ - Jaipur"
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from visitor_analytics import compute_visitor_trends
+
+
+def _visitors():
+    return pd.DataFrame({
+        "COUNTRY": ["A", "B", "C"],
+        "_2018": [100.0, 0.0, np.nan],
+        "_2019": [200.0, 50.0, 10.0],
+        "_2020": [50.0, np.nan, 20.0]
+    })
+
+
+def test_growth_is_nan_on_zero_or_missing_base():
+    trends = compute_visitor_trends(_visitors())
+    growth = trends["yoy_growth"]
+    assert growth.loc["A"].tolist() == [100.0, -75.0]
+    assert np.isnan(growth.loc["B", "_2019"]) and np.isnan(growth.loc["B", "_2020"])
+    assert np.isnan(growth.loc["C", "_2019"]) and growth.loc["C", "_2020"] == 100.0
+
+
+def test_covid_change_and_rank():
+    trends = compute_visitor_trends(_visitors())
+    assert trends["covid_change"]["A"] == -75.0
+    assert trends["overall_covid_change"] == (70.0 - 260.0) / 260.0 * 100
+    assert trends["rank"].tolist() == [1, 2, 3]
+
+
+def test_rolling_average_matches_pandas():
+    rng = np.random.default_rng(3)
+    values = rng.uniform(0, 100, (40, 12))
+    values[rng.random(values.shape) < 0.2] = np.nan
+    df = pd.DataFrame(values, columns=[f"_{2000 + i}" for i in range(12)])
+    df.insert(0, "COUNTRY", [f"C{i}" for i in range(40)])
+    rolling = compute_visitor_trends(df, rolling_window=4)["rolling_avg"]
+    expected = pd.DataFrame(values.T).rolling(4, min_periods=1).mean().T.to_numpy()
+    np.testing.assert_allclose(rolling.to_numpy(), expected, rtol=1e-9, equal_nan=True)
@@ -2,43 +2,99 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from config import get_table_data
+from config import (get_derived_data, get_aggregate_data, get_histogram_data, get_top_k_data, get_table_columns,
+                    render_figure, data_version, prepare_scatter, fragment, timed_render)
+from derived_metrics import enrich_top_places, popularity_score
+from rankings import RankingEngine
+
+TABLE_NAME = "TOPPLACESTOVISIT"
+PAGE_KEY = "top_places"
+
+# Columns this page needs from Snowflake
+PAGE_COLUMNS = [
+    'NAME', 'CITY', 'TYPE', 'GOOGLE_REVIEW_RATING', 'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
+    'ENTRANCE_FEE_IN_INR', 'TIME_NEEDED_TO_VISIT_IN_HRS'
+]
+
+# Per-type rating mean and review total, computed in Snowflake
+TYPE_RATINGS = {
+    "group_by": ['TYPE'],
+    "measures": {
+        "GOOGLE_REVIEW_RATING": ("mean", 'GOOGLE_REVIEW_RATING'),
+        "NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS": ("sum", 'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS')
+    }
+}
+
+# Rating histogram bins (0.25 stars wide)
+RATING_BINS = [step / 4 for step in range(21)]
+
+# Most popular places charted, ranked by popularity_score
+POPULAR_COUNT = 10
+POPULAR_COLUMNS = ['NAME', 'CITY', 'GOOGLE_REVIEW_RATING', 'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS']
+
+# Columns fetched only if the table has them (they add per-zone and per-state leaderboards)
+OPTIONAL_COLUMNS = ['ZONE', 'STATE']
+
+def page_columns():
+    """PAGE_COLUMNS plus whichever optional columns the table has"""
+    available = get_table_columns(TABLE_NAME) or []
+    return PAGE_COLUMNS + [column for column in OPTIONAL_COLUMNS if column in available]
+
+# Leaderboard page size and the columns listed for each place
+LEADERBOARD_PAGE_SIZE = 10
+LEADERBOARD_COLUMNS = ['NAME', 'CITY', 'STATE', 'TYPE']
+
+def leaderboard_columns(df):
+    """LEADERBOARD_COLUMNS the frame has (STATE is optional)"""
+    return [column for column in LEADERBOARD_COLUMNS if column in df.columns]
+
+# Leaderboard scopes: {label: grouping column (None ranks all places)}
+LEADERBOARD_SCOPES = {'All places': None, 'Type': 'TYPE', 'Zone': 'ZONE', 'State': 'STATE'}
+
+def build_page_data(df):
+    """Scored page rows and their leaderboards (every score, overall and per type, zone and state)"""
+    derived = enrich_top_places(df)
+    return {**derived, 'rankings': RankingEngine(derived['data'])}
+
+def load_data():
+    """Fetch the page data with numeric types, scores and leaderboards precomputed once per data version
+
+    The leaderboards return row positions, so they must come from the same
+    frame as the rows; one stage keeps them on one version.
+    """
+    return get_derived_data(TABLE_NAME, 'top_places', build_page_data, columns=page_columns())
+
+def prefetch_data():
+    """Warm the page data and aggregates ahead of the first visit"""
+    derived = load_data()
+    if derived is not None:
+        get_aggregate_data(TABLE_NAME, TYPE_RATINGS, fallback_df=derived['data'])
+        get_histogram_data(TABLE_NAME, 'GOOGLE_REVIEW_RATING', RATING_BINS, fallback_df=derived['data'])
+        load_most_popular(derived['data'])
+    return derived
+
+def load_most_popular(df):
+    """The POPULAR_COUNT places with the highest popularity score"""
+    return get_top_k_data(TABLE_NAME, POPULAR_COUNT, popularity_score, 'popularity_score', POPULAR_COLUMNS,
+                          fallback_df=df)
 
 def show_top_places_analysis():
     """Display top places to visit analysis"""
     # Fetch data
-    df = get_table_data("TOPPLACESTOVISIT")
-    if df is not None:
+    derived = load_data()
+    if derived is not None:
         # Create visualizations
-        create_top_places_visualizations(df)
+        create_top_places_visualizations(derived['data'], derived['rankings'])
 
-def create_top_places_visualizations(df):
-    """Create visualizations for top places data"""
+def create_top_places_visualizations(df, rankings):
+    """Create visualizations for top places data (read-only; scores and leaderboards come precomputed)"""
     st.title("🏆 India's Top-Rated Tourist Attractions")
     st.markdown("---")
     
-    # Convert numeric columns to proper data types
-    df['GOOGLE_REVIEW_RATING'] = pd.to_numeric(df['GOOGLE_REVIEW_RATING'], errors='coerce')
-    df['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'] = pd.to_numeric(df['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'], errors='coerce')
-    df['ENTRANCE_FEE_IN_INR'] = pd.to_numeric(df['ENTRANCE_FEE_IN_INR'], errors='coerce')
-    df['TIME_NEEDED_TO_VISIT_IN_HRS'] = pd.to_numeric(df['TIME_NEEDED_TO_VISIT_IN_HRS'], errors='coerce')
-    
-    # Create a ranking summary at the top
-    st.subheader("🎖️ Top 5 Most Popular Places")
-    
-    # Calculate rankings based on different metrics with proper numeric types
-    df['popularity_score'] = df['GOOGLE_REVIEW_RATING'] * df['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS']
-    top_places = df.nlargest(5, 'popularity_score')
-    
-    # Display top 5 places in an enhanced format
-    for idx, place in top_places.iterrows():
-        col1, col2, col3 = st.columns([0.4, 0.3, 0.3])
-        with col1:
-            st.markdown(f"**{place['NAME']}**")
-        with col2:
-            st.markdown(f"⭐ {place['GOOGLE_REVIEW_RATING']:.1f}/5")
-        with col3:
-            st.markdown(f"👥 {place['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS']:.1f}L reviews")
+    # Leaderboards and rank lookups rerun on their own as a fragment
+    st.subheader("🎖️ Leaderboards")
+    if rankings is not None:
+        render_leaderboards(df, rankings)
     
     st.markdown("---")
     
@@ -46,106 +102,27 @@ def create_top_places_visualizations(df):
     col1, col2 = st.columns(2)
     
     with col1:
-        # Enhanced Rating Distribution
-        fig_rating = px.histogram(
-            df[df['GOOGLE_REVIEW_RATING'].notna()],
-            x='GOOGLE_REVIEW_RATING',
-            title='Rating Distribution of Tourist Places',
-            template='plotly_white',
-            nbins=20,
-            color_discrete_sequence=['#3498db']
-        )
-        fig_rating.update_layout(
-            height=400,
-            title_x=0.5,
-            title_font_size=20,
-            showlegend=False,
-            xaxis_title='Rating ⭐',
-            yaxis_title='Number of Places',
-            bargap=0.1
-        )
-        st.plotly_chart(fig_rating, use_container_width=True)
+        rating_histogram = get_histogram_data(TABLE_NAME, 'GOOGLE_REVIEW_RATING', RATING_BINS, fallback_df=df)
+        if rating_histogram is not None:
+            render_figure(TABLE_NAME, PAGE_KEY, 'rating_histogram', lambda: build_rating_histogram(rating_histogram),
+                          version=data_version(rating_histogram))
 
     with col2:
-        # Price vs Rating Analysis
-        fig_scatter = px.scatter(
-            df[df['ENTRANCE_FEE_IN_INR'].notna() & df['GOOGLE_REVIEW_RATING'].notna()],
-            x='ENTRANCE_FEE_IN_INR',
-            y='GOOGLE_REVIEW_RATING',
-            color='TYPE',
-            size='NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
-            hover_data=['NAME', 'CITY'],
-            title='Price vs Rating Analysis',
-            template='plotly_white',
-            labels={
-                'ENTRANCE_FEE_IN_INR': 'Entrance Fee (₹)',
-                'GOOGLE_REVIEW_RATING': 'Rating',
-                'TYPE': 'Place Type'
-            }
-        )
-        fig_scatter.update_layout(
-            height=400,
-            title_x=0.5,
-            title_font_size=20,
-            showlegend=True
-        )
-        st.plotly_chart(fig_scatter, use_container_width=True)
+        render_figure(TABLE_NAME, PAGE_KEY, 'price_rating_scatter', lambda: build_price_rating_scatter(df), version=data_version(df))
 
     # Create two more columns
     col3, col4 = st.columns(2)
     
     with col3:
         # Top Places by Type
-        type_avg_rating = df.groupby('TYPE').agg({
-            'GOOGLE_REVIEW_RATING': 'mean',
-            'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': 'sum'
-        }).reset_index()
+        type_avg_rating = get_aggregate_data(TABLE_NAME, TYPE_RATINGS, fallback_df=df)
         
-        fig_bubble = px.scatter(
-            type_avg_rating,
-            x='GOOGLE_REVIEW_RATING',
-            y='NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
-            size='NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
-            color='TYPE',
-            title='Place Types: Rating vs Popularity',
-            template='plotly_white',
-            labels={
-                'GOOGLE_REVIEW_RATING': 'Average Rating',
-                'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': 'Total Reviews (Lakhs)',
-                'TYPE': 'Place Type'
-            }
-        )
-        fig_bubble.update_layout(
-            height=400,
-            title_x=0.5,
-            title_font_size=20
-        )
-        st.plotly_chart(fig_bubble, use_container_width=True)
+        if type_avg_rating is not None:
+            render_figure(TABLE_NAME, PAGE_KEY, 'type_bubble', lambda: build_type_bubble(type_avg_rating),
+                          version=data_version(type_avg_rating))
         
     with col4:
-        # Visit Duration vs Popularity
-        fig_duration = px.scatter(
-            df[df['TIME_NEEDED_TO_VISIT_IN_HRS'].notna()],
-            x='TIME_NEEDED_TO_VISIT_IN_HRS',
-            y='NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
-            color='GOOGLE_REVIEW_RATING',
-            size='NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
-            hover_data=['NAME', 'TYPE'],
-            title='Visit Duration vs Popularity',
-            template='plotly_white',
-            labels={
-                'TIME_NEEDED_TO_VISIT_IN_HRS': 'Time Needed (Hours)',
-                'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': 'Number of Reviews (Lakhs)',
-                'GOOGLE_REVIEW_RATING': 'Rating'
-            }
-        )
-        fig_duration.update_layout(
-            height=400,
-            title_x=0.5,
-            title_font_size=20,
-            coloraxis_colorbar_title='Rating'
-        )
-        st.plotly_chart(fig_duration, use_container_width=True)
+        render_figure(TABLE_NAME, PAGE_KEY, 'duration_scatter', lambda: build_duration_scatter(df), version=data_version(df))
 
     # Rankings Section
     st.markdown("## 🏅 Rankings & Analytics")
@@ -154,28 +131,238 @@ def create_top_places_visualizations(df):
     col5, col6, col7 = st.columns(3)
     
     with col5:
-        # Ensure we don't divide by zero
-        df['value_score'] = df['ENTRANCE_FEE_IN_INR'].div(df['GOOGLE_REVIEW_RATING'].replace(0, float('nan')))
-        best_value = df.loc[df['value_score'].idxmin()]
-        st.metric(
-            "Best Value for Money 💰",
-            best_value['NAME'],
-            f"₹{best_value['ENTRANCE_FEE_IN_INR']:.0f} | ⭐{best_value['GOOGLE_REVIEW_RATING']:.1f}"
-        )
+        best_value = _best_place(df, rankings, 'value')
+        if best_value is not None:
+            st.metric(
+                "Best Value for Money 💰",
+                best_value['NAME'],
+                f"₹{best_value['ENTRANCE_FEE_IN_INR']:.0f} | ⭐{best_value['GOOGLE_REVIEW_RATING']:.1f}"
+            )
         
     with col6:
-        highest_rated_type = type_avg_rating.loc[type_avg_rating['GOOGLE_REVIEW_RATING'].idxmax()]
-        st.metric(
-            "Most Popular Category 🌟",
-            highest_rated_type['TYPE'],
-            f"⭐ {highest_rated_type['GOOGLE_REVIEW_RATING']:.2f} avg rating"
-        )
+        if type_avg_rating is not None and type_avg_rating['GOOGLE_REVIEW_RATING'].notna().any():
+            highest_rated_type = type_avg_rating.loc[type_avg_rating['GOOGLE_REVIEW_RATING'].idxmax()]
+            st.metric(
+                "Most Popular Category 🌟",
+                highest_rated_type['TYPE'],
+                f"⭐ {highest_rated_type['GOOGLE_REVIEW_RATING']:.2f} avg rating"
+            )
         
     with col7:
-        df['time_efficiency'] = df['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'].div(df['TIME_NEEDED_TO_VISIT_IN_HRS'].replace(0, float('nan')))
-        most_time_efficient = df.loc[df['time_efficiency'].idxmax()]
-        st.metric(
-            "Most Time-Efficient Visit ⏱️",
-            most_time_efficient['NAME'],
-            f"{most_time_efficient['TIME_NEEDED_TO_VISIT_IN_HRS']:.1f} hrs | {most_time_efficient['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS']:.1f}L reviews"
-        )
\ No newline at end of file
+        most_time_efficient = _best_place(df, rankings, 'time_efficiency')
+        if most_time_efficient is not None:
+            st.metric(
+                "Most Time-Efficient Visit ⏱️",
+                most_time_efficient['NAME'],
+                f"{most_time_efficient['TIME_NEEDED_TO_VISIT_IN_HRS']:.1f} hrs | {most_time_efficient['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS']:.1f}L reviews"
+            )
+
+    # Running top-k by popularity (streamed when the table is not loaded)
+    most_popular = load_most_popular(df)
+    if most_popular is not None and not most_popular.empty:
+        render_figure(TABLE_NAME, PAGE_KEY, 'popularity_bar', lambda: build_popularity_bar(most_popular),
+                      version=data_version(most_popular))
+
+def _best_place(df, rankings, score):
+    """Row of the place ranked first for a score, or None"""
+    rows = rankings.top(score) if rankings is not None else []
+    return df.iloc[rows[0]] if len(rows) else None
+
+def _set_leaderboard_offset(offset):
+    st.session_state['leaderboard_offset'] = max(0, offset)
+
+@fragment
+def render_leaderboards(df, rankings):
+    """Paginated leaderboard for a score and scope, plus a place's ranks (reruns on its own as a fragment)"""
+    with timed_render("leaderboard_fragment"):
+        labels = rankings.labels()
+        scopes = {label: group for label, group in LEADERBOARD_SCOPES.items()
+                  if group is None or group in rankings.groups}
+        score_col, scope_col, value_col = st.columns(3)
+        with score_col:
+            score = st.selectbox("Rank by", list(labels), format_func=labels.get)
+        with scope_col:
+            group = scopes[st.selectbox("Within", list(scopes))]
+        value = None
+        if group is not None:
+            with value_col:
+                value = st.selectbox(group.title(), rankings.group_values(group))
+
+        # Start from the top whenever the board changes
+        board_key = (score, group, value)
+        if st.session_state.get('leaderboard_key') != board_key:
+            st.session_state['leaderboard_key'] = board_key
+            st.session_state['leaderboard_offset'] = 0
+        offset = st.session_state['leaderboard_offset']
+
+        rows, ranks, scores, total = rankings.leaderboard(score, group, value, offset, LEADERBOARD_PAGE_SIZE)
+        if not len(rows):
+            st.info("No ranked places on this leaderboard.")
+        else:
+            board = df.iloc[rows][leaderboard_columns(df)].reset_index(drop=True)
+            board.insert(0, 'Rank', ranks)
+            board[labels[score]] = scores.round(3)
+            st.dataframe(board, hide_index=True, use_container_width=True)
+
+        prev_col, page_col, next_col = st.columns([1, 2, 1])
+        with prev_col:
+            st.button("◀ Previous", key="leaderboard_prev", disabled=offset == 0,
+                      on_click=_set_leaderboard_offset, args=(offset - LEADERBOARD_PAGE_SIZE,))
+        with page_col:
+            st.caption(f"Places {min(offset + 1, total)}–{min(offset + LEADERBOARD_PAGE_SIZE, total)} of {total}")
+        with next_col:
+            st.button("Next ▶", key="leaderboard_next", disabled=offset + LEADERBOARD_PAGE_SIZE >= total,
+                      on_click=_set_leaderboard_offset, args=(offset + LEADERBOARD_PAGE_SIZE,))
+
+        # A place's rank on every board, looked up by exact name
+        place_name = st.text_input("🔎 Look up a place's ranks", "", help="Enter the exact place name")
+        if place_name:
+            row = rankings.row_of(place_name.strip())
+            if row is None:
+                st.info(f"No place named {place_name!r}.")
+            else:
+                place = df.iloc[row]
+                lookup = []
+                for name, label in labels.items():
+                    entry = {'Score': label}
+                    for scope_label, scope_group in scopes.items():
+                        rank = rankings.rank_of(row, name, scope_group)
+                        column = scope_label if scope_group is None else f"{scope_label}: {place[scope_group]}"
+                        entry[column] = f"#{rank[0]} of {rank[1]}" if rank is not None else "–"
+                    lookup.append(entry)
+                st.dataframe(pd.DataFrame(lookup), hide_index=True, use_container_width=True)
+
+def build_rating_histogram(histogram):
+    """Rating distribution histogram from per-bin counts"""
+    fig_rating = go.Figure(go.Bar(
+        x=(histogram['bin_start'] + histogram['bin_end']) / 2,
+        y=histogram['count'],
+        marker_color='#3498db',
+        customdata=histogram[['bin_start', 'bin_end']],
+        hovertemplate='Rating %{customdata[0]:.2f}–%{customdata[1]:.2f}<br>%{y} places<extra></extra>'
+    ))
+    fig_rating.update_layout(
+        title='Rating Distribution of Tourist Places',
+        template='plotly_white',
+        height=400,
+        title_x=0.5,
+        title_font_size=20,
+        showlegend=False,
+        xaxis_title='Rating ⭐',
+        yaxis_title='Number of Places',
+        bargap=0.1
+    )
+    return fig_rating
+
+def build_popularity_bar(most_popular):
+    """Most popular places by rating x review volume"""
+    fig_popular = px.bar(
+        most_popular.iloc[::-1],
+        x='popularity_score',
+        y='NAME',
+        orientation='h',
+        hover_data=['CITY', 'GOOGLE_REVIEW_RATING', 'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'],
+        title=f'Top {POPULAR_COUNT} Most Popular Places',
+        template='plotly_white',
+        color_discrete_sequence=['#e67e22'],
+        labels={
+            'popularity_score': 'Popularity (rating × lakh reviews)',
+            'NAME': 'Place',
+            'CITY': 'City',
+            'GOOGLE_REVIEW_RATING': 'Rating',
+            'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': 'Reviews (Lakhs)'
+        }
+    )
+    fig_popular.update_layout(
+        height=400,
+        title_x=0.5,
+        title_font_size=20
+    )
+    return fig_popular
+
+def build_price_rating_scatter(df):
+    """Price vs Rating Analysis"""
+    data, render_mode = prepare_scatter(
+        df[df['ENTRANCE_FEE_IN_INR'].notna() & df['GOOGLE_REVIEW_RATING'].notna()],
+        'ENTRANCE_FEE_IN_INR', 'GOOGLE_REVIEW_RATING',
+        ['TYPE', 'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS', 'NAME', 'CITY'],
+        precision={'GOOGLE_REVIEW_RATING': 1}
+    )
+    fig_scatter = px.scatter(
+        data,
+        x='ENTRANCE_FEE_IN_INR',
+        y='GOOGLE_REVIEW_RATING',
+        color='TYPE',
+        size='NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
+        hover_data=['NAME', 'CITY'],
+        title='Price vs Rating Analysis',
+        template='plotly_white',
+        render_mode=render_mode,
+        labels={
+            'ENTRANCE_FEE_IN_INR': 'Entrance Fee (₹)',
+            'GOOGLE_REVIEW_RATING': 'Rating',
+            'TYPE': 'Place Type'
+        }
+    )
+    fig_scatter.update_layout(
+        height=400,
+        title_x=0.5,
+        title_font_size=20,
+        showlegend=True
+    )
+    return fig_scatter
+
+def build_type_bubble(type_avg_rating):
+    """Place types: rating vs popularity"""
+    fig_bubble = px.scatter(
+        type_avg_rating,
+        x='GOOGLE_REVIEW_RATING',
+        y='NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
+        size='NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
+        color='TYPE',
+        title='Place Types: Rating vs Popularity',
+        template='plotly_white',
+        labels={
+            'GOOGLE_REVIEW_RATING': 'Average Rating',
+            'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': 'Total Reviews (Lakhs)',
+            'TYPE': 'Place Type'
+        }
+    )
+    fig_bubble.update_layout(
+        height=400,
+        title_x=0.5,
+        title_font_size=20
+    )
+    return fig_bubble
+
+def build_duration_scatter(df):
+    """Visit Duration vs Popularity"""
+    data, render_mode = prepare_scatter(
+        df[df['TIME_NEEDED_TO_VISIT_IN_HRS'].notna()],
+        'TIME_NEEDED_TO_VISIT_IN_HRS', 'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
+        ['GOOGLE_REVIEW_RATING', 'NAME', 'TYPE'],
+        precision={'GOOGLE_REVIEW_RATING': 1, 'TIME_NEEDED_TO_VISIT_IN_HRS': 1}
+    )
+    fig_duration = px.scatter(
+        data,
+        x='TIME_NEEDED_TO_VISIT_IN_HRS',
+        y='NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
+        color='GOOGLE_REVIEW_RATING',
+        size='NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
+        hover_data=['NAME', 'TYPE'],
+        title='Visit Duration vs Popularity',
+        template='plotly_white',
+        render_mode=render_mode,
+        labels={
+            'TIME_NEEDED_TO_VISIT_IN_HRS': 'Time Needed (Hours)',
+            'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': 'Number of Reviews (Lakhs)',
+            'GOOGLE_REVIEW_RATING': 'Rating'
+        }
+    )
+    fig_duration.update_layout(
+        height=400,
+        title_x=0.5,
+        title_font_size=20,
+        coloraxis_colorbar_title='Rating'
+    )
+    return fig_duration
@@ -1,211 +1,261 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from config import get_table_data
+from config import (get_table_data, get_table_page, get_aggregate_data, get_derived_data, get_figure, render_figure,
+                    data_version, prepare_scatter, fragment, timed_render, get_place_image, prefetch_place_images)
+from derived_metrics import enrich_tourist_places, FEE_RANGE_BINS, FEE_RANGE_LABELS
+from place_search import PlaceSearchIndex
+from place_browser import PlaceBrowserIndex, StaleCursorError, SORT_COLUMNS, KEY_COLUMN, PAGE_SIZE
+from place_similarity import SimilarPlacesIndex
+
+TABLE_NAME = "INDIAFAMOUSTOURISTPLACES"
+PAGE_KEY = "tourist_places"
+
+# Columns the charts and insights need (IMAGE_URL and other detail-only columns are left out)
+CHART_COLUMNS = [
+    'NAME', 'ZONE', 'STATE', 'CITY', 'TYPE', 'GOOGLE_REVIEW_RATING',
+    'TIME_NEEDED_TO_VISIT_IN_HRS', 'ENTRANCE_FEE_IN_INR',
+    'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS', 'BEST_TIME_TO_VISIT'
+]
+
+# Columns shown for the single selected place
+DETAIL_COLUMNS = [
+    'NAME', 'ZONE', 'STATE', 'CITY', 'TIME_NEEDED_TO_VISIT_IN_HRS',
+    'ENTRANCE_FEE_IN_INR', 'GOOGLE_REVIEW_RATING', 'DSLR_ALLOWED',
+    'BEST_TIME_TO_VISIT', 'IMAGE_URL'
+]
+
+# Chart aggregates computed in Snowflake (see aggregates.py for the spec format)
+ZONE_TYPE_COUNTS = {
+    "group_by": ['ZONE', 'TYPE'],
+    "measures": {"count": ("count", None)}
+}
+
+FEE_RANGE_COUNTS = {
+    "group_by": [],
+    "measures": {"count": ("count", None)},
+    "bucket": {
+        "column": 'ENTRANCE_FEE_IN_INR',
+        "name": 'Fee_Range',
+        "bins": FEE_RANGE_BINS,
+        "labels": FEE_RANGE_LABELS
+    }
+}
+
+BEST_TIME_COUNTS = {
+    "group_by": ['BEST_TIME_TO_VISIT'],
+    "measures": {"count": ("count", None)}
+}
+
+# Columns indexed for the explorer's search box
+SEARCH_COLUMNS = ['NAME', 'CITY', 'STATE', 'TYPE']
+
+# Columns listed for each place on a browser page
+BROWSER_COLUMNS = [
+    'NAME', 'CITY', 'STATE', 'TYPE', 'GOOGLE_REVIEW_RATING',
+    'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS', 'ENTRANCE_FEE_IN_INR'
+]
+
+# Sort option ranking search results by how well they match
+BEST_MATCH = 'Best match'
+
+# Similar places shown for the selected place, and where they may come from
+SIMILAR_COUNT = 5
+SIMILAR_COLUMNS = [
+    'NAME', 'CITY', 'STATE', 'TYPE', 'GOOGLE_REVIEW_RATING',
+    'ENTRANCE_FEE_IN_INR', 'TIME_NEEDED_TO_VISIT_IN_HRS'
+]
+SIMILARITY_SCOPES = {'Anywhere': 'all', 'Same zone': 'ZONE', 'Same state': 'STATE'}
+
+def explorer_filters(search_term, zone, place_type):
+    """Filters pushed down to Snowflake for the place explorer (used if the search index is unavailable)"""
+    return [
+        ('NAME', 'contains', search_term),
+        ('ZONE', 'eq', zone),
+        ('TYPE', 'eq', place_type)
+    ]
+
+def load_data():
+    """Fetch the chart data with numeric review counts, fee ranges and KPIs precomputed once per data version"""
+    return get_derived_data(TABLE_NAME, 'tourist_places', enrich_tourist_places, columns=CHART_COLUMNS)
+
+def build_explorer(df):
+    """Explorer rows with their search index and browser orders"""
+    return {
+        'data': df,
+        'search': PlaceSearchIndex(df),
+        'browser': PlaceBrowserIndex(df)
+    }
+
+def load_explorer():
+    """Explorer data and indexes, built together once per data version
+
+    The indexes return row positions, so they must come from the same frame
+    as the rows they index; one stage keeps them on one version.
+    """
+    return get_derived_data(TABLE_NAME, 'place_explorer', build_explorer, columns=CHART_COLUMNS)
+
+def load_similar_places(explorer):
+    """Similar-place lists over the explorer's rows, built once per data version
+
+    A stage of its own, keyed to the version of the explorer's rows: the
+    neighbour lists take far longer to build than the search index, and
+    search should not wait for them.
+    """
+    return get_derived_data(TABLE_NAME, 'similar_places', SimilarPlacesIndex, source=explorer['data'])
+
+def filter_mask(df, zone, place_type):
+    """Boolean mask of rows in the chosen zone and type, or None when neither is chosen"""
+    mask = None
+    for column, value in (('ZONE', zone), ('TYPE', place_type)):
+        if value is not None:
+            matches = (df[column] == value).to_numpy()
+            mask = matches if mask is None else mask & matches
+    return mask
+
+def match_places(explorer, search_term, zone, place_type, fuzzy=False):
+    """Boolean mask of rows matching the explorer inputs, or None when nothing filters"""
+    mask = filter_mask(explorer['data'], zone, place_type)
+    text_mask = explorer['search'].match_mask(search_term, fuzzy, allowed=mask)
+    return mask if text_mask is None else text_mask
+
+def _plain(value):
+    """Python scalar for a numpy value (None for missing), as a query parameter"""
+    if pd.isna(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+def page_cursor(row, sort_column):
+    """Keyset cursor continuing a listing after row"""
+    return {sort_column: _plain(row[sort_column]), KEY_COLUMN: row[KEY_COLUMN]}
+
+def paging_mode(explorer, sort_label):
+    """How the place browser pages: 'offset' through the search ranking or 'keyset' by sort column"""
+    return 'offset' if explorer is not None and sort_label == BEST_MATCH else 'keyset'
+
+def browse_places(explorer, search_term, zone, place_type, fuzzy, sort_label, descending, after):
+    """One page of matching places: (page frame, whether more follow, cursor after it)
+
+    Pages come from the in-memory explorer indexes when they are available and
+    from a keyset query in Snowflake otherwise. "Best match" pages through the
+    search ranking by offset; after is a cursor of the kind paging_mode()
+    names for the same inputs. Raises StaleCursorError when a keyset cursor's
+    place has left the in-memory rows.
+    """
+    if explorer is None:
+        sort_column = SORT_COLUMNS.get(sort_label, SORT_COLUMNS['Rating'])
+        page, has_more = get_table_page(
+            TABLE_NAME, BROWSER_COLUMNS, sort_column, KEY_COLUMN, descending, after, PAGE_SIZE,
+            filters=explorer_filters(search_term, zone, place_type)
+        )
+        if page is None or page.empty:
+            return page, False, None
+        return page, has_more, page_cursor(page.iloc[-1], sort_column)
+
+    df = explorer['data']
+    if paging_mode(explorer, sort_label) == 'offset':
+        # Rank only as far as this page (plus one row to tell whether another follows)
+        start = after or 0
+        mask = filter_mask(df, zone, place_type)
+        positions = explorer['search'].search(search_term, limit=start + PAGE_SIZE + 1, fuzzy=fuzzy, allowed=mask)
+        if positions is None:
+            # Nothing to rank by (no words in the search text): matching rows in table order
+            positions = np.flatnonzero(mask) if mask is not None else np.arange(len(df))
+        rows, has_more = positions[start:start + PAGE_SIZE], len(positions) > start + PAGE_SIZE
+        next_cursor = start + PAGE_SIZE
+    else:
+        mask = match_places(explorer, search_term, zone, place_type, fuzzy)
+        sort_column = SORT_COLUMNS.get(sort_label, SORT_COLUMNS['Rating'])
+        rows, has_more = explorer['browser'].page(sort_column, descending, after, mask, PAGE_SIZE)
+        next_cursor = page_cursor(df.iloc[rows[-1]], sort_column) if len(rows) else None
+    return df.iloc[rows][BROWSER_COLUMNS].reset_index(drop=True), has_more, next_cursor
+
+def _browser_state(query):
+    """Cursor stack of the place browser in this session, reset when its query changes
+
+    The query includes the paging mode, so an offset cursor is never passed
+    to a keyset listing (or the other way round) when the sort or the
+    availability of the in-memory indexes changes.
+    """
+    state = st.session_state.get('place_browser')
+    if state is None or state['query'] != query:
+        state = {'query': query, 'cursors': [None]}
+        st.session_state['place_browser'] = state
+    return state
+
+def _next_page(state, cursor):
+    state['cursors'].append(cursor)
+
+def _previous_page(state):
+    if len(state['cursors']) > 1:
+        state['cursors'].pop()
+
+def prefetch_data():
+    """Warm the chart data, aggregates and static figures ahead of the first visit"""
+    derived = load_data()
+    if derived is not None:
+        for spec in (ZONE_TYPE_COUNTS, FEE_RANGE_COUNTS, BEST_TIME_COUNTS):
+            get_aggregate_data(TABLE_NAME, spec, fallback_df=derived['data'])
+        for chart_id, build in static_charts().items():
+            get_figure(TABLE_NAME, PAGE_KEY, chart_id, lambda build=build: build(derived['data']),
+                       version=data_version(derived['data']))
+        explorer = load_explorer()
+        if explorer is not None:
+            load_similar_places(explorer)
+    return derived
 
 def show_tourist_places_analysis():
     """Display India's famous tourist places analysis"""
     # Fetch data
-    df = get_table_data("INDIAFAMOUSTOURISTPLACES")
-    if df is not None:
+    derived = load_data()
+    if derived is not None:
         # Create visualizations
-        create_tourist_places_visualizations(df)
+        create_tourist_places_visualizations(derived['data'], derived['kpis'])
 
-def create_tourist_places_visualizations(df):
-    """Create visualizations for tourist places data"""
+def static_charts():
+    """Charts that only depend on the chart data: {chart id: build(df)}"""
+    return {
+        'rating_scatter': build_rating_scatter,
+        'zone_types_bar': build_zone_types_bar,
+        'fee_pie': build_fee_pie,
+        'best_time_donut': build_best_time_donut
+    }
+
+def create_tourist_places_visualizations(df, kpis):
+    """Create visualizations for tourist places data (read-only; derived columns come precomputed, figures are cached)"""
     st.title("🗺️ India's Famous Tourist Places Analysis")
     st.markdown("---")
     
     # Interactive Place Selector with Enhanced Layout
     st.subheader("🔍 Explore Tourist Destinations")
     
-    # Add a search filter with better styling
-    search_term = st.text_input("🔎 Search Places", "", help="Type to filter places by name")
-    filtered_df = df[df['NAME'].str.contains(search_term, case=False)] if search_term else df
-    
-    col1, col2 = st.columns([1, 2])
-    
-    with col1:
-        selected_place = st.selectbox(
-            "Select a Tourist Place",
-            filtered_df['NAME'].tolist()
-        )
-        
-        place_data = df[df['NAME'] == selected_place].iloc[0]
-        
-        # Enhanced place details display with cards
-        st.markdown("""
-        <style>
-        .info-card {
-            padding: 15px;
-            border-radius: 10px;
-            margin-bottom: 10px;
-            background-color: #f0f2f6;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-        
-        with st.container():
-            st.markdown('<div class="info-card">', unsafe_allow_html=True)
-            st.markdown("### 📌 Location Details")
-            st.write(f"🌍 **Zone:** {place_data['ZONE']}")
-            st.write(f"📍 **State:** {place_data['STATE']}")
-            st.write(f"🏙️ **City:** {place_data['CITY']}")
-            st.markdown('</div>', unsafe_allow_html=True)
-        
-        with st.container():
-            st.markdown('<div class="info-card">', unsafe_allow_html=True)
-            st.markdown("### ℹ️ Visit Information")
-            st.write(f"⏱️ **Time needed:** {place_data['TIME_NEEDED_TO_VISIT_IN_HRS']} hours")
-            st.write(f"💰 **Entrance Fee:** ₹{place_data['ENTRANCE_FEE_IN_INR']:,}")
-            st.write(f"⭐ **Rating:** {place_data['GOOGLE_REVIEW_RATING']}/5")
-            st.write(f"📸 **DSLR Allowed:** {place_data['DSLR_ALLOWED']}")
-            st.write(f"🕒 **Best Time:** {place_data['BEST_TIME_TO_VISIT']}")
-            st.markdown('</div>', unsafe_allow_html=True)
-        
-    with col2:
-        # Enhanced image display with better styling
-        if not pd.isna(place_data['IMAGE_URL']):
-            st.markdown("""
-            <style>
-            .img-container {
-                border-radius: 10px;
-                overflow: hidden;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            }
-            </style>
-            """, unsafe_allow_html=True)
-            st.markdown('<div class="img-container">', unsafe_allow_html=True)
-            st.image(place_data['IMAGE_URL'], caption=selected_place, use_column_width=True)
-            st.markdown('</div>', unsafe_allow_html=True)
+    # Only the explorer reruns while the user searches and picks places
+    render_place_explorer()
     
     # Create two columns for visualizations
     col3, col4 = st.columns(2)
     
     with col3:
-        # Enhanced Rating vs Visit Time scatter plot
-        df['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'] = pd.to_numeric(df['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'], errors='coerce')
-        
-        fig_scatter = px.scatter(
-            df,
-            x='GOOGLE_REVIEW_RATING',
-            y='TIME_NEEDED_TO_VISIT_IN_HRS',
-            color='ZONE',
-            size='NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
-            hover_data=['NAME', 'CITY', 'STATE'],
-            title='Tourist Places: Rating vs Visit Duration',
-            template='plotly_white',
-            labels={
-                'GOOGLE_REVIEW_RATING': 'Google Rating ⭐',
-                'TIME_NEEDED_TO_VISIT_IN_HRS': 'Visit Duration (hours) ⏱️',
-                'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': 'Reviews (lakhs) 👥',
-                'ZONE': 'Zone 🗺️'
-            }
-        )
-        fig_scatter.update_layout(
-            height=500,
-            title_x=0.5,
-            title_font_size=20,
-            showlegend=True,
-            legend_title_text='Zone 🗺️',
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)'
-        )
-        fig_scatter.update_traces(
-            marker=dict(line=dict(width=1, color='white')),
-            opacity=0.7
-        )
-        st.plotly_chart(fig_scatter, use_container_width=True)
+        render_figure(TABLE_NAME, PAGE_KEY, 'rating_scatter', lambda: build_rating_scatter(df), version=data_version(df))
         
     with col4:
-        # Enhanced Type distribution by Zone
-        type_zone_count = df.groupby(['ZONE', 'TYPE']).size().reset_index(name='count')
-        fig_bar = px.bar(
-            type_zone_count,
-            x='ZONE',
-            y='count',
-            color='TYPE',
-            title='Types of Tourist Places by Zone 🏛️',
-            template='plotly_white',
-            labels={
-                'count': 'Number of Places',
-                'ZONE': 'Zone',
-                'TYPE': 'Place Type'
-            },
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        fig_bar.update_layout(
-            height=500,
-            title_x=0.5,
-            title_font_size=20,
-            showlegend=True,
-            legend_title_text='Place Type',
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            bargap=0.2
-        )
-        st.plotly_chart(fig_bar, use_container_width=True)
+        render_figure(TABLE_NAME, PAGE_KEY, 'zone_types_bar', lambda: build_zone_types_bar(df), version=data_version(df))
     
     # Create two more columns
     col5, col6 = st.columns(2)
     
     with col5:
-        # Enhanced Entry Fee Analysis with ranges
-        df['Fee_Range'] = pd.cut(
-            df['ENTRANCE_FEE_IN_INR'],
-            bins=[-1, 0, 100, 500, float('inf')],
-            labels=['Free', '₹1-100', '₹101-500', '₹500+']
-        )
-        fee_dist = df['Fee_Range'].value_counts()
-        
-        fig_pie = px.pie(
-            values=fee_dist.values,
-            names=fee_dist.index,
-            title='Entry Fee Distribution 💰',
-            hole=0.6,
-            template='plotly_white',
-            color_discrete_sequence=px.colors.sequential.Viridis
-        )
-        fig_pie.update_layout(
-            height=500,
-            title_x=0.5,
-            title_font_size=20,
-            showlegend=True,
-            legend_title_text='Fee Range'
-        )
-        fig_pie.update_traces(
-            textposition='outside',
-            textinfo='percent+label',
-            pull=[0.05] * len(fee_dist)
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
+        render_figure(TABLE_NAME, PAGE_KEY, 'fee_pie', lambda: build_fee_pie(df), version=data_version(df))
         
     with col6:
-        # Enhanced Best Time Analysis
-        visit_time_dist = df['BEST_TIME_TO_VISIT'].value_counts()
-        fig_donut = px.pie(
-            values=visit_time_dist.values,
-            names=visit_time_dist.index,
-            title='Best Time to Visit Distribution 🕒',
-            hole=0.6,
-            template='plotly_white',
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        fig_donut.update_layout(
-            height=500,
-            title_x=0.5,
-            title_font_size=20,
-            showlegend=True,
-            legend_title_text='Time of Day'
-        )
-        fig_donut.update_traces(
-            textposition='outside',
-            textinfo='percent+label',
-            pull=[0.05] * len(visit_time_dist)
-        )
-        st.plotly_chart(fig_donut, use_container_width=True)
+        render_figure(TABLE_NAME, PAGE_KEY, 'best_time_donut', lambda: build_best_time_donut(df), version=data_version(df))
     
+    render_key_insights(kpis)
+
+def render_key_insights(kpis):
+    """Headline metrics from the page's KPI bundle"""
     # Enhanced insights section with better styling
     st.markdown("## 📊 Key Insights")
     st.markdown("---")
@@ -213,26 +263,307 @@ def create_tourist_places_visualizations(df):
     col7, col8, col9 = st.columns(3)
     
     with col7:
-        avg_rating = df['GOOGLE_REVIEW_RATING'].mean()
-        total_reviews = df['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'].sum()
         st.metric(
             "Average Rating ⭐",
-            f"{avg_rating:.1f}/5",
-            f"Based on {total_reviews:.1f} lakh reviews"
+            f"{kpis['avg_rating']:.1f}/5",
+            f"Based on {kpis['total_reviews']:.1f} lakh reviews"
         )
         
     with col8:
-        top_rated = df.loc[df['GOOGLE_REVIEW_RATING'].idxmax()]
-        st.metric(
-            "Highest Rated Place 🏆",
-            top_rated['NAME'],
-            f"{top_rated['GOOGLE_REVIEW_RATING']}⭐ - {top_rated['CITY']}"
-        )
+        top_rated = kpis['top_rated']
+        if top_rated is not None:
+            st.metric(
+                "Highest Rated Place 🏆",
+                top_rated['NAME'],
+                f"{top_rated['GOOGLE_REVIEW_RATING']}⭐ - {top_rated['CITY']}"
+            )
         
     with col9:
-        most_reviewed = df.loc[df['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS'].idxmax()]
-        st.metric(
-            "Most Popular Place 🌟",
-            most_reviewed['NAME'],
-            f"{most_reviewed['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS']:.1f} lakh reviews"
-        )
\ No newline at end of file
+        most_reviewed = kpis['most_reviewed']
+        if most_reviewed is not None:
+            st.metric(
+                "Most Popular Place 🌟",
+                most_reviewed['NAME'],
+                f"{most_reviewed['NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS']:.1f} lakh reviews"
+            )
+
+def render_place_details(place_data):
+    """Location and visit cards of one place (a row of DETAIL_COLUMNS)"""
+    # Enhanced place details display with cards
+    st.markdown("""
+    <style>
+    .info-card {
+        padding: 15px;
+        border-radius: 10px;
+        margin-bottom: 10px;
+        background-color: #f0f2f6;
+    }
+    </style>
+    """, unsafe_allow_html=True)
+
+    with st.container():
+        st.markdown('<div class="info-card">', unsafe_allow_html=True)
+        st.markdown("### 📌 Location Details")
+        st.write(f"🌍 **Zone:** {place_data['ZONE']}")
+        st.write(f"📍 **State:** {place_data['STATE']}")
+        st.write(f"🏙️ **City:** {place_data['CITY']}")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    with st.container():
+        st.markdown('<div class="info-card">', unsafe_allow_html=True)
+        st.markdown("### ℹ️ Visit Information")
+        st.write(f"⏱️ **Time needed:** {place_data['TIME_NEEDED_TO_VISIT_IN_HRS']} hours")
+        fee = place_data['ENTRANCE_FEE_IN_INR']
+        st.write(f"💰 **Entrance Fee:** ₹{fee:,.0f}" if pd.notna(fee) else "💰 **Entrance Fee:** N/A")
+        st.write(f"⭐ **Rating:** {place_data['GOOGLE_REVIEW_RATING']}/5")
+        st.write(f"📸 **DSLR Allowed:** {place_data['DSLR_ALLOWED']}")
+        st.write(f"🕒 **Best Time:** {place_data['BEST_TIME_TO_VISIT']}")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+def _explorer_options(explorer):
+    """Zone and type choices of the explorer, from its data or a pushed-down aggregate"""
+    if explorer is not None:
+        df = explorer['data']
+        return sorted(df['ZONE'].dropna().unique().tolist()), sorted(df['TYPE'].dropna().unique().tolist())
+    counts = get_aggregate_data(TABLE_NAME, ZONE_TYPE_COUNTS)
+    if counts is None:
+        return [], []
+    return sorted(counts['ZONE'].dropna().unique().tolist()), sorted(counts['TYPE'].dropna().unique().tolist())
+
+@fragment
+def render_place_explorer():
+    """Search, filter and place details (reruns on its own as a fragment)"""
+    with timed_render("place_explorer_fragment"):
+        # Fetched here, not passed in, so a fragment rerun after a data change
+        # sees rows and indexes of the same version
+        explorer = load_explorer()
+        zones, types = _explorer_options(explorer)
+        # Add a search filter with better styling; text is matched against a prebuilt index
+        search_col, zone_col, type_col = st.columns([2, 1, 1])
+        with search_col:
+            search_term = st.text_input("🔎 Search Places", "", help="Type to search places by name, city, state or type")
+            fuzzy = st.checkbox("Fuzzy matching", value=False, help="Also match misspelled words")
+        with zone_col:
+            zone = st.selectbox("Zone", ["All"] + zones)
+        with type_col:
+            place_type = st.selectbox("Type", ["All"] + types)
+
+        # Results are browsed a page at a time; only the current page reaches the browser
+        sort_col, order_col = st.columns([2, 1])
+        with sort_col:
+            sort_options = ([BEST_MATCH] if search_term.strip() else []) + list(SORT_COLUMNS)
+            sort_label = st.selectbox("Sort by", sort_options)
+        with order_col:
+            descending = st.radio("Order", ["Highest first", "Lowest first"], horizontal=True) == "Highest first"
+
+        zone_filter = None if zone == "All" else zone
+        type_filter = None if place_type == "All" else place_type
+        state = _browser_state((search_term, fuzzy, zone, place_type, sort_label, descending,
+                                paging_mode(explorer, sort_label)))
+        try:
+            page, has_more, next_cursor = browse_places(
+                explorer, search_term, zone_filter, type_filter, fuzzy, sort_label, descending, state['cursors'][-1]
+            )
+        except StaleCursorError:
+            # The place the page continued from is gone: start over and say so
+            st.info("The list of places changed since the last page, so it starts again from the first page.")
+            state['cursors'] = [None]
+            page, has_more, next_cursor = browse_places(
+                explorer, search_term, zone_filter, type_filter, fuzzy, sort_label, descending, None
+            )
+        place_names = page['NAME'].tolist() if page is not None else []
+        if not place_names:
+            st.info("No places match the current filters.")
+        else:
+            st.dataframe(page, hide_index=True, use_container_width=True)
+
+        prev_col, page_col, next_col = st.columns([1, 2, 1])
+        with prev_col:
+            st.button("◀ Previous", on_click=_previous_page, args=(state,),
+                      disabled=len(state['cursors']) == 1)
+        with page_col:
+            st.caption(f"Page {len(state['cursors'])}")
+        with next_col:
+            st.button("Next ▶", on_click=_next_page, args=(state, next_cursor), disabled=not has_more)
+    
+        col1, col2 = st.columns([1, 2])
+    
+        with col1:
+            selected_place = st.selectbox(
+                "Select a Tourist Place",
+                place_names
+            )
+        
+            # Details are fetched for the whole page at once, so picking another place on it is free
+            detail_df = None
+            if place_names:
+                detail_df = get_table_data(TABLE_NAME, columns=DETAIL_COLUMNS, filters=[('NAME', 'in', place_names)])
+            place_data = None
+            if detail_df is not None and selected_place is not None:
+                selected_rows = detail_df[detail_df['NAME'] == selected_place]
+                place_data = selected_rows.iloc[0] if not selected_rows.empty else None
+        
+            if place_data is not None:
+                render_place_details(place_data)
+        
+        with col2:
+            # Enhanced image display with better styling
+            if place_data is not None and not pd.isna(place_data['IMAGE_URL']):
+                st.markdown("""
+                <style>
+                .img-container {
+                    border-radius: 10px;
+                    overflow: hidden;
+                    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+                }
+                </style>
+                """, unsafe_allow_html=True)
+                st.markdown('<div class="img-container">', unsafe_allow_html=True)
+                st.image(get_place_image(place_data['IMAGE_URL']), caption=selected_place, use_column_width=True)
+                st.markdown('</div>', unsafe_allow_html=True)
+
+        if detail_df is not None:
+            # Warm the rest of the page's photos once the selected one has been requested
+            # (downloads someone waits for run ahead of prefetches in any case)
+            prefetch_place_images(detail_df['IMAGE_URL'].dropna().tolist())
+
+        if place_data is not None and explorer is not None:
+            render_similar_places(explorer, selected_place)
+
+def render_similar_places(explorer, place_name):
+    """Places most similar to the selected one, from the precomputed neighbour index"""
+    df = explorer['data']
+    row = explorer['browser'].row_of(place_name)
+    similar_index = load_similar_places(explorer)
+    if row is None or similar_index is None:
+        return
+    st.markdown("### 🧭 Similar Places")
+    scope = st.radio("Look for similar places", list(SIMILARITY_SCOPES), horizontal=True)
+    rows, distances = similar_index.similar(row, SIMILAR_COUNT, SIMILARITY_SCOPES[scope])
+    if not len(rows):
+        st.info("No similar places found in this area.")
+        return
+    similar = df.iloc[rows][SIMILAR_COLUMNS].reset_index(drop=True)
+    # 1 for an identical profile, falling towards 0 as places differ
+    similar['Similarity'] = (1 / (1 + distances)).round(2)
+    st.dataframe(similar, hide_index=True, use_container_width=True)
+
+def build_rating_scatter(df):
+    """Enhanced Rating vs Visit Time scatter plot"""
+    # Only the plotted columns, rounded to display precision and thinned when very dense
+    data, render_mode = prepare_scatter(
+        df, 'GOOGLE_REVIEW_RATING', 'TIME_NEEDED_TO_VISIT_IN_HRS',
+        ['ZONE', 'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS', 'NAME', 'CITY', 'STATE'],
+        precision={'GOOGLE_REVIEW_RATING': 1, 'TIME_NEEDED_TO_VISIT_IN_HRS': 1}
+    )
+    fig_scatter = px.scatter(
+        data,
+        x='GOOGLE_REVIEW_RATING',
+        y='TIME_NEEDED_TO_VISIT_IN_HRS',
+        color='ZONE',
+        size='NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS',
+        hover_data=['NAME', 'CITY', 'STATE'],
+        title='Tourist Places: Rating vs Visit Duration',
+        template='plotly_white',
+        render_mode=render_mode,
+        labels={
+            'GOOGLE_REVIEW_RATING': 'Google Rating ⭐',
+            'TIME_NEEDED_TO_VISIT_IN_HRS': 'Visit Duration (hours) ⏱️',
+            'NUMBER_OF_GOOGLE_REVIEW_IN_LAKHS': 'Reviews (lakhs) 👥',
+            'ZONE': 'Zone 🗺️'
+        }
+    )
+    fig_scatter.update_layout(
+        height=500,
+        title_x=0.5,
+        title_font_size=20,
+        showlegend=True,
+        legend_title_text='Zone 🗺️',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    fig_scatter.update_traces(
+        marker=dict(line=dict(width=1, color='white')),
+        opacity=0.7
+    )
+    return fig_scatter
+
+def build_zone_types_bar(df):
+    """Enhanced Type distribution by Zone"""
+    type_zone_count = get_aggregate_data(TABLE_NAME, ZONE_TYPE_COUNTS, fallback_df=df)
+    fig_bar = px.bar(
+        type_zone_count,
+        x='ZONE',
+        y='count',
+        color='TYPE',
+        title='Types of Tourist Places by Zone 🏛️',
+        template='plotly_white',
+        labels={
+            'count': 'Number of Places',
+            'ZONE': 'Zone',
+            'TYPE': 'Place Type'
+        },
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    fig_bar.update_layout(
+        height=500,
+        title_x=0.5,
+        title_font_size=20,
+        showlegend=True,
+        legend_title_text='Place Type',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        bargap=0.2
+    )
+    return fig_bar
+
+def build_fee_pie(df):
+    """Enhanced Entry Fee Analysis with ranges"""
+    fee_dist = get_aggregate_data(TABLE_NAME, FEE_RANGE_COUNTS, fallback_df=df)
+    
+    fig_pie = px.pie(
+        values=fee_dist['count'],
+        names=fee_dist['Fee_Range'].astype(str),
+        title='Entry Fee Distribution 💰',
+        hole=0.6,
+        template='plotly_white',
+        color_discrete_sequence=px.colors.sequential.Viridis
+    )
+    fig_pie.update_layout(
+        height=500,
+        title_x=0.5,
+        title_font_size=20,
+        showlegend=True,
+        legend_title_text='Fee Range'
+    )
+    fig_pie.update_traces(
+        textposition='outside',
+        textinfo='percent+label',
+        pull=[0.05] * len(fee_dist)
+    )
+    return fig_pie
+
+def build_best_time_donut(df):
+    """Enhanced Best Time Analysis"""
+    visit_time_dist = get_aggregate_data(TABLE_NAME, BEST_TIME_COUNTS, fallback_df=df)
+    fig_donut = px.pie(
+        values=visit_time_dist['count'],
+        names=visit_time_dist['BEST_TIME_TO_VISIT'],
+        title='Best Time to Visit Distribution 🕒',
+        hole=0.6,
+        template='plotly_white',
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    fig_donut.update_layout(
+        height=500,
+        title_x=0.5,
+        title_font_size=20,
+        showlegend=True,
+        legend_title_text='Time of Day'
+    )
+    fig_donut.update_traces(
+        textposition='outside',
+        textinfo='percent+label',
+        pull=[0.05] * len(visit_time_dist)
+    )
+    return fig_donut
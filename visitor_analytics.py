@@ -0,0 +1,105 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+def _safe_pct_change(current, previous):
+    """Percentage change that is NaN wherever the base is zero or missing"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = (current - previous) / previous * 100
+    return np.where((previous != 0) & np.isfinite(previous), change, np.nan)
+
+
+def _rolling_mean(values, window):
+    """Trailing mean over up to window columns of each row, skipping NaN (NaN if none are valid)
+
+    Same as DataFrame.rolling(window, min_periods=1).mean() along rows, from
+    cumulative sums of the whole matrix instead of one pass per row.
+    """
+    valid = ~np.isnan(values)
+    pad = np.zeros((values.shape[0], 1))
+    sums = np.hstack([pad, np.cumsum(np.where(valid, values, 0.0), axis=1)])
+    counts = np.hstack([pad, np.cumsum(valid, axis=1)])
+    end = np.arange(1, values.shape[1] + 1)
+    start = np.maximum(end - window, 0)
+    window_counts = counts[:, end] - counts[:, start]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(window_counts > 0, (sums[:, end] - sums[:, start]) / window_counts, np.nan)
+
+
+def compute_visitor_trends(df, id_col='COUNTRY', covid_years=('_2019', '_2020'), rolling_window=3):
+    """Compute growth and trend metrics for a country x year visitor table in one pass
+
+    Every metric is computed on the whole numeric matrix at once. Growth against
+    a zero or missing base is NaN rather than an error or infinity. Returns a
+    dict with:
+      years           year column names, in table order
+      yoy_growth      country x year frame of year-over-year growth (%)
+      avg_growth      mean YoY growth per country, ignoring NaN (%)
+      cagr            compound annual growth between first and last valid year (%)
+      rolling_avg     country x year frame of trailing rolling-average visitors
+      total           total visitors per country
+      rank            rank by total visitors (1 = largest)
+      covid_change    per-country change between covid_years (%), or None
+      overall_covid_change  change of the summed covid_years totals (%), or None
+    """
+    years = [col for col in df.columns if col != id_col]
+    index = pd.Index(df[id_col].astype(object), name=id_col)
+    values = df[years].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    n_rows, n_years = values.shape
+
+    yoy = _safe_pct_change(values[:, 1:], values[:, :-1])
+    yoy_growth = pd.DataFrame(yoy, index=index, columns=years[1:])
+    with warnings.catch_warnings():
+        # All-NaN rows (no computable growth) warn "Mean of empty slice"
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        avg_growth = pd.Series(
+            np.nanmean(yoy, axis=1) if n_years > 1 else np.full(n_rows, np.nan),
+            index=index
+        )
+
+    # CAGR between each row's first and last non-missing year
+    valid = ~np.isnan(values)
+    rows = np.arange(n_rows)
+    if n_years:
+        first_idx = valid.argmax(axis=1)
+        last_idx = n_years - 1 - valid[:, ::-1].argmax(axis=1)
+        first = values[rows, first_idx]
+        last = values[rows, last_idx]
+        periods = (last_idx - first_idx).astype('float64')
+        ok = valid.any(axis=1) & (periods > 0) & (first > 0) & (last >= 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cagr_values = np.where(ok, (np.power(last / first, 1 / periods) - 1) * 100, np.nan)
+    else:
+        cagr_values = np.full(n_rows, np.nan)
+    cagr = pd.Series(cagr_values, index=index)
+
+    rolling_avg = pd.DataFrame(_rolling_mean(values, rolling_window), index=index, columns=years)
+
+    totals = np.nansum(values, axis=1)
+    total = pd.Series(totals, index=index)
+    rank = total.rank(ascending=False, method='min').astype('int64')
+
+    covid_change = None
+    overall_covid_change = None
+    before, after = covid_years
+    if before in years and after in years:
+        before_values = values[:, years.index(before)]
+        after_values = values[:, years.index(after)]
+        covid_change = pd.Series(_safe_pct_change(after_values, before_values), index=index)
+        overall = _safe_pct_change(np.nansum(after_values), np.nansum(before_values))
+        overall_covid_change = float(overall)
+
+    return {
+        'years': years,
+        'yoy_growth': yoy_growth,
+        'avg_growth': avg_growth,
+        'cagr': cagr,
+        'rolling_avg': rolling_avg,
+        'total': total,
+        'rank': rank,
+        'covid_change': covid_change,
+        'overall_covid_change': overall_covid_change,
+    }
+